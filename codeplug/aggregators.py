@@ -1,3 +1,6 @@
+from validators import tag_generator
+
+
 class ContactAggregator:
     def __init__(self, *contact_generators):
         self.generators = contact_generators
@@ -5,7 +8,7 @@ class ContactAggregator:
     def contacts(self, sequence):
         contacts = []
         for gen in self.generators:
-            contacts += gen.contacts(sequence)
+            contacts += tag_generator(gen.contacts(sequence), gen)
         return contacts
 
 
@@ -21,7 +24,7 @@ class ChannelAggregator:
                 print(
                     f"Warning: Channel generator {gen.__class__.__name__} produced no channels."
                 )
-            channels += generated_channels
+            channels += tag_generator(generated_channels, gen)
         return channels
 
 
@@ -32,5 +35,5 @@ class ZoneAggregator:
     def zones(self, sequence):
         zones = []
         for gen in self.generators:
-            zones += gen.zones(sequence)
+            zones += tag_generator(gen.zones(sequence), gen)
         return zones
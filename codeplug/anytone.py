@@ -1,7 +1,22 @@
 from generators import Sequence  # NOTE: 02/01/2024 (jps): Not sure this belongs here.
+from validators import RadioLimits
 
 
 class AT878UV:
+    LIMITS = RadioLimits(
+        channels=4000,
+        zones=250,
+        channels_per_zone=250,
+        scanlists=250,
+        channels_per_scanlist=50,
+        grouplists=250,
+        contacts_per_grouplist=64,
+        contacts=10000,
+        roaming_channels=250,
+        roaming_zones=64,
+        channels_per_roaming_zone=64,
+    )
+
     # NOTE: 25/12/2023 (jps): This decides which sections to write.
     def __init__(
         self,
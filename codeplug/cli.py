@@ -3,6 +3,7 @@ import sys
 import argparse
 
 from anytone import AT878UV
+from datasources.cache import FileCache
 from writers import QDMRWriter
 
 if __name__ == "__main__":
@@ -17,6 +18,11 @@ if __name__ == "__main__":
         action="store_true",
         help="Enable debug mode to show filtered records",
     )
+    parser.add_argument(
+        "--stable-ids",
+        action="store_true",
+        help="Keep internal IDs of unchanged entries between runs",
+    )
 
     args = parser.parse_args()
 
@@ -29,4 +35,12 @@ if __name__ == "__main__":
         QDMRWriter,
         args.timezone,
         debug=args.debug,
+        stable_ids=args.stable_ids,
     ).generate()
+
+    if args.debug:
+        stats = FileCache.memory.stats()
+        print(
+            f"[cache] {stats['hits']} memory hits, {stats['misses']} misses, "
+            f"{stats['entries']} entries held"
+        )
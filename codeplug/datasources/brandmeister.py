@@ -5,19 +5,78 @@ from datetime import datetime, timedelta
 import requests
 
 from .cache import FileCache
+from .devicestore import DeviceStore
+from .records import from_brandmeister, normalize
+from .resources import Resource
 
 ContactDB = json.load(open("data/brandmeister_talkgroups.json"))
 UnlistedContactDB = json.load(open("data_static/brandmeister_unlisted_talkgroups.json"))
 
 
 class DeviceDB(FileCache):
+    URL = "https://api.brandmeister.network/v2/device/?repeater=true"
+
     def __init__(self):
         FileCache.__init__(self, "bm_devices")
-        self.devices = self.cached(
+        self._devices = None
+
+    @property
+    def devices(self):
+        if self._devices is None:
+            self._devices = self._fetch()
+        return self._devices
+
+    def _fetch(self, refresh=False):
+        # The dump is large: stream it to disk rather than into memory
+        return self.cached("repeaters", self.URL, refresh=refresh, stream=True)
+
+    def resource(self):
+        return Resource(
+            "brandmeister devices",
             "repeaters",
-            f"https://api.brandmeister.network/v2/device/?repeater=true",
+            fetch=self._fetch,
+            is_cached=lambda: self.snapshot_id("repeaters") is not None,
         )
 
+    def refresh(self):
+        """Download the device list again, replacing the cached copy"""
+        self._devices = self._fetch(refresh=True)
+        return self._devices
+
+    def store(self):
+        """
+        The columnar DeviceStore, rebuilt only when the device dump changed
+        """
+        snapshot = self.snapshot_id("repeaters")
+        if snapshot is None:
+            self._devices = self._fetch()
+            snapshot = self.snapshot_id("repeaters")
+        store = DeviceStore()
+        store.sync(snapshot, lambda: normalize(from_brandmeister, self.devices))
+        return store
+
+    def records(self, prefixes=None, **constraints):
+        """
+        Devices as RepeaterRecords, read from the columnar store without
+        parsing the device dump.
+
+        Args:
+            prefixes: Device ID prefixes (MCCs) to load, e.g. ["260"]; all
+                      partitions by default
+            **constraints: Column filters, see DevicePartition.select()
+        """
+        constraints.setdefault("hotspots", True)
+        return self.store().records(prefixes, **constraints)
+
+    def records_recently_active(self, days=30, prefixes=None):
+        return [
+            r
+            for r in self.records(prefixes)
+            if r.last_seen
+            and datetime.now() - datetime.fromisoformat(r.last_seen)
+            < timedelta(days=days)
+        ]
+
     def devices_recently_active(self, days=30):
         return [
             d
@@ -32,10 +91,19 @@ class TalkgroupAPI(FileCache):
     def __init__(self):
         FileCache.__init__(self, "static_talkgroups")
 
-    def static_talkgroups(self, device_id):
+    def resource(self, device_id):
+        return Resource(
+            "static talkgroups",
+            str(device_id),
+            fetch=lambda: self.static_talkgroups(device_id),
+            is_cached=lambda: self.snapshot_id(device_id) is not None,
+        )
+
+    def static_talkgroups(self, device_id, refresh=False):
         response_json = self.cached(
             device_id,
             f"https://api.brandmeister.network/v2/device/{device_id}/talkgroup",
+            refresh=refresh,
         )
         return [
             (int(entry["talkgroup"]), int(entry["slot"])) for entry in response_json
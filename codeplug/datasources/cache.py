@@ -1,31 +1,315 @@
+import contextlib
+import copy
 import pathlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import os
 import os.path
 import json
-import requests
+import tempfile
+import time
+
+from . import jsonstream, transport
+from .serializers import codec_for, decode_entry, encode_entry
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writes are still atomic
+    fcntl = None
 
 # TODO: 2024-02-01 (jps): Add cache expiration after say 1 week.
 
 
+def atomic_write(path, data):
+    """
+    Replace path with data (str or bytes) so readers see the old file or the
+    new one, never a partial write.
+    """
+    directory, name = os.path.split(path)
+    fd, tmp = tempfile.mkstemp(dir=directory or ".", prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp)
+        raise
+
+
+# Last access is recorded in a file's atime, at most this often (seconds)
+ACCESS_RESOLUTION = 60
+
+
+def touch(path, stat=None):
+    """
+    Record an access to a cache file for LRU eviction, keeping its mtime.
+
+    The atime is set explicitly, as noatime/relatime mounts would not keep it
+    current. The mtime is left alone since snapshot_id() relies on it.
+    """
+    try:
+        stat = stat or os.stat(path)
+        now = time.time_ns()
+        if now - stat.st_atime_ns > ACCESS_RESOLUTION * 1_000_000_000:
+            os.utime(path, ns=(now, stat.st_mtime_ns))
+    except OSError:
+        pass
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; copy it to modify")
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict shared between callers of the memory cache.
+
+    copy(), dict(...) and copy.deepcopy() return ordinary, mutable copies.
+    """
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {k: copy.deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FrozenList(list):
+    """Read-only list shared between callers of the memory cache"""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def copy(self):
+        return list(self)
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(v, memo) for v in self]
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def freeze(value):
+    """Recursively make a decoded JSON value read-only"""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+class MemoryCache:
+    """
+    Process-wide LRU of decoded FileCache entries.
+
+    Bounded by entry count and by the size of the entries on disk. Values are
+    frozen (see freeze()) because every caller shares the same object.
+    """
+
+    def __init__(self, max_entries=10_000, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """(found, value)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key][0]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, size):
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def invalidate(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+    def _discard(self, key):
+        if key in self._entries:
+            _, size = self._entries.pop(key)
+            self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
 class FileCache:
-    def __init__(self, prefix, method=json):
+    """
+    Cache of downloaded documents under cache/<prefix>, one file per key.
+
+    Safe to share between processes: entries are replaced atomically, a
+    download holds an advisory lock on its key so concurrent callers wait for
+    it instead of fetching the same document again, and entries that fail to
+    decode are treated as missing and fetched again.
+
+    Values returned by cached() are also kept in memory (FileCache.memory),
+    so repeated lookups within a process read the disk once. They are shared
+    and therefore read-only; copy them before modifying.
+
+    Entries are written with the codec configured for the prefix (see
+    serializers.codec_for); existing entries are read with whichever codec
+    wrote them.
+    """
+
+    memory = MemoryCache()
+
+    def __init__(self, prefix, method=json, codec=None):
         self.prefix = prefix
         self.method = method
+        self.codec = codec or codec_for(prefix)
         pathlib.Path(self.__cache_dir()).mkdir(parents=True, exist_ok=True)
 
-    def cached(self, key, source):
-        filename = self.__cache_key(key)
-        if os.path.isfile(filename):
-            content = open(filename).read()
-            return self.method.loads(content)
-        else:
-            content = self.method.loads(self.__retrieve(source))
+    def cached(self, key, source, parse=None, refresh=False, stream=False):
+        """
+        Return the cached value for key, retrieving it from source on a miss.
+
+        The retrieved body is decoded with self.method unless a parse callable
+        is given, in which case parse(body) produces the value to cache. This
+        lets a source be stored in a different shape than it is downloaded in.
+        With refresh=True the source is retrieved even if key is cached.
+
+        With stream=True, meant for large documents, the body is downloaded
+        to a file next to the entry (resuming an interrupted download) and
+        decoded from there, a JSON array item by item (see jsonstream.load);
+        parse then receives the open binary file.
+        """
+        memory_key = self.__memory_key(key)
+        if not refresh:
+            found, content = self.memory.get(memory_key)
+            if found:
+                return content
+            found, content, size = self.__load(key)
+            if found:
+                return self.__remember(memory_key, content, size)
+
+        with self.lock(key):
+            # Someone else may have fetched it while we waited for the lock
+            if not refresh:
+                found, content, size = self.__load(key)
+                if found:
+                    return self.__remember(memory_key, content, size)
+            if stream:
+                content, size = self.__retrieve_streamed(key, source, parse)
+            else:
+                body = self.__retrieve(source)
+                content = parse(body) if parse else self.method.loads(body)
+                size = len(body)
             self.write_cache(key, content)
-            return content
+            return self.__remember(memory_key, content, size)
+
+    def read_cache(self, key, default=None):
+        """The cached value for key as a private, mutable copy, or default"""
+        found, content, _ = self.__load(key)
+        return content if found else default
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        """Hold an exclusive advisory lock on key, across threads and processes"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.file_path(f".{key}.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def evict(self, key):
+        """Remove the cached value for key, if any"""
+        self.memory.invalidate(self.__memory_key(key))
+        try:
+            os.remove(self.__cache_key(key))
+        except FileNotFoundError:
+            pass
+
+    def file_path(self, name):
+        """Path for a file kept alongside the cache entries, e.g. derived data"""
+        return f"{self.__cache_dir()}/{name}"
+
+    def snapshot_id(self, key):
+        """
+        Identify the cached copy of key by modification time and size.
+
+        Returns None if nothing is cached for key. Derived data can store this
+        to notice when the entry it was built from has been replaced.
+        """
+        try:
+            stat = os.stat(self.__cache_key(key))
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def modified_at(self, key):
+        """When the cached copy of key was written, as a datetime, or None"""
+        try:
+            return datetime.fromtimestamp(os.stat(self.__cache_key(key)).st_mtime)
+        except FileNotFoundError:
+            return None
 
     def write_cache(self, key, value):
-        filename = self.__cache_key(key)
-        with open(filename, "w") as f:
-            f.write(self.method.dumps(value))
+        self.memory.invalidate(self.__memory_key(key))
+        atomic_write(self.__cache_key(key), encode_entry(value, self.codec))
+
+    def __load(self, key):
+        """(found, value, size); missing and corrupted entries are not found"""
+        try:
+            with open(self.__cache_key(key), "rb") as f:
+                stat = os.fstat(f.fileno())
+                content = decode_entry(f.read(), self.method)
+                touch(f.name, stat)
+                return True, content, stat.st_size
+        except (FileNotFoundError, ValueError):
+            return False, None, 0
+
+    def __remember(self, memory_key, content, size):
+        content = freeze(content)
+        self.memory.put(memory_key, content, size)
+        return content
+
+    def __memory_key(self, key):
+        # Absolute, as the cache directory is relative to the working directory
+        return os.path.abspath(self.__cache_key(key))
 
     def __cache_key(self, key):
         return f"{self.__cache_dir()}/{key}.{self.method.__name__}"
@@ -34,4 +318,21 @@ class FileCache:
         return f"cache/{self.prefix}"
 
     def __retrieve(self, source):
-        return requests.get(source).content
+        response = transport.get(source)
+        response.raise_for_status()
+        return response.content
+
+    def __retrieve_streamed(self, key, source, parse):
+        """(value, size) of source, downloaded to disk and parsed from there"""
+        path = transport.download(source, self.file_path(f".{key}.download"))
+        try:
+            with open(path, "rb") as f:
+                if parse:
+                    content = parse(f)
+                elif self.method is json:
+                    content = jsonstream.load(f)
+                else:
+                    content = self.method.load(f)
+            return content, os.path.getsize(path)
+        finally:
+            os.remove(path)
@@ -0,0 +1,168 @@
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+CACHE_ROOT = "cache"
+
+# Built locally rather than downloaded, so they are never evicted
+PINNED_PREFIXES = ("gazetteer",)
+
+# Temporary files of interrupted writes and downloads older than this are
+# removed
+STALE_TEMP_AGE = timedelta(hours=1)
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_size(text):
+    """Parse a size such as "500M" or "2G" into bytes"""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*", text.upper())
+    if not m:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(m.group(1)) * SIZE_UNITS[m.group(2)])
+
+
+def format_size(size):
+    for unit in ("", "K", "M"):
+        if size < 1024:
+            return f"{size:.0f}{unit}B" if unit == "" else f"{size:.1f}{unit}B"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+@dataclass
+class CacheEntry:
+    prefix: str
+    path: str
+    size: int
+    last_access: float
+
+    @property
+    def pinned(self):
+        # Keys starting with "_" hold bookkeeping such as sync state
+        name = os.path.basename(self.path)
+        return self.prefix in PINNED_PREFIXES or name.startswith("_")
+
+
+def _is_temporary(name):
+    return name.startswith(".") and name.endswith((".tmp", ".part", ".part.meta"))
+
+
+def scan(root=CACHE_ROOT, prefixes=None):
+    """
+    All cache entries under root, skipping lock and temporary files.
+
+    Last access is the later of atime and mtime; FileCache records reads in
+    the atime (see cache.touch).
+    """
+    entries = []
+    if not os.path.isdir(root):
+        return entries
+    for prefix in sorted(os.listdir(root)):
+        directory = os.path.join(root, prefix)
+        if not os.path.isdir(directory) or (prefixes and prefix not in prefixes):
+            continue
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                entries.append(
+                    CacheEntry(
+                        prefix,
+                        entry.path,
+                        stat.st_size,
+                        max(stat.st_atime, stat.st_mtime),
+                    )
+                )
+    return entries
+
+
+def cache_stats(root=CACHE_ROOT, prefixes=None):
+    """Per prefix: number of entries, bytes, oldest and newest access time"""
+    stats = {}
+    for entry in scan(root, prefixes):
+        s = stats.setdefault(
+            entry.prefix,
+            {
+                "entries": 0,
+                "bytes": 0,
+                "oldest_access": entry.last_access,
+                "newest_access": entry.last_access,
+            },
+        )
+        s["entries"] += 1
+        s["bytes"] += entry.size
+        s["oldest_access"] = min(s["oldest_access"], entry.last_access)
+        s["newest_access"] = max(s["newest_access"], entry.last_access)
+    return stats
+
+
+def _remove_stale_temporaries(root, now):
+    if not os.path.isdir(root):
+        return
+    for prefix in os.listdir(root):
+        directory = os.path.join(root, prefix)
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if (
+                    _is_temporary(name)
+                    and now - os.stat(path).st_mtime > STALE_TEMP_AGE.total_seconds()
+                ):
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def collect_garbage(
+    root=CACHE_ROOT, max_bytes=None, max_age=None, prefixes=None, dry_run=False
+):
+    """
+    Evict cache entries not accessed within max_age, then least recently used
+    entries until the cache fits in max_bytes.
+
+    Pinned entries are never evicted but count towards the size. Evicted
+    entries are simply downloaded or rebuilt when next needed.
+
+    Args:
+        root: Cache directory
+        max_bytes: Size cap in bytes, or None
+        max_age: timedelta, or None
+        prefixes: Only consider these prefixes (default: all)
+        dry_run: Only report what would be evicted
+
+    Returns:
+        List of evicted CacheEntry
+    """
+    now = time.time()
+    entries = scan(root, prefixes)
+    candidates = sorted(
+        (e for e in entries if not e.pinned), key=lambda e: e.last_access
+    )
+    total = sum(e.size for e in entries)
+    cutoff = now - max_age.total_seconds() if max_age is not None else None
+
+    evicted = []
+    for entry in candidates:
+        expired = cutoff is not None and entry.last_access < cutoff
+        oversize = max_bytes is not None and total > max_bytes
+        if not (expired or oversize):
+            # Candidates are sorted by last access: none of the rest is
+            # expired, and the cache already fits
+            break
+        evicted.append(entry)
+        total -= entry.size
+
+    if not dry_run:
+        for entry in evicted:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        _remove_stale_temporaries(root, now)
+    return evicted
@@ -0,0 +1,327 @@
+import json
+import math
+import os
+import pathlib
+import sqlite3
+
+from filters import haversine_distance
+
+from .records import RECORD_FIELDS, RepeaterRecord, repeater_identity
+
+# Bump whenever SCHEMA changes; older catalogs are emptied and must be rebuilt
+CATALOG_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repeaters (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    callsign TEXT NOT NULL,
+    rx_freq REAL NOT NULL,
+    tx_freq REAL NOT NULL,
+    rx_tone REAL,
+    tx_tone REAL,
+    color_code INTEGER,
+    lat REAL,
+    lng REAL,
+    locator TEXT,
+    qth TEXT,
+    analog INTEGER NOT NULL,
+    dmr INTEGER NOT NULL,
+    hotspot INTEGER NOT NULL,
+    status TEXT,
+    last_seen TEXT,
+    region TEXT,
+    UNIQUE (source, source_id)
+);
+CREATE TABLE IF NOT EXISTS ingests (
+    source TEXT PRIMARY KEY,
+    regions TEXT NOT NULL,
+    snapshots TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS repeater_locations USING rtree (
+    id, min_lat, max_lat, min_lng, max_lng
+);
+CREATE INDEX IF NOT EXISTS repeaters_rx_freq ON repeaters (rx_freq);
+CREATE INDEX IF NOT EXISTS repeaters_mode ON repeaters (analog, dmr);
+CREATE INDEX IF NOT EXISTS repeaters_callsign ON repeaters (callsign);
+CREATE INDEX IF NOT EXISTS repeaters_region ON repeaters (source, region);
+"""
+
+DROP = """
+DROP TABLE IF EXISTS repeaters;
+DROP TABLE IF EXISTS repeater_locations;
+DROP TABLE IF EXISTS ingests;
+"""
+
+# Kilometres per degree of latitude
+KM_PER_DEGREE = 111.32
+
+
+def bounding_box(lat, lng, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing a circle around a point"""
+    dlat = radius_km / KM_PER_DEGREE
+    # Longitude degrees shrink towards the poles; near them, take the whole band
+    cos_lat = math.cos(math.radians(lat))
+    dlng = 180.0 if cos_lat < 1e-6 else radius_km / (KM_PER_DEGREE * cos_lat)
+    if lng - dlng < -180.0 or lng + dlng > 180.0:
+        # Crossing the antimeridian; fall back to every longitude
+        return (lat - dlat, lat + dlat, -180.0, 180.0)
+    return (lat - dlat, lat + dlat, lng - dlng, lng + dlng)
+
+
+class RepeaterCatalog:
+    """
+    Local SQLite catalog of RepeaterRecords from every source.
+
+    Coordinates are indexed with an R*Tree and frequency, mode and callsign
+    with B-trees, so "which repeaters are within X km and on band Y" only
+    reads the matching rows instead of whole source dumps.
+
+    Every ingest records the regions it covered and the snapshot IDs of the
+    cache entries it was read from, so readers can tell whether the catalog
+    still answers their query (see covers()).
+
+    Usage:
+        catalog = RepeaterCatalog()
+        catalog.ingest("brandmeister", DeviceDB().records())
+        records = catalog.query(near=(37.39, -122.08, 50), bands=[(144, 148)])
+    """
+
+    def __init__(self, path="cache/catalog.sqlite"):
+        if path != ":memory:":
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version != CATALOG_VERSION:
+            self.connection.executescript(DROP)
+            self.connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def ingest(self, source, records, snapshots=None):
+        """
+        Replace all rows of a source with records, in one transaction.
+
+        Records repeating a (source, source_id) already ingested are skipped.
+        Returns the number of rows stored.
+
+        Args:
+            snapshots: {cache key: snapshot ID} of the entries records were
+                       read from, see FileCache.snapshot_id()
+        """
+        return self.ingest_regions(source, {None: records}, snapshots)
+
+    def ingest_regions(self, source, records_by_region, snapshots=None):
+        """
+        Like ingest(), for records read region by region, e.g.
+        {"United States:06": [...]}. Rows remember their region, and a
+        repeater listed in several regions is kept in the first one only.
+        """
+        columns = ", ".join(RECORD_FIELDS + ["region"])
+        placeholders = ", ".join("?" for _ in RECORD_FIELDS + ["region"])
+        count = 0
+        seen = set()
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM repeater_locations WHERE id IN "
+                "(SELECT id FROM repeaters WHERE source = ?)",
+                (source,),
+            )
+            self.connection.execute("DELETE FROM repeaters WHERE source = ?", (source,))
+            for region, records in records_by_region.items():
+                identities = set()
+                for record in records:
+                    if record.source != source:
+                        raise ValueError(
+                            f"Record from {record.source} ingested as {source}"
+                        )
+                    identity = repeater_identity(record.callsign, record.rx_freq)
+                    if identity in seen:
+                        continue
+                    identities.add(identity)
+                    cursor = self.connection.execute(
+                        f"INSERT OR IGNORE INTO repeaters ({columns}) "
+                        f"VALUES ({placeholders})",
+                        record.to_row() + [region],
+                    )
+                    if cursor.rowcount == 0:
+                        continue
+                    if record.lat is not None and record.lng is not None:
+                        self.connection.execute(
+                            "INSERT INTO repeater_locations VALUES (?, ?, ?, ?, ?)",
+                            (
+                                cursor.lastrowid,
+                                record.lat,
+                                record.lat,
+                                record.lng,
+                                record.lng,
+                            ),
+                        )
+                    count += 1
+                seen |= identities
+            self.connection.execute(
+                "INSERT OR REPLACE INTO ingests VALUES (?, ?, ?)",
+                (
+                    source,
+                    json.dumps([r for r in records_by_region if r is not None]),
+                    json.dumps(snapshots or {}, sort_keys=True),
+                ),
+            )
+        return count
+
+    def sources(self):
+        """Row counts per ingested source"""
+        return dict(
+            self.connection.execute(
+                "SELECT source, COUNT(*) FROM repeaters GROUP BY source ORDER BY source"
+            )
+        )
+
+    def query(
+        self,
+        *,
+        near=None,
+        bbox=None,
+        bands=None,
+        sources=None,
+        analog=None,
+        dmr=None,
+        hotspots=False,
+        callsign=None,
+        regions=None,
+    ):
+        """
+        Find repeaters using the catalog's indexes.
+
+        Args:
+            near: (lat, lng, radius_km); the bounding box is searched through the
+                  R*Tree, then trimmed to the exact great-circle radius
+            bbox: (min_lat, max_lat, min_lng, max_lng)
+            bands: List of (min_freq, max_freq) tuples in MHz, on rx_freq
+            sources: Source names to include, e.g. ["repeaterbook"]
+            analog: If set, only records whose analog flag matches
+            dmr: If set, only records whose dmr flag matches
+            hotspots: Include hotspots (default: False)
+            callsign: SQL LIKE pattern, e.g. "SR%"
+            regions: Regions to include, as passed to ingest_regions()
+
+        Returns:
+            List of RepeaterRecord, ordered by rx_freq then callsign
+        """
+        clauses = []
+        params = []
+
+        if near is not None:
+            bbox = bounding_box(*near)
+        if bbox is not None:
+            clauses.append(
+                "id IN (SELECT id FROM repeater_locations "
+                "WHERE max_lat >= ? AND min_lat <= ? AND max_lng >= ? AND min_lng <= ?)"
+            )
+            params += list(bbox)
+
+        if bands:
+            clauses.append(
+                "(" + " OR ".join("rx_freq BETWEEN ? AND ?" for _ in bands) + ")"
+            )
+            for low, high in bands:
+                params += [low, high]
+
+        if sources:
+            clauses.append(f"source IN ({', '.join('?' for _ in sources)})")
+            params += list(sources)
+
+        for column, value in (("analog", analog), ("dmr", dmr)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(int(value))
+
+        if not hotspots:
+            clauses.append("hotspot = 0")
+
+        if callsign is not None:
+            clauses.append("callsign LIKE ?")
+            params.append(callsign)
+
+        if regions is not None:
+            clauses.append(f"region IN ({', '.join('?' for _ in regions)})")
+            params += list(regions)
+
+        sql = f"SELECT {', '.join(RECORD_FIELDS)} FROM repeaters"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY rx_freq, callsign"
+
+        records = [self._record(row) for row in self.connection.execute(sql, params)]
+        if near is not None:
+            lat, lng, radius_km = near
+            records = [
+                r
+                for r in records
+                if haversine_distance(lat, lng, r.lat, r.lng) <= radius_km
+            ]
+        return records
+
+    def covers(self, source, regions=None, snapshot_id=None):
+        """
+        Whether the catalog holds source, for every one of regions (if given),
+        as ingested from the cache entries snapshot_id(key) still identifies.
+        A source whose entries were refreshed or evicted since is not covered.
+        """
+        row = self.connection.execute(
+            "SELECT regions, snapshots FROM ingests WHERE source = ?", (source,)
+        ).fetchone()
+        if row is None:
+            return False
+        ingested_regions, snapshots = json.loads(row[0]), json.loads(row[1])
+        if regions is not None and not set(regions) <= set(ingested_regions):
+            return False
+        if snapshot_id is not None:
+            return all(snapshot_id(key) == sid for key, sid in snapshots.items())
+        return True
+
+    def _record(self, row):
+        row = list(row)
+        for name in ("analog", "dmr", "hotspot"):
+            index = RECORD_FIELDS.index(name)
+            row[index] = bool(row[index])
+        return RepeaterRecord.from_row(row)
+
+
+def catalog_covers(path, source, regions=None, snapshot_id=None):
+    """RepeaterCatalog.covers() of the catalog at path; False if there is none"""
+    if not os.path.exists(path):
+        return False
+    catalog = RepeaterCatalog(path)
+    try:
+        return catalog.covers(source, regions, snapshot_id)
+    finally:
+        catalog.close()
+
+
+def query_catalog(path, source, regions=None, snapshot_id=None, **query):
+    """
+    RepeaterCatalog.query() restricted to one source, for recipes which prefer
+    the catalog when one was built (tools.py build-catalog).
+
+    Args:
+        regions: Regions the answer must cover; rows are limited to them
+        snapshot_id: The source's FileCache.snapshot_id, to reject a catalog
+                     ingested from entries that have since changed
+
+    Returns:
+        List of RepeaterRecord, or None if there is no catalog at path or it
+        does not cover the source, regions and current snapshots
+    """
+    if not os.path.exists(path):
+        return None
+    catalog = RepeaterCatalog(path)
+    try:
+        if not catalog.covers(source, regions, snapshot_id):
+            return None
+        return catalog.query(sources=[source], regions=regions, **query)
+    finally:
+        catalog.close()
@@ -0,0 +1,325 @@
+import array
+import math
+import mmap
+import os
+import struct
+
+import maidenhead as mh
+
+from .cache import FileCache, atomic_write, touch
+from .records import RepeaterRecord
+
+# Bump whenever the file layout changes, so partitions are rebuilt
+STORE_VERSION = 1
+
+MAGIC = b"BMDS"
+# magic, version, count, number of strings
+HEADER = struct.Struct("<4sHxxII")
+
+# Fixed width columns, in file order. Missing floats are NaN, missing strings
+# NO_STRING, a missing color code -1.
+COLUMNS = [
+    ("id", "q"),
+    ("rx_freq", "d"),
+    ("tx_freq", "d"),
+    ("lat", "d"),
+    ("lng", "d"),
+    ("color_code", "h"),
+    ("hotspot", "B"),
+    ("callsign", "I"),
+    ("city", "I"),
+    ("status", "I"),
+    ("last_seen", "I"),
+]
+NO_STRING = 0xFFFFFFFF
+
+
+def partition_key(source_id):
+    """
+    Partition of a Brandmeister device ID: its first three digits, which are
+    the MCC (country) for repeater IDs, e.g. "260" for Poland.
+    """
+    return str(source_id)[:3]
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(count):
+    """Byte offset of each column, and where the string table starts"""
+    offsets = {}
+    position = HEADER.size
+    for name, fmt in COLUMNS:
+        position = _align(position)
+        offsets[name] = position
+        position += count * struct.calcsize(fmt)
+    return offsets, _align(position)
+
+
+def _nan_if_none(value):
+    return math.nan if value is None else value
+
+
+def _none_if_nan(value):
+    return None if math.isnan(value) else value
+
+
+def encode_partition(records):
+    """Serialize RepeaterRecords into the bytes of one partition file"""
+    strings = []
+    string_index = {}
+
+    def intern(value):
+        if value is None:
+            return NO_STRING
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value)
+        return string_index[value]
+
+    columns = {name: array.array(fmt) for name, fmt in COLUMNS}
+    for record in records:
+        columns["id"].append(int(record.source_id))
+        columns["rx_freq"].append(record.rx_freq)
+        columns["tx_freq"].append(record.tx_freq)
+        columns["lat"].append(_nan_if_none(record.lat))
+        columns["lng"].append(_nan_if_none(record.lng))
+        columns["color_code"].append(
+            -1 if record.color_code is None else record.color_code
+        )
+        columns["hotspot"].append(int(record.hotspot))
+        columns["callsign"].append(intern(record.callsign))
+        columns["city"].append(intern(record.qth))
+        columns["status"].append(intern(record.status))
+        columns["last_seen"].append(intern(record.last_seen))
+
+    count = len(records)
+    offsets, strings_start = _layout(count)
+    encoded = [s.encode("utf-8") for s in strings]
+    string_offsets = array.array("I", [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    out = bytearray(strings_start)
+    HEADER.pack_into(out, 0, MAGIC, STORE_VERSION, count, len(strings))
+    for name, _ in COLUMNS:
+        data = columns[name].tobytes()
+        out[offsets[name] : offsets[name] + len(data)] = data
+    out += string_offsets.tobytes()
+    out += b"".join(encoded)
+    return bytes(out)
+
+
+class DevicePartition:
+    """
+    One memory-mapped partition of the device store.
+
+    Columns are memoryviews straight onto the mapped file, so reading one
+    only pages in that column. Strings are decoded on demand.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            touch(path, os.fstat(f.fileno()))
+        view = memoryview(self._mmap)
+        magic, version, count, string_count = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != STORE_VERSION:
+            raise ValueError(f"{path} is not a version {STORE_VERSION} device store")
+
+        self.count = count
+        offsets, strings_start = _layout(count)
+        self.columns = {}
+        for name, fmt in COLUMNS:
+            start = offsets[name]
+            end = start + count * struct.calcsize(fmt)
+            self.columns[name] = view[start:end].cast(fmt)
+
+        blob_start = strings_start + (string_count + 1) * 4
+        self._string_offsets = view[strings_start:blob_start].cast("I")
+        self._strings = view[blob_start:]
+
+    def __len__(self):
+        return self.count
+
+    def string(self, index):
+        if index == NO_STRING:
+            return None
+        start, end = self._string_offsets[index], self._string_offsets[index + 1]
+        return bytes(self._strings[start:end]).decode("utf-8")
+
+    def select(self, *, bands=None, bbox=None, hotspots=False):
+        """
+        Row indices matching all given constraints, evaluated on the columns.
+
+        Args:
+            bands: List of (min_freq, max_freq) tuples in MHz, on rx_freq
+            bbox: (min_lat, max_lat, min_lng, max_lng); rows without
+                  coordinates never match
+            hotspots: Include hotspots (default: False)
+        """
+        rows = range(self.count)
+        if not hotspots:
+            hotspot = self.columns["hotspot"]
+            rows = [i for i in rows if not hotspot[i]]
+        if bands:
+            rx_freq = self.columns["rx_freq"]
+            rows = [
+                i for i in rows if any(low <= rx_freq[i] <= high for low, high in bands)
+            ]
+        if bbox:
+            min_lat, max_lat, min_lng, max_lng = bbox
+            lat, lng = self.columns["lat"], self.columns["lng"]
+            # NaN compares false, so rows without coordinates drop out
+            rows = [
+                i
+                for i in rows
+                if min_lat <= lat[i] <= max_lat and min_lng <= lng[i] <= max_lng
+            ]
+        return list(rows)
+
+    def record(self, index):
+        """Materialize one row as a RepeaterRecord"""
+        c = self.columns
+        lat = _none_if_nan(c["lat"][index])
+        lng = _none_if_nan(c["lng"][index])
+        color_code = c["color_code"][index]
+        return RepeaterRecord(
+            source="brandmeister",
+            source_id=str(c["id"][index]),
+            callsign=self.string(c["callsign"][index]),
+            rx_freq=c["rx_freq"][index],
+            tx_freq=c["tx_freq"][index],
+            rx_tone=None,
+            tx_tone=None,
+            color_code=None if color_code < 0 else color_code,
+            lat=lat,
+            lng=lng,
+            locator=(
+                mh.to_maiden(lat, lng, 3)
+                if lat is not None and lng is not None
+                else None
+            ),
+            qth=self.string(c["city"][index]),
+            analog=False,
+            dmr=True,
+            hotspot=bool(c["hotspot"][index]),
+            status=self.string(c["status"][index]),
+            last_seen=self.string(c["last_seen"][index]),
+        )
+
+    def records(self, **constraints):
+        return [self.record(i) for i in self.select(**constraints)]
+
+
+class DeviceStore(FileCache):
+    """
+    Compiled, memory-mapped columnar copy of the Brandmeister device list.
+
+    Devices are partitioned by ID prefix (MCC), one file per partition, with
+    fixed width columns and a string table for callsigns, cities and other
+    text. Partitions are rebuilt only when the snapshot of the source changes,
+    and only those asked for are mapped.
+
+    Usage:
+        store = DeviceStore()
+        store.sync(snapshot, build_records)
+        polish = store.records(prefixes=["260"], bands=[(430.0, 440.0)])
+    """
+
+    def __init__(self):
+        FileCache.__init__(self, "bm_devices_columnar")
+        self._partitions = {}
+        self._manifest = None
+
+    def sync(self, snapshot, build):
+        """
+        Make the store match a source snapshot, calling build() on a miss.
+
+        Args:
+            snapshot: Identifier of the raw device list (FileCache.snapshot_id)
+            build: Callable returning the devices as RepeaterRecords
+        """
+        if self._use_manifest(snapshot):
+            return
+        # One process rebuilds, others wait and then use its result
+        with self.lock("manifest"):
+            if not self._use_manifest(snapshot):
+                self._rebuild(snapshot, build)
+
+    def _use_manifest(self, snapshot):
+        manifest = self.read_cache("manifest")
+        if (
+            manifest is not None
+            and manifest.get("version") == STORE_VERSION
+            and manifest.get("snapshot") == snapshot
+            # Partitions may have been garbage collected
+            and all(
+                os.path.isfile(self.file_path(f"{prefix}.bin"))
+                for prefix in manifest["partitions"]
+            )
+        ):
+            self._manifest = manifest
+            return True
+        return False
+
+    def _rebuild(self, snapshot, build):
+        manifest = self.read_cache("manifest")
+        by_prefix = {}
+        for record in build():
+            by_prefix.setdefault(partition_key(record.source_id), []).append(record)
+
+        self._partitions = {}
+        for prefix, records in by_prefix.items():
+            path = self.file_path(f"{prefix}.bin")
+            atomic_write(path, encode_partition(records))
+
+        stale = set((manifest or {}).get("partitions", {})) - set(by_prefix)
+        for prefix in stale:
+            try:
+                os.remove(self.file_path(f"{prefix}.bin"))
+            except FileNotFoundError:
+                pass
+
+        # Written last, so an interrupted build is redone on the next sync
+        self._manifest = {
+            "version": STORE_VERSION,
+            "snapshot": snapshot,
+            "partitions": {p: len(r) for p, r in sorted(by_prefix.items())},
+        }
+        self.write_cache("manifest", self._manifest)
+
+    @property
+    def manifest(self):
+        """
+        Manifest of the partitions on disk; without a sync(), whatever the last
+        sync left, whichever snapshot that was
+        """
+        if self._manifest is None:
+            manifest = self.read_cache("manifest")
+            if manifest is None or manifest.get("version") != STORE_VERSION:
+                raise ValueError("DeviceStore is empty, sync() it first")
+            self._manifest = manifest
+        return self._manifest
+
+    def prefixes(self):
+        return list(self.manifest["partitions"])
+
+    def partition(self, prefix):
+        if prefix not in self._partitions:
+            self._partitions[prefix] = DevicePartition(self.file_path(f"{prefix}.bin"))
+        return self._partitions[prefix]
+
+    def records(self, prefixes=None, **constraints):
+        """
+        RepeaterRecords from the given partitions (default: all), filtered on
+        the columns; see DevicePartition.select() for the constraints.
+        """
+        if prefixes is None:
+            prefixes = self.prefixes()
+        records = []
+        for prefix in prefixes:
+            if prefix in self.manifest["partitions"]:
+                records += self.partition(prefix).records(**constraints)
+        return records
@@ -0,0 +1,292 @@
+import csv
+import difflib
+import re
+
+from unidecode import unidecode
+
+from .cache import FileCache
+
+INDEX_VERSION = 1
+
+# GeoNames dump columns (see https://download.geonames.org/export/dump/readme.txt)
+GEONAMES_NAME = 1
+GEONAMES_ASCIINAME = 2
+GEONAMES_LATITUDE = 4
+GEONAMES_LONGITUDE = 5
+GEONAMES_FEATURE_CLASS = 6
+GEONAMES_COUNTRY_CODE = 8
+GEONAMES_ADMIN1_CODE = 10
+GEONAMES_POPULATION = 14
+
+# Token rewrites so that "St. Louis" and "Saint Louis" end up with the same key
+ABBREVIATIONS = {
+    "st": "saint",
+    "ste": "sainte",
+    "mt": "mount",
+    "ft": "fort",
+    "pt": "point",
+}
+
+
+def normalize_place(name):
+    """Normalize a place, state or country name for index lookups."""
+    if not name:
+        return ""
+    name = unidecode(name).lower().replace("&", " and ")
+    tokens = re.sub(r"[^a-z0-9]+", " ", name).split()
+    return " ".join(ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+class GazetteerGeocoder(FileCache):
+    """
+    Offline geocoder backed by a compact index built from a GeoNames-style dump.
+
+    The index maps normalized (city, state, country) to coordinates. Lookups fall
+    back to the most populous match anywhere in the country when the state is
+    unknown, and then to a fuzzy match on the city name. Fuzzy matching needs a
+    known country and only compares names with the same first letter; fuzzy
+    hits are flagged with "fuzzy": True so a ChainedGeocoder asks the next
+    geocoder before settling for them. It has the same geocode() interface as
+    NominatimGeocoder, so it can sit in front of it in a ChainedGeocoder.
+
+    Usage:
+        GazetteerGeocoder().build_index(
+            "data/geonames/cities1000.txt",
+            admin1_path="data/geonames/admin1CodesASCII.txt",
+            country_info_path="data/geonames/countryInfo.txt",
+        )
+        coords = GazetteerGeocoder().geocode("Mountain View", "California", "United States")
+    """
+
+    def __init__(self, index_key="index", fuzzy_cutoff=0.9):
+        FileCache.__init__(self, "gazetteer")
+        self.index_key = index_key
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            index = self.read_cache(self.index_key)
+            if index is None or index.get("version") != INDEX_VERSION:
+                index = {
+                    "version": INDEX_VERSION,
+                    "countries": {},
+                    "states": {},
+                    "places": {},
+                }
+            self._index = index
+        return self._index
+
+    def available(self):
+        """Return True if an index has been built."""
+        return bool(self.index["places"])
+
+    def build_index(
+        self, dump_path, admin1_path=None, country_info_path=None, min_population=0
+    ):
+        """
+        Build the index from GeoNames dump files and store it in the cache.
+
+        Args:
+            dump_path: GeoNames dump, e.g. cities1000.txt or US.txt
+            admin1_path: Optional admin1CodesASCII.txt, to resolve state names
+            country_info_path: Optional countryInfo.txt, to resolve country names
+            min_population: Skip places with a smaller population
+
+        Returns:
+            Number of places in the index
+        """
+        countries = {}
+        states = {}
+        places = {}
+
+        if country_info_path:
+            with open(country_info_path, encoding="utf-8") as f:
+                for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                    if not row or row[0].startswith("#") or len(row) < 5:
+                        continue
+                    code = row[0].lower()
+                    countries[code] = code
+                    countries[normalize_place(row[4])] = code
+
+        if admin1_path:
+            with open(admin1_path, encoding="utf-8") as f:
+                for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                    if len(row) < 3 or "." not in row[0]:
+                        continue
+                    country_code, admin1_code = row[0].lower().split(".", 1)
+                    aliases = states.setdefault(country_code, {})
+                    aliases[admin1_code] = admin1_code
+                    aliases[normalize_place(row[1])] = admin1_code
+                    aliases[normalize_place(row[2])] = admin1_code
+
+        count = 0
+        with open(dump_path, encoding="utf-8") as f:
+            for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                if len(row) <= GEONAMES_POPULATION:
+                    continue
+                if row[GEONAMES_FEATURE_CLASS] not in ("P", ""):
+                    continue
+                try:
+                    lat = round(float(row[GEONAMES_LATITUDE]), 5)
+                    lon = round(float(row[GEONAMES_LONGITUDE]), 5)
+                    population = int(row[GEONAMES_POPULATION] or 0)
+                except ValueError:
+                    continue
+                if population < min_population:
+                    continue
+
+                country_code = row[GEONAMES_COUNTRY_CODE].lower()
+                admin1_code = row[GEONAMES_ADMIN1_CODE].lower()
+                countries.setdefault(country_code, country_code)
+                states.setdefault(country_code, {}).setdefault(admin1_code, admin1_code)
+
+                state_places = places.setdefault(country_code, {}).setdefault(
+                    admin1_code, {}
+                )
+                entry = [lat, lon, population]
+                for name in {row[GEONAMES_NAME], row[GEONAMES_ASCIINAME]}:
+                    key = normalize_place(name)
+                    if not key:
+                        continue
+                    # Several places can share a name within a state; keep the biggest
+                    if key not in state_places or state_places[key][2] < population:
+                        state_places[key] = entry
+                count += 1
+
+        self._index = {
+            "version": INDEX_VERSION,
+            "countries": countries,
+            "states": states,
+            "places": places,
+        }
+        self.write_cache(self.index_key, self._index)
+        return count
+
+    def geocode(self, city, state=None, country=None):
+        """
+        Geocode a city from the local index
+
+        Args:
+            city: City name
+            state: State/province name or code (optional)
+            country: Country name or ISO code (optional)
+
+        Returns:
+            dict with 'lat' and 'lon' keys, plus 'fuzzy': True for a fuzzy
+            match, or None if not found
+        """
+        city_key = normalize_place(city)
+        if not city_key:
+            return None
+
+        index = self.index
+        if country:
+            country_code = index["countries"].get(normalize_place(country))
+            if country_code is None:
+                return None
+            country_codes = [country_code]
+        else:
+            country_codes = list(index["places"].keys())
+
+        candidates = []
+        for country_code in country_codes:
+            country_places = index["places"].get(country_code, {})
+            state_code = None
+            if state:
+                state_code = (
+                    index["states"].get(country_code, {}).get(normalize_place(state))
+                )
+            if state_code is not None:
+                candidates.append(country_places.get(state_code, {}))
+            else:
+                candidates.extend(country_places.values())
+
+        entry = self._best_match(city_key, candidates)
+        if entry is not None:
+            return {"lat": entry[0], "lon": entry[1]}
+
+        # Fuzzy matching across every country would be slow and mostly wrong
+        if country:
+            entry = self._fuzzy_match(city_key, candidates)
+        if entry is None:
+            return None
+        return {"lat": entry[0], "lon": entry[1], "fuzzy": True}
+
+    def geocode_many(self, queries):
+        """
+        Geocode a batch of (city, state, country) tuples
+
+        Returns:
+            dict mapping each query tuple to coordinates or None
+        """
+        return {query: self.geocode(*query) for query in dict.fromkeys(queries)}
+
+    def _best_match(self, city_key, candidates):
+        best = None
+        for state_places in candidates:
+            entry = state_places.get(city_key)
+            if entry is not None and (best is None or entry[2] > best[2]):
+                best = entry
+        return best
+
+    def _fuzzy_match(self, city_key, candidates):
+        # Misspellings rarely change the first letter, and comparing only
+        # those names keeps the candidate set small
+        names = {}
+        for state_places in candidates:
+            for name, entry in state_places.items():
+                if name[0] != city_key[0]:
+                    continue
+                if name not in names or names[name][2] < entry[2]:
+                    names[name] = entry
+        matches = difflib.get_close_matches(
+            city_key, names.keys(), n=1, cutoff=self.fuzzy_cutoff
+        )
+        return names[matches[0]] if matches else None
+
+
+class ChainedGeocoder:
+    """
+    Try several geocoders in turn and return the first hit.
+
+    Fuzzy hits (flagged "fuzzy") are only returned when no later geocoder
+    finds the place.
+
+    Usage:
+        geocoder = ChainedGeocoder(GazetteerGeocoder(), NominatimGeocoder())
+    """
+
+    def __init__(self, *geocoders):
+        self.geocoders = geocoders
+
+    def geocode(self, city, state=None, country=None):
+        fuzzy = None
+        for geocoder in self.geocoders:
+            coords = geocoder.geocode(city, state, country)
+            if coords and not coords.get("fuzzy"):
+                return coords
+            fuzzy = fuzzy or coords
+        return fuzzy
+
+    def geocode_many(self, queries):
+        """
+        Geocode a batch of (city, state, country) tuples. Each geocoder in the
+        chain only sees the queries that the ones before it missed or only
+        matched fuzzily.
+        """
+        results = {query: None for query in queries}
+        pending = list(results)
+        for geocoder in self.geocoders:
+            if not pending:
+                break
+            for query, coords in geocoder.geocode_many(pending).items():
+                if coords and (not results[query] or not coords.get("fuzzy")):
+                    results[query] = coords
+            pending = [
+                query
+                for query in pending
+                if not results[query] or results[query].get("fuzzy")
+            ]
+        return results
@@ -0,0 +1,93 @@
+"""
+Incremental decoding of large JSON documents.
+
+Exports such as the Brandmeister device list or a RepeaterBook country are
+tens of megabytes. json.load() reads such a file into one string before
+decoding it, so the raw text and the decoded value are held at once. Here
+array items are decoded one at a time from a buffer refilled in chunks.
+"""
+
+import io
+import json
+import re
+
+READ_CHUNK = 1024 * 1024
+
+_WHITESPACE = re.compile(r"[\s,]*")
+_SEPARATOR = re.compile(r"\s*[,\]]")
+
+
+def iter_array(f, key=None, chunk_size=READ_CHUNK):
+    """
+    Yield the items of the array under key in a JSON document, e.g. the
+    users of {"users": [...]}, reading f incrementally. With key=None the
+    document itself must be an array.
+
+    Only the array's items are decoded; the memory used is bounded by the
+    chunk size and the largest item.
+    """
+    decoder = json.JSONDecoder()
+    if key is None:
+        start = re.compile(r"^\s*\[")
+    else:
+        start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    buffer = ""
+    eof = False
+
+    while True:
+        m = start.search(buffer)
+        if m:
+            buffer = buffer[m.end() :]
+            break
+        if eof or (key is None and buffer.strip()):
+            raise ValueError(f'No "{key}" array in document' if key else "No array")
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+    position = 0
+    while True:
+        position = _WHITESPACE.match(buffer, position).end()
+        if position < len(buffer):
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A number cut by the chunk boundary decodes too ("45" of
+                # "456", "-7" of "-7.5"), so the item only counts once the
+                # separator after it has been read
+                if eof or _SEPARATOR.match(buffer, end):
+                    yield item
+                    position = end
+                    continue
+        elif eof:
+            raise ValueError(f'Unterminated "{key}" array' if key else "Unterminated")
+        # Incomplete item: drop what was consumed and read more
+        buffer = buffer[position:]
+        position = 0
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def load(f, chunk_size=READ_CHUNK):
+    """
+    Decode the JSON document in binary file f. Top-level arrays are decoded
+    item by item (see iter_array); other documents with json.load().
+    """
+    text = io.TextIOWrapper(f, encoding="utf-8")
+    try:
+        first = text.read(1)
+        while first.isspace():
+            first = text.read(1)
+        text.seek(0)
+        if first == "[":
+            return list(iter_array(text, None, chunk_size))
+        return json.load(text)
+    finally:
+        # Leave f open for the caller
+        text.detach()
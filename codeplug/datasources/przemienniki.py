@@ -1,30 +1,132 @@
+import io
+
 from lxml import etree
 
 from .cache import FileCache
+from .records import from_przemienniki, source_records
+from .resources import Resource
+
+
+def _text(node, tag):
+    child = node.find(tag)
+    return child.text if child is not None else None
+
+
+def _typed_float(node, tag, type):
+    for child in node.iterfind(tag):
+        if child.get("type") == type and child.text:
+            return float(child.text)
+    return None
+
+
+def project_repeater(node):
+    """
+    Extract the fields AnalogChannelGeneratorFromPrzemienniki needs from a
+    <repeater> element of an rxf.xml export.
+
+    qrg/ctcss "tx" and "rx" are from the repeater's point of view.
+    """
+    lat = None
+    lng = None
+    locator = None
+    location = node.find("location")
+    if location is not None:
+        try:
+            lat = float(_text(node, "latitude") or _text(location, "latitude"))
+            lng = float(_text(node, "longitude") or _text(location, "longitude"))
+            locator = _text(node, "locator") or _text(location, "locator")
+        except (TypeError, ValueError):
+            lat = lng = locator = None
 
+    return {
+        "qra": _text(node, "qra"),
+        "qth": _text(node, "qth"),
+        "status": _text(node, "status"),
+        "bands": len(node.findall("band")),
+        "qrgs": len(node.findall("qrg")),
+        "tx": _typed_float(node, "qrg", "tx"),
+        "rx": _typed_float(node, "qrg", "rx"),
+        "ctcss_tx": _typed_float(node, "ctcss", "tx"),
+        "ctcss_rx": _typed_float(node, "ctcss", "rx"),
+        "lat": lat,
+        "lng": lng,
+        "locator": locator,
+    }
 
-class LXMLCacheAdapter:
-    __name__ = "xml"
 
-    def loads(self, s):
-        return etree.fromstring(s.lstrip())
+def parse_rxf(content):
+    """
+    Stream repeater records out of an rxf.xml export.
 
-    def dumps(self, value):
-        return etree.tostring(value, encoding="unicode")
+    Elements are cleared as soon as they have been projected, so memory use
+    stays flat no matter how big the export is.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    records = []
+    for _, node in etree.iterparse(
+        io.BytesIO(content.lstrip()), events=("end",), tag="repeater"
+    ):
+        records.append(project_repeater(node))
+        node.clear()
+        while node.getprevious() is not None:
+            del node.getparent()[0]
+    return records
 
 
 class PrzemiennikiAPI(FileCache):
+    """
+    przemienniki.net data source
+
+    Exports are parsed once with parse_rxf() and only the projected records are
+    cached, so later runs never touch XML.
+    """
+
     def __init__(self):
-        FileCache.__init__(self, "przemienniki", LXMLCacheAdapter())
+        FileCache.__init__(self, "przemienniki")
 
     def repeaters_2m(self):
         return self.cached(
-            "2m_fm",
+            "2m_fm_records",
             "https://przemienniki.net/export/rxf.xml?country=pl&band=2M&mode=FM&status=working",
+            parse=parse_rxf,
         )
 
     def repeaters_70cm(self):
         return self.cached(
-            "70cm_fm",
+            "70cm_fm_records",
             "https://przemienniki.net/export/rxf.xml?country=pl&band=70CM&mode=FM&status=working",
+            parse=parse_rxf,
+        )
+
+    def resources(self):
+        return [
+            Resource(
+                "przemienniki.net export",
+                key,
+                fetch=fetch,
+                is_cached=lambda key=key: self.snapshot_id(key) is not None,
+            )
+            for key, fetch in (
+                ("2m_fm_records", self.repeaters_2m),
+                ("70cm_fm_records", self.repeaters_70cm),
+            )
+        ]
+
+    def records_2m(self):
+        return source_records(
+            "przemienniki_2m",
+            self,
+            "2m_fm_records",
+            self.repeaters_2m,
+            from_przemienniki,
+        )
+
+    def records_70cm(self):
+        return source_records(
+            "przemienniki_70cm",
+            self,
+            "70cm_fm_records",
+            self.repeaters_70cm,
+            from_przemienniki,
         )
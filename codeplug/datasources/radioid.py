@@ -0,0 +1,43 @@
+"""
+Streaming reader for the radioid.net user database (users.json).
+
+The full database holds hundreds of thousands of users, so it is never
+loaded whole: users are decoded one at a time from a buffer refilled in
+chunks as the file is read.
+"""
+
+from .jsonstream import READ_CHUNK, iter_array
+
+USERS_PATH = "data/radiod_users.json"
+
+# Fields of a user, as named in users.json
+USER_FIELDS = (
+    "radio_id",
+    "callsign",
+    "fname",
+    "surname",
+    "city",
+    "state",
+    "country",
+    "remarks",
+)
+
+
+def normalize_user(user):
+    """A users.json entry with just USER_FIELDS, stripped, radio_id an int"""
+    normalized = {
+        field: (user.get(field) or "").strip()
+        for field in USER_FIELDS
+        if field != "radio_id"
+    }
+    if not normalized["fname"]:
+        normalized["fname"] = (user.get("name") or "").strip()
+    normalized["radio_id"] = int(user.get("radio_id") or user["id"])
+    return normalized
+
+
+def iter_users(path=USERS_PATH, chunk_size=READ_CHUNK):
+    """Normalized users from users.json, in file order"""
+    with open(path, encoding="utf-8") as f:
+        for user in iter_array(f, "users", chunk_size):
+            yield normalize_user(user)
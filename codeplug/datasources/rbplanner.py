@@ -0,0 +1,156 @@
+"""
+Translate a recipe's FilterChain into the narrowest set of RepeaterBook
+export requests.
+
+RepeaterBook filters server side by state and mode, but not by location or
+frequency range. The planner therefore picks the states whose bounds come
+within reach of the chain's DistanceFilter/RegionFilter, and adds the mode
+the generator is going to keep anyway. The filters themselves still run on
+the results; the plan only decides what to download.
+"""
+
+from dataclasses import dataclass, field
+
+from filters import DistanceFilter, RegionFilter, haversine_distance
+
+# Added to distances to state bounds, covering the coarseness of the table
+BOUNDS_MARGIN_KM = 10.0
+
+# RepeaterBook state FIPS code -> (abbreviation, min_lat, max_lat, min_lng,
+# max_lng). Alaska's few Aleutian islands west of the antimeridian are left out.
+US_STATE_BOUNDS = {
+    "01": ("AL", 30.14, 35.01, -88.47, -84.89),
+    "02": ("AK", 51.21, 71.44, -179.15, -129.98),
+    "04": ("AZ", 31.33, 37.00, -114.82, -109.04),
+    "05": ("AR", 33.00, 36.50, -94.62, -89.64),
+    "06": ("CA", 32.53, 42.01, -124.48, -114.13),
+    "08": ("CO", 36.99, 41.00, -109.06, -102.04),
+    "09": ("CT", 40.95, 42.05, -73.73, -71.78),
+    "10": ("DE", 38.45, 39.84, -75.79, -75.05),
+    "11": ("DC", 38.79, 39.00, -77.12, -76.91),
+    "12": ("FL", 24.40, 31.00, -87.63, -79.97),
+    "13": ("GA", 30.36, 35.00, -85.61, -80.84),
+    "15": ("HI", 18.91, 22.24, -160.25, -154.81),
+    "16": ("ID", 41.99, 49.00, -117.24, -111.04),
+    "17": ("IL", 36.97, 42.51, -91.51, -87.49),
+    "18": ("IN", 37.77, 41.76, -88.10, -84.78),
+    "19": ("IA", 40.38, 43.50, -96.64, -90.14),
+    "20": ("KS", 36.99, 40.00, -102.05, -94.59),
+    "21": ("KY", 36.50, 39.15, -89.57, -81.96),
+    "22": ("LA", 28.93, 33.02, -94.04, -88.82),
+    "23": ("ME", 43.06, 47.46, -71.08, -66.95),
+    "24": ("MD", 37.91, 39.72, -79.49, -75.05),
+    "25": ("MA", 41.24, 42.89, -73.51, -69.93),
+    "26": ("MI", 41.70, 48.31, -90.42, -82.41),
+    "27": ("MN", 43.50, 49.38, -97.24, -89.49),
+    "28": ("MS", 30.17, 35.00, -91.66, -88.10),
+    "29": ("MO", 35.99, 40.61, -95.77, -89.10),
+    "30": ("MT", 44.36, 49.00, -116.05, -104.04),
+    "31": ("NE", 40.00, 43.00, -104.05, -95.31),
+    "32": ("NV", 35.00, 42.00, -120.01, -114.04),
+    "33": ("NH", 42.70, 45.31, -72.56, -70.61),
+    "34": ("NJ", 38.93, 41.36, -75.56, -73.89),
+    "35": ("NM", 31.33, 37.00, -109.05, -103.00),
+    "36": ("NY", 40.50, 45.02, -79.76, -71.86),
+    "37": ("NC", 33.84, 36.59, -84.32, -75.46),
+    "38": ("ND", 45.94, 49.00, -104.05, -96.55),
+    "39": ("OH", 38.40, 41.98, -84.82, -80.52),
+    "40": ("OK", 33.62, 37.00, -103.00, -94.43),
+    "41": ("OR", 41.99, 46.29, -124.57, -116.46),
+    "42": ("PA", 39.72, 42.27, -80.52, -74.69),
+    "44": ("RI", 41.15, 42.02, -71.86, -71.12),
+    "45": ("SC", 32.03, 35.22, -83.35, -78.54),
+    "46": ("SD", 42.48, 45.95, -104.06, -96.44),
+    "47": ("TN", 34.98, 36.68, -90.31, -81.65),
+    "48": ("TX", 25.84, 36.50, -106.65, -93.51),
+    "49": ("UT", 37.00, 42.00, -114.05, -109.04),
+    "50": ("VT", 42.73, 45.02, -73.44, -71.46),
+    "51": ("VA", 36.54, 39.47, -83.68, -75.24),
+    "53": ("WA", 45.54, 49.00, -124.85, -116.92),
+    "54": ("WV", 37.20, 40.64, -82.64, -77.72),
+    "55": ("WI", 42.49, 47.31, -92.89, -86.25),
+    "56": ("WY", 40.99, 45.01, -111.06, -104.05),
+    "72": ("PR", 17.88, 18.52, -67.95, -65.22),
+}
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """
+    RepeaterBook requests for a recipe: one export per state, each with the
+    same server-side filters (e.g. {"mode": "analog"})
+    """
+
+    states: tuple
+    country: str = "United States"
+    filters: dict = field(default_factory=dict)
+
+    def describe(self):
+        names = ", ".join(US_STATE_BOUNDS[s][0] for s in self.states) or "nothing"
+        filters = ", ".join(f"{k}={v}" for k, v in sorted(self.filters.items()))
+        return f"{names}" + (f" ({filters})" if filters else "")
+
+
+def _distance_to_bounds(lat, lng, bounds):
+    """Distance in km from a point to the nearest point of a lat/lng box"""
+    _, min_lat, max_lat, min_lng, max_lng = bounds
+    nearest_lat = min(max(lat, min_lat), max_lat)
+    nearest_lng = min(max(lng, min_lng), max_lng)
+    return haversine_distance(lat, lng, nearest_lat, nearest_lng)
+
+
+def _boxes_overlap(bounds, region):
+    _, min_lat, max_lat, min_lng, max_lng = bounds
+    return (
+        min_lat <= region.max_lat
+        and region.min_lat <= max_lat
+        and min_lng <= region.max_lng
+        and region.min_lng <= max_lng
+    )
+
+
+def states_for(filter_chain, candidates=US_STATE_BOUNDS):
+    """
+    FIPS codes of the states a repeater passing filter_chain can be in.
+
+    Only DistanceFilter and RegionFilter narrow the states. A filter that
+    lets through repeaters without coordinates narrows nothing, as those may
+    be listed in any state.
+    """
+    states = [s for s in candidates if s in US_STATE_BOUNDS]
+    for f in filter_chain.filters if filter_chain else []:
+        if getattr(f, "include_items_without_coordinates", False):
+            continue
+        if isinstance(f, DistanceFilter):
+            reach = f.max_distance_km + BOUNDS_MARGIN_KM
+            states = [
+                s
+                for s in states
+                if _distance_to_bounds(
+                    f.reference_lat, f.reference_lng, US_STATE_BOUNDS[s]
+                )
+                <= reach
+            ]
+        elif isinstance(f, RegionFilter):
+            states = [s for s in states if _boxes_overlap(US_STATE_BOUNDS[s], f)]
+    return sorted(states)
+
+
+def plan_queries(filter_chain, *, mode=None, within_states=None):
+    """
+    The RepeaterBook requests needed for a recipe's repeaters.
+
+    Args:
+        filter_chain: Location filters the recipe applies to the results
+        mode: RepeaterBook mode filter, e.g. "analog", if the recipe keeps
+              only repeaters of that mode
+        within_states: Limit the plan to these FIPS codes, for recipes that
+                       deliberately cover only some states in reach
+
+    Returns:
+        QueryPlan
+    """
+    candidates = within_states if within_states else US_STATE_BOUNDS
+    states = states_for(filter_chain, candidates)
+    filters = {"mode": mode} if mode else {}
+    return QueryPlan(tuple(states), filters=filters)
@@ -0,0 +1,270 @@
+from dataclasses import astuple, dataclass, fields
+from typing import Optional
+
+import maidenhead as mh
+
+from .cache import FileCache
+
+# Bump whenever RepeaterRecord or a normalizer changes, so cached rows are rebuilt
+RECORD_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class RepeaterRecord:
+    """
+    One repeater, in the same shape whichever source it came from.
+
+    Frequencies are from the radio's point of view: rx_freq is what the radio
+    listens on (the repeater's output), tx_freq what it transmits on (the
+    repeater's input). Likewise rx_tone is the tone the repeater sends and
+    tx_tone the one it expects.
+    """
+
+    source: str
+    source_id: str
+    callsign: str
+    rx_freq: float
+    tx_freq: float
+    rx_tone: Optional[float]
+    tx_tone: Optional[float]
+    color_code: Optional[int]
+    lat: Optional[float]
+    lng: Optional[float]
+    locator: Optional[str]
+    qth: Optional[str]
+    analog: bool
+    dmr: bool
+    hotspot: bool
+    status: Optional[str]
+    last_seen: Optional[str]
+
+    @property
+    def offset(self) -> float:
+        return self.tx_freq - self.rx_freq
+
+    def to_row(self):
+        return list(astuple(self))
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+
+RECORD_FIELDS = [f.name for f in fields(RepeaterRecord)]
+
+
+def _float_or_none(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (ValueError, TypeError):
+        return None
+
+
+def _locator(lat, lng):
+    if lat is None or lng is None:
+        return None
+    return mh.to_maiden(lat, lng, 3)
+
+
+def from_brandmeister(device):
+    """Normalize a Brandmeister device from the /v2/device API"""
+    lat = _float_or_none(device.get("lat"))
+    lng = _float_or_none(device.get("lng"))
+    return RepeaterRecord(
+        source="brandmeister",
+        source_id=str(device["id"]),
+        callsign=device["callsign"],
+        rx_freq=float(device["tx"]),
+        tx_freq=float(device["rx"]),
+        rx_tone=None,
+        tx_tone=None,
+        color_code=device.get("colorcode"),
+        lat=lat,
+        lng=lng,
+        locator=_locator(lat, lng),
+        qth=device.get("city"),
+        analog=False,
+        dmr=True,
+        hotspot=(
+            device["rx"] == device["tx"]
+            or device.get("pep") == 1
+            or device.get("statusText") == "DMO"
+        ),
+        status=device.get("statusText"),
+        last_seen=device.get("last_seen"),
+    )
+
+
+def from_repeaterbook(repeater):
+    """Normalize a RepeaterBook export result, or None if it has no usable frequencies"""
+    rx_freq = _float_or_none(repeater.get("Frequency"))
+    tx_freq = _float_or_none(repeater.get("Input Freq"))
+    if not rx_freq or not tx_freq:
+        return None
+
+    # PL first, then TSQ as fallback
+    tone = _float_or_none((repeater.get("PL") or repeater.get("TSQ") or "").strip())
+
+    lat = _float_or_none(repeater.get("Lat"))
+    lng = _float_or_none(repeater.get("Long"))
+    callsign = (repeater.get("Callsign") or "").strip()
+    qth = (repeater.get("Nearest City") or "").strip()
+    if not qth:
+        qth = (repeater.get("Landmark") or "").strip()
+
+    if repeater.get("State ID") and repeater.get("Rptr ID"):
+        source_id = f"{repeater['State ID']}-{repeater['Rptr ID']}"
+    else:
+        source_id = f"{callsign}-{rx_freq}"
+
+    color_code = _float_or_none(repeater.get("DMR Color Code"))
+    return RepeaterRecord(
+        source="repeaterbook",
+        source_id=source_id,
+        callsign=callsign,
+        rx_freq=rx_freq,
+        tx_freq=tx_freq,
+        rx_tone=tone,
+        tx_tone=tone,
+        color_code=int(color_code) if color_code is not None else None,
+        lat=lat,
+        lng=lng,
+        locator=_locator(lat, lng),
+        qth=qth,
+        analog=repeater.get("FM Analog") == "Yes",
+        dmr=repeater.get("DMR") == "Yes",
+        hotspot=False,
+        status=repeater.get("Operational Status"),
+        last_seen=repeater.get("Last Update"),
+    )
+
+
+def from_przemienniki(record):
+    """
+    Normalize a projected przemienniki.net repeater (see parse_rxf), or None if
+    it cannot be described by a single frequency pair.
+    """
+    if record["bands"] > 1 or record["qrgs"] > 2:
+        return None
+    if record["tx"] is None or record["rx"] is None:
+        return None
+    return RepeaterRecord(
+        source="przemienniki",
+        source_id=record["qra"],
+        callsign=record["qra"],
+        rx_freq=record["tx"],
+        tx_freq=record["rx"],
+        rx_tone=record["ctcss_tx"],
+        tx_tone=record["ctcss_rx"],
+        color_code=None,
+        lat=record["lat"],
+        lng=record["lng"],
+        locator=record["locator"],
+        qth=record["qth"],
+        analog=True,
+        dmr=False,
+        hotspot=False,
+        status=record["status"],
+        last_seen=None,
+    )
+
+
+def normalize(normalizer, items):
+    """
+    Apply a normalizer to raw items, dropping the ones it rejects.
+
+    Items that already are RepeaterRecords are passed through, so generators
+    can take either records or the raw source shape.
+    """
+    records = []
+    for item in items:
+        record = item if isinstance(item, RepeaterRecord) else normalizer(item)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+def repeater_identity(callsign, rx_freq):
+    """
+    Key identifying the same physical repeater across overlapping exports;
+    border repeaters are listed in every state they serve. Takes raw export
+    values as well as RepeaterRecord fields.
+    """
+    try:
+        rx_freq = round(float(rx_freq), 5)
+    except (ValueError, TypeError):
+        pass
+    return ((callsign or "").strip().upper(), rx_freq)
+
+
+class RecordCache(FileCache):
+    """
+    Normalized RepeaterRecords, cached per source snapshot.
+
+    A snapshot identifies the raw data the records were built from (see
+    FileCache.snapshot_id). While it is unchanged, records load straight from
+    compact rows without touching, let alone parsing, the raw source.
+
+    Sources normally go through source_records(), as in
+    PrzemiennikiAPI().records_2m().
+    """
+
+    def __init__(self):
+        FileCache.__init__(self, "records")
+
+    def records(self, name, snapshot, build):
+        """
+        Return the records for a source snapshot, calling build() on a miss.
+
+        Args:
+            name: Cache key for the source, e.g. "brandmeister"
+            snapshot: Identifier of the raw data, or None to always rebuild
+            build: Callable returning a list of RepeaterRecord
+        """
+        cached = self.read_cache(name)
+        if (
+            snapshot is not None
+            and cached is not None
+            and cached.get("version") == RECORD_VERSION
+            and cached.get("snapshot") == snapshot
+        ):
+            return [RepeaterRecord.from_row(row) for row in cached["rows"]]
+
+        records = build()
+        if snapshot is not None:
+            self.write_cache(
+                name,
+                {
+                    "version": RECORD_VERSION,
+                    "snapshot": snapshot,
+                    "fields": RECORD_FIELDS,
+                    "rows": [record.to_row() for record in records],
+                },
+            )
+        return records
+
+
+def source_records(name, source, key, load, normalizer):
+    """
+    Records for the raw entry key of a FileCache source.
+
+    load() returns the raw items and is only called when no records were cached
+    for the current snapshot of the entry, or when it has not been fetched yet.
+
+    Args:
+        name: RecordCache key for the records
+        source: FileCache holding the raw entry
+        key: Key of the raw entry in source
+        load: Callable returning the raw items, fetching them if needed
+        normalizer: Function turning one raw item into a RepeaterRecord or None
+    """
+    snapshot = source.snapshot_id(key)
+    raw = None
+    if snapshot is None:
+        raw = load()
+        snapshot = source.snapshot_id(key)
+
+    def build():
+        return normalize(normalizer, raw if raw is not None else load())
+
+    return RecordCache().records(name, snapshot, build)
@@ -1,27 +1,65 @@
+import hashlib
+import json
+import os
 import requests
-import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from . import transport
 from .cache import FileCache
+from .gazetteer import GazetteerGeocoder, ChainedGeocoder
+from .jsonstream import iter_array
+from .records import from_repeaterbook, repeater_identity, source_records
+from .resources import Resource
 
 
 class NominatimGeocoder(FileCache):
     """
     OSM Nominatim geocoding service with caching
+
+    Hits are cached forever. Misses are cached as well, but only trusted for
+    negative_ttl so that places added to OSM later eventually get picked up.
+    Transient request failures are not cached at all.
     """
 
-    def __init__(self, user_agent="dmr-codeplug-gen, jan.szumiec@gmail.com"):
+    def __init__(
+        self,
+        user_agent="dmr-codeplug-gen, jan.szumiec@gmail.com",
+        negative_ttl=timedelta(days=30),
+    ):
         FileCache.__init__(self, "nominatim")
         self.user_agent = user_agent
         self.base_url = "https://nominatim.openstreetmap.org"
-        self.last_request_time = 0
-        self.min_delay = 1.0  # Nominatim requires 1 second between requests
+        self.negative_ttl = negative_ttl
+
+    def _query(self, city, state=None, country=None):
+        """Build the free-form query string, or None if there is nothing to look up"""
+        if not city or not city.strip():
+            return None
+
+        query_parts = [city.strip()]
+        if state:
+            query_parts.append(state.strip())
+        if country:
+            query_parts.append(country.strip())
+        return ", ".join(query_parts)
 
-    def _rate_limit(self):
-        """Ensure we respect Nominatim's rate limiting requirements"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_delay:
-            time.sleep(self.min_delay - time_since_last)
-        self.last_request_time = time.time()
+    def _cached_lookup(self, cache_key):
+        """
+        Return (found, coords) for a cached query.
+
+        Older caches stored a bare None for misses; those carry no timestamp and
+        are treated as expired.
+        """
+        cached_result = self.read_cache(cache_key)
+        if cached_result is None:
+            return (False, None)
+        if "lat" in cached_result:
+            return (True, cached_result)
+        cached_at = datetime.fromisoformat(cached_result["cached_at"])
+        if datetime.now() - cached_at < self.negative_ttl:
+            return (True, None)
+        return (False, None)
 
     def geocode(self, city, state=None, country=None):
         """
@@ -35,42 +73,33 @@ class NominatimGeocoder(FileCache):
         Returns:
             dict with 'lat' and 'lon' keys, or None if not found
         """
-        if not city or not city.strip():
+        query = self._query(city, state, country)
+        if query is None:
             return None
 
-        # Build query string
-        query_parts = [city.strip()]
-        if state:
-            query_parts.append(state.strip())
-        if country:
-            query_parts.append(country.strip())
-
-        query = ", ".join(query_parts)
-
         # Create cache key from query
         cache_key = f"geocode_{query.lower().replace(' ', '_').replace(',', '_')}"
 
-        # Check cache first
-        import os.path
-
-        cache_filename = (
-            f"{self._FileCache__cache_dir()}/{cache_key}.{self.method.__name__}"
-        )
-        if os.path.isfile(cache_filename):
-            content = open(cache_filename).read()
-            cached_result = self.method.loads(content)
-            if cached_result:  # Only return if we have a valid result
-                return cached_result
+        # Check cache first, including known misses
+        found, coords = self._cached_lookup(cache_key)
+        if found:
+            return coords
 
-        # Make request with rate limiting
-        self._rate_limit()
+        # One process asks Nominatim, others wait and read its answer
+        with self.lock(cache_key):
+            found, coords = self._cached_lookup(cache_key)
+            if found:
+                return coords
+            return self._lookup(query, cache_key)
 
+    def _lookup(self, query, cache_key):
+        # The transport spaces requests per Nominatim's usage policy
         params = {"q": query, "format": "json", "limit": 1, "addressdetails": 1}
 
         headers = {"User-Agent": self.user_agent}
 
         try:
-            response = requests.get(
+            response = transport.get(
                 f"{self.base_url}/search", params=params, headers=headers, timeout=10
             )
             response.raise_for_status()
@@ -84,15 +113,47 @@ class NominatimGeocoder(FileCache):
                 return coords
             else:
                 # Cache negative result to avoid repeated requests
-                self.write_cache(cache_key, None)
+                self.write_cache(cache_key, {"cached_at": datetime.now().isoformat()})
                 return None
 
         except (requests.RequestException, ValueError, KeyError) as e:
+            # Don't cache: the next build should try again
             print(f"Geocoding failed for '{query}': {e}")
-            # Cache negative result
-            self.write_cache(cache_key, None)
             return None
 
+    def geocode_many(self, queries):
+        """
+        Geocode a batch of (city, state, country) tuples, looking each one up once
+
+        Returns:
+            dict mapping each query tuple to coordinates or None
+        """
+        return {query: self.geocode(*query) for query in dict.fromkeys(queries)}
+
+
+# Bump whenever _enhance_with_coordinates changes what it writes, so that cached
+# payloads get enriched again.
+ENRICHMENT_VERSION = 1
+
+
+def source_fingerprint(repeater):
+    """Hash of a repeater record as RepeaterBook sent it, ignoring our own fields"""
+    raw = {k: v for k, v in repeater.items() if not k.startswith("_")}
+    return hashlib.sha1(json.dumps(raw, sort_keys=True).encode()).hexdigest()
+
+
+def region_name(country, state_id=None):
+    """Region of a RepeaterBook export; "<country>:<state_id>" for a state"""
+    return f"{country}:{state_id}" if state_id else country
+
+
+def default_geocoder(user_agent):
+    """
+    Nominatim, preceded by the offline gazetteer. Without a built index (see
+    `make gazetteer`) the gazetteer simply misses and Nominatim answers.
+    """
+    return ChainedGeocoder(GazetteerGeocoder(), NominatimGeocoder(user_agent))
+
 
 class RepeaterBookAPI(FileCache):
     """
@@ -100,14 +161,17 @@ class RepeaterBookAPI(FileCache):
 
     Provides access to repeater data from RepeaterBook.com
     Supports both North America and international repeaters
-    Enhanced with OSM Nominatim geocoding for missing coordinates
+    Enhanced with OSM Nominatim geocoding for missing coordinates, answered from
+    the offline gazetteer first when one is available
     """
 
-    def __init__(self, user_agent="dmr-codeplug-gen, jan.szumiec@gmail.com"):
+    def __init__(
+        self, user_agent="dmr-codeplug-gen, jan.szumiec@gmail.com", geocoder=None
+    ):
         FileCache.__init__(self, "repeaterbook")
         self.user_agent = user_agent
         self.base_url = "https://www.repeaterbook.com/api"
-        self.geocoder = NominatimGeocoder(user_agent)
+        self.geocoder = geocoder or default_geocoder(user_agent)
 
     def _get_headers(self):
         """Get required headers including User-Agent for API authentication"""
@@ -117,12 +181,51 @@ class RepeaterBookAPI(FileCache):
         """Build query parameters, filtering out None values"""
         return {k: v for k, v in kwargs.items() if v is not None}
 
-    def _enhance_with_coordinates(self, data):
+    def _has_coordinates(self, repeater):
+        """Whether a repeater already carries usable coordinates"""
+        try:
+            return (
+                repeater.get("Lat")
+                and repeater.get("Long")
+                and float(repeater.get("Lat", 0)) != 0
+                and float(repeater.get("Long", 0)) != 0
+            )
+        except (ValueError, TypeError):
+            return False
+
+    def _geocode_query(self, repeater):
+        """The (city, state, country) tuple to geocode a repeater by, or None"""
+        city = repeater.get("Nearest City") or repeater.get("Landmark")
+        if not city or not city.strip():
+            return None
+        state = repeater.get("State")
+        country = repeater.get("Country")
+        return (
+            city.strip(),
+            state.strip() if state else None,
+            country.strip() if country else None,
+        )
+
+    def _is_enriched(self, data):
+        """Whether a payload went through the current enrichment stage"""
+        if not isinstance(data, dict) or "results" not in data:
+            return True
+        return data.get("_enrichment_version") == ENRICHMENT_VERSION
+
+    def _enhance_with_coordinates(self, data, previous=None):
         """
         Enhance repeater data with coordinates from Nominatim when missing
 
+        This stage is idempotent: records stamped with the current
+        ENRICHMENT_VERSION pass through untouched, and so do records whose
+        source data is unchanged from an enriched record in `previous`. Only the
+        rest are geocoded. Unique (city, state, country) tuples are collected
+        from those first and geocoded once each; the results are then fanned
+        back out.
+
         Args:
             data: RepeaterBook API response data
+            previous: Optional earlier enriched response for the same request
 
         Returns:
             Enhanced data with geocoded coordinates where missing
@@ -130,82 +233,132 @@ class RepeaterBookAPI(FileCache):
         if not isinstance(data, dict) or "results" not in data:
             return data
 
-        enhanced_results = []
+        reusable = {}
+        if isinstance(previous, dict):
+            for repeater in previous.get("results", []):
+                if repeater.get("_enriched") == ENRICHMENT_VERSION:
+                    reusable[repeater.get("_source_hash")] = repeater
 
+        enhanced_results = []
+        pending = []  # (position, repeater, fingerprint) still to be enriched
         for repeater in data["results"]:
+            if repeater.get("_enriched") == ENRICHMENT_VERSION:
+                enhanced_results.append(repeater)
+                continue
+            fingerprint = source_fingerprint(repeater)
+            if fingerprint in reusable:
+                enhanced_results.append(reusable[fingerprint])
+                continue
+            pending.append((len(enhanced_results), repeater, fingerprint))
+            enhanced_results.append(None)
+
+        queries = [
+            None if self._has_coordinates(repeater) else self._geocode_query(repeater)
+            for _, repeater, _ in pending
+        ]
+        unique_queries = [query for query in dict.fromkeys(queries) if query]
+        coords_by_query = {}
+        if unique_queries:
+            missing = sum(1 for query in queries if query)
+            print(f"Geocoding {len(unique_queries)} locations for {missing} repeaters")
+            coords_by_query = self.geocoder.geocode_many(unique_queries)
+            for query in unique_queries:
+                if not coords_by_query.get(query):
+                    print(f"  -> Geocoding failed for {', '.join(filter(None, query))}")
+
+        for (position, repeater, fingerprint), query in zip(pending, queries):
             enhanced_repeater = repeater.copy()
+            coords = coords_by_query.get(query) if query else None
 
-            # Check if coordinates are missing or invalid
-            has_coords = (
-                repeater.get("Lat")
-                and repeater.get("Long")
-                and float(repeater.get("Lat", 0)) != 0
-                and float(repeater.get("Long", 0)) != 0
-            )
-
-            if not has_coords:
-                # Try to geocode based on available location information
-                city = repeater.get("Nearest City") or repeater.get("Landmark")
-                state = repeater.get("State")
-                country = repeater.get("Country")
-
-                if city:
-                    print(f"Geocoding {city}, {state or ''}, {country or ''}")
-                    coords = self.geocoder.geocode(city, state, country)
-
-                    if coords:
-                        enhanced_repeater["Lat"] = str(coords["lat"])
-                        enhanced_repeater["Long"] = str(coords["lon"])
-                        enhanced_repeater["_geocoded"] = True
-                        print(
-                            f"  -> Found coordinates: {coords['lat']}, {coords['lon']}"
-                        )
-                    else:
-                        print(f"  -> Geocoding failed for {city}")
-                        enhanced_repeater["_geocoded"] = False
-                else:
-                    enhanced_repeater["_geocoded"] = False
+            if coords:
+                enhanced_repeater["Lat"] = str(coords["lat"])
+                enhanced_repeater["Long"] = str(coords["lon"])
+                enhanced_repeater["_geocoded"] = True
             else:
-                enhanced_repeater["_geocoded"] = False  # Already had coordinates
+                # Already had coordinates, or nothing to geocode by, or a miss
+                enhanced_repeater["_geocoded"] = False
 
-            enhanced_results.append(enhanced_repeater)
+            enhanced_repeater["_enriched"] = ENRICHMENT_VERSION
+            enhanced_repeater["_source_hash"] = fingerprint
+            enhanced_results[position] = enhanced_repeater
 
         # Return enhanced data
         enhanced_data = data.copy()
         enhanced_data["results"] = enhanced_results
+        enhanced_data["_enrichment_version"] = ENRICHMENT_VERSION
         return enhanced_data
 
-    def _make_request(self, endpoint, **params):
-        """Make API request with proper headers and caching"""
+    def _cache_key(self, endpoint, params):
         # Create cache key from endpoint and sorted params
-        cache_key = f"{endpoint}_" + "_".join(
-            f"{k}={v}" for k, v in sorted(params.items())
-        )
+        return f"{endpoint}_" + "_".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+    def _make_request(self, endpoint, *, refresh=False, **params):
+        """
+        Make API request with proper headers and caching
+
+        The cache holds enriched payloads, so a hit is returned as is. Payloads
+        cached by an older enrichment version are upgraded once and written back.
+        With refresh=True the API is queried again, and records that did not
+        change since the cached copy keep their enrichment.
+        """
+        cache_key = self._cache_key(endpoint, params)
 
         # Build full URL
         url = f"{self.base_url}/{endpoint}"
 
         # Check cache first
-        import os.path
-
-        cache_filename = (
-            f"{self._FileCache__cache_dir()}/{cache_key}.{self.method.__name__}"
-        )
-        if os.path.isfile(cache_filename):
-            content = open(cache_filename).read()
-            data = self.method.loads(content)
-            # Enhance with coordinates if needed
-            return self._enhance_with_coordinates(data)
-        else:
-            # Make request with headers
-            response = requests.get(url, params=params, headers=self._get_headers())
-            response.raise_for_status()
-            content = response.json()
+        cached = self.read_cache(cache_key)
+        if cached is not None and not refresh and self._is_enriched(cached):
+            return cached
+
+        # One process downloads and enriches, others wait and read its result
+        with self.lock(cache_key):
+            if not refresh:
+                cached = self.read_cache(cache_key)
+            if cached is not None and not refresh:
+                if self._is_enriched(cached):
+                    return cached
+                enhanced_content = self._enhance_with_coordinates(cached)
+                self.write_cache(cache_key, enhanced_content)
+                return enhanced_content
+
+            if set(params) <= {"country"}:
+                content = self._download_export(url, params, cache_key)
+            else:
+                response = transport.get(
+                    url, params=params, headers=self._get_headers()
+                )
+                response.raise_for_status()
+                content = response.json()
             # Enhance with coordinates before caching
-            enhanced_content = self._enhance_with_coordinates(content)
+            enhanced_content = self._enhance_with_coordinates(content, previous=cached)
             self.write_cache(cache_key, enhanced_content)
             return enhanced_content
 
+    def _download_export(self, url, params, cache_key):
+        """
+        A whole-country export, streamed to disk (resumably) and parsed from
+        there one result at a time, so neither the response nor the file's
+        text is held in memory alongside the decoded results
+        """
+        path = transport.download(
+            url,
+            self.file_path(f".{cache_key}.download"),
+            params=params,
+            headers=self._get_headers(),
+        )
+        try:
+            with open(path, encoding="utf-8") as f:
+                try:
+                    results = list(iter_array(f, "results"))
+                except ValueError:
+                    # No results array, e.g. "results": null; small enough
+                    f.seek(0)
+                    return json.load(f)
+            return {"count": len(results), "results": results}
+        finally:
+            os.remove(path)
+
     def get_repeaters_by_country(self, country, **filters):
         """
         Get repeaters by country
@@ -214,14 +367,46 @@ class RepeaterBookAPI(FileCache):
             country: Country name (e.g., "United States", "Canada", "Switzerland")
             **filters: Additional filters like callsign, city, state_id, frequency, mode, etc.
         """
-        # Determine endpoint based on country
+        params = self._build_params(country=country, **filters)
+        return self._make_request(self._country_endpoint(country), **params)
+
+    def _country_endpoint(self, country):
         if country.lower() in ["united states", "canada"]:
-            endpoint = "export.php"
-        else:
-            endpoint = "exportROW.php"
+            return "export.php"
+        return "exportROW.php"
+
+    def _records(self, endpoint, params):
+        cache_key = self._cache_key(endpoint, params)
+        return source_records(
+            f"repeaterbook_{cache_key}",
+            self,
+            cache_key,
+            lambda: self._make_request(endpoint, **params)["results"] or [],
+            from_repeaterbook,
+        )
 
+    def state_resource(self, state_id, country="United States", **filters):
+        """
+        Resource for a state export; fetching it geocodes the export as well
+        """
+        params = self._build_params(state_id=state_id, country=country, **filters)
+        cache_key = self._cache_key("export.php", params)
+        return Resource(
+            "repeaterbook export",
+            cache_key,
+            fetch=lambda: self._make_request("export.php", **params),
+            is_cached=lambda: self.snapshot_id(cache_key) is not None,
+        )
+
+    def records_by_country(self, country, **filters):
+        """Like get_repeaters_by_country, as RepeaterRecords"""
         params = self._build_params(country=country, **filters)
-        return self._make_request(endpoint, **params)
+        return self._records(self._country_endpoint(country), params)
+
+    def records_by_state(self, state_id, country="United States", **filters):
+        """Like get_repeaters_by_state, as RepeaterRecords"""
+        params = self._build_params(state_id=state_id, country=country, **filters)
+        return self._records("export.php", params)
 
     def get_repeaters_by_state(self, state_id, country="United States", **filters):
         """
@@ -330,3 +515,123 @@ class RepeaterBookAPI(FileCache):
         """
         params = self._build_params(stype="gmrs", country="United States", **filters)
         return self._make_request("export.php", **params)
+
+    def get_repeaters_by_regions(
+        self, states=(), countries=(), country="United States", max_workers=4, **filters
+    ):
+        """
+        Get repeaters for several states and/or countries at once
+
+        The exports are fetched concurrently and merged into one result set,
+        deduplicated by (callsign, frequency) so that repeaters listed in more
+        than one region appear once. Earlier regions win on duplicates.
+
+        Args:
+            states: State FIPS codes (e.g., ["36", "34", "09"])
+            countries: Country names (e.g., ["Canada"])
+            country: Country the state codes belong to (default: "United States")
+            max_workers: Number of concurrent requests
+            **filters: Additional filters applied to every request
+        """
+        requests_to_make = [
+            (self.get_repeaters_by_state, (state_id,), {"country": country})
+            for state_id in states
+        ] + [(self.get_repeaters_by_country, (name,), {}) for name in countries]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(method, *args, **kwargs, **filters)
+                for method, args, kwargs in requests_to_make
+            ]
+            responses = [future.result() for future in futures]
+
+        merged = {}
+        for response in responses:
+            for repeater in response.get("results") or []:
+                identity = repeater_identity(
+                    repeater.get("Callsign"), repeater.get("Frequency")
+                )
+                merged.setdefault(identity, repeater)
+
+        results = list(merged.values())
+        return {"count": len(results), "results": results}
+
+    def records_by_region(
+        self, states=(), countries=(), country="United States", max_workers=4, **filters
+    ):
+        """
+        RepeaterRecords of several states and/or countries, fetched
+        concurrently, as {region_name(): records} in the order given.
+
+        Each region's records are cached against its export, so regions whose
+        export did not change are loaded without parsing it.
+        """
+        requests_to_make = [
+            (
+                region_name(country, state_id),
+                self.records_by_state,
+                (state_id,),
+                {"country": country},
+            )
+            for state_id in states
+        ] + [
+            (region_name(name), self.records_by_country, (name,), {})
+            for name in countries
+        ]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                region: executor.submit(method, *args, **kwargs, **filters)
+                for region, method, args, kwargs in requests_to_make
+            }
+            return {region: future.result() for region, future in futures.items()}
+
+    def export_keys(self, states=(), countries=(), country="United States", **filters):
+        """Cache keys of the exports records_by_region() reads"""
+        return [
+            self._cache_key(
+                "export.php",
+                self._build_params(state_id=state_id, country=country, **filters),
+            )
+            for state_id in states
+        ] + [
+            self._cache_key(
+                self._country_endpoint(name),
+                self._build_params(country=name, **filters),
+            )
+            for name in countries
+        ]
+
+    def records_by_regions(
+        self, states=(), countries=(), country="United States", max_workers=4, **filters
+    ):
+        """
+        Like get_repeaters_by_regions, as a list of RepeaterRecords; see
+        records_by_region()
+        """
+        by_region = self.records_by_region(
+            states, countries, country, max_workers, **filters
+        )
+
+        merged = {}
+        for records in by_region.values():
+            for record in records:
+                identity = repeater_identity(record.callsign, record.rx_freq)
+                merged.setdefault(identity, record)
+        return list(merged.values())
+
+    def records_for_plan(self, plan, max_workers=4):
+        """RepeaterRecords for a rbplanner.QueryPlan, merged across states"""
+        return self.records_by_regions(
+            states=plan.states,
+            country=plan.country,
+            max_workers=max_workers,
+            **plan.filters,
+        )
+
+    def plan_resources(self, plan):
+        """Resources of the exports a rbplanner.QueryPlan reads"""
+        return [
+            self.state_resource(state_id, country=plan.country, **plan.filters)
+            for state_id in plan.states
+        ]
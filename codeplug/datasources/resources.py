@@ -0,0 +1,20 @@
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class Resource:
+    """
+    One remote resource a recipe needs, e.g. a device's static talkgroups.
+
+    fetch() downloads it into its cache; is_cached() tells whether that already
+    happened. Resources compare by (kind, key), so plans can be deduplicated.
+    """
+
+    kind: str
+    key: str
+    fetch: Callable = field(compare=False, repr=False)
+    is_cached: Callable = field(compare=False, repr=False)
+
+    def __str__(self):
+        return f"{self.kind} {self.key}"
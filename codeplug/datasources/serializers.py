@@ -0,0 +1,230 @@
+"""
+Codecs for FileCache entries.
+
+Entries start with a one-line header naming the codec that wrote them, e.g.
+"#codeplug-cache:orjson+zstd", so they stay readable after the configured
+codec changes. Plain json entries have no header: they are ordinary JSON
+files, as before codecs.
+
+Codecs are chosen per cache prefix: PREFIX_CODECS, overridden by the
+CODEPLUG_CACHE_CODECS environment variable, e.g.
+
+    CODEPLUG_CACHE_CODECS="repeaterbook=orjson+zstd,bm_devices=msgpack,*=orjson"
+
+Unless configured, entries are plain json, so what is written does not depend
+on which packages happen to be installed. Optional codecs (orjson, msgpack,
+zstd) need their packages installed wherever the cache is read; a configured
+codec that is not available falls back to DEFAULT_CODEC.
+"""
+
+import json
+import os
+import time
+import warnings
+import zlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+HEADER_PREFIX = b"#codeplug-cache:"
+
+
+class CodecUnavailableError(RuntimeError):
+    pass
+
+
+class JSONCodec:
+    name = "json"
+
+    def encode(self, value):
+        return json.dumps(value).encode("utf-8")
+
+    def decode(self, data):
+        return json.loads(data)
+
+
+class ORJSONCodec:
+    name = "orjson"
+
+    def encode(self, value):
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def decode(self, data):
+        return orjson.loads(data)
+
+
+class MsgPackCodec:
+    name = "msgpack"
+
+    def encode(self, value):
+        return msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, data):
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class CompressedCodec:
+    """Another codec's output, compressed with zlib or zstd"""
+
+    def __init__(self, inner, compression):
+        self.inner = inner
+        self.compression = compression
+        self.name = f"{inner.name}+{compression}"
+
+    def encode(self, value):
+        data = self.inner.encode(value)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        return zlib.compress(data, 6)
+
+    def decode(self, data):
+        try:
+            if self.compression == "zstd":
+                data = zstandard.ZstdDecompressor().decompress(data)
+            else:
+                data = zlib.decompress(data)
+        except Exception as e:
+            raise ValueError(f"Corrupt {self.compression} data: {e}") from e
+        return self.inner.decode(data)
+
+
+# name -> (codec class, required module or None if always available)
+CODECS = {
+    "json": (JSONCodec, None),
+    "orjson": (ORJSONCodec, orjson),
+    "msgpack": (MsgPackCodec, msgpack),
+}
+COMPRESSIONS = {"zlib": zlib, "zstd": zstandard}
+
+DEFAULT_CODEC = "json"
+
+# Codec per cache prefix; anything not listed uses DEFAULT_CODEC
+PREFIX_CODECS = {}
+
+_codecs = {}
+
+
+def get_codec(name):
+    """
+    The codec for a name such as "json", "orjson" or "msgpack+zstd".
+
+    Raises CodecUnavailableError if its package is not installed.
+    """
+    if name not in _codecs:
+        base, _, compression = name.partition("+")
+        if base not in CODECS or (compression and compression not in COMPRESSIONS):
+            raise ValueError(f"Unknown cache codec: {name}")
+        codec_class, module = CODECS[base]
+        if base != "json" and module is None:
+            raise CodecUnavailableError(f"{base} is not installed")
+        codec = codec_class()
+        if compression:
+            if COMPRESSIONS[compression] is None:
+                raise CodecUnavailableError(f"{compression} is not installed")
+            codec = CompressedCodec(codec, compression)
+        _codecs[name] = codec
+    return _codecs[name]
+
+
+def available_codecs():
+    names = []
+    for base in CODECS:
+        for compression in ("", *COMPRESSIONS):
+            name = f"{base}+{compression}" if compression else base
+            try:
+                get_codec(name)
+            except CodecUnavailableError:
+                continue
+            names.append(name)
+    return names
+
+
+def _configured_codecs():
+    codecs = dict(PREFIX_CODECS)
+    for item in os.environ.get("CODEPLUG_CACHE_CODECS", "").split(","):
+        if "=" in item:
+            prefix, name = item.split("=", 1)
+            codecs[prefix.strip()] = name.strip()
+    return codecs
+
+
+def codec_for(prefix):
+    """The codec new entries of a cache prefix are written with"""
+    codecs = _configured_codecs()
+    name = codecs.get(prefix, codecs.get("*", DEFAULT_CODEC))
+    try:
+        return get_codec(name)
+    except CodecUnavailableError as e:
+        warnings.warn(f"Cache codec {name} for {prefix}: {e}; using {DEFAULT_CODEC}")
+        return get_codec(DEFAULT_CODEC)
+
+
+def encode_entry(value, codec):
+    if codec.name == "json":
+        return codec.encode(value)
+    return HEADER_PREFIX + codec.name.encode("ascii") + b"\n" + codec.encode(value)
+
+
+def decode_entry(data, legacy=json):
+    """
+    Decode a cache file written by encode_entry(), or a headerless legacy
+    file with the legacy module's loads().
+
+    Raises ValueError if the entry is corrupt or was written with a codec
+    that is not available here.
+    """
+    if data.startswith(HEADER_PREFIX):
+        header, _, payload = data.partition(b"\n")
+        name = header[len(HEADER_PREFIX) :].decode("ascii")
+        try:
+            codec = get_codec(name)
+        except CodecUnavailableError as e:
+            raise ValueError(f"Cache entry written with {name}: {e}") from e
+        return codec.decode(payload)
+    return legacy.loads(data)
+
+
+def benchmark(values, codecs=None, repeat=3):
+    """
+    Disk footprint and encode/decode time of values under each codec.
+
+    Args:
+        values: Decoded cache entries
+        codecs: Codec names (default: all available)
+        repeat: Timings are the best of this many runs
+
+    Returns:
+        {codec name: {"bytes": int, "encode": seconds, "decode": seconds}}
+    """
+    results = {}
+    for name in codecs or available_codecs():
+        codec = get_codec(name)
+        encoded = [codec.encode(value) for value in values]
+        results[name] = {
+            "bytes": sum(len(data) for data in encoded),
+            "encode": _best_time(lambda: [codec.encode(v) for v in values], repeat),
+            "decode": _best_time(lambda: [codec.decode(d) for d in encoded], repeat),
+        }
+    return results
+
+
+def _best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
@@ -0,0 +1,210 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import requests
+
+# Bump whenever fingerprints or the state layout change; forces a full crawl
+SYNC_VERSION = 1
+
+# Device fields that describe its configuration. Timestamps of config changes
+# are only present on some API versions; absent fields are simply skipped.
+FINGERPRINT_FIELDS = (
+    "callsign",
+    "rx",
+    "tx",
+    "colorcode",
+    "lastKnownMaster",
+    "last_updated",
+    "updated_at",
+)
+
+STATE_KEY = "_sync_state"
+
+
+def device_fingerprint(device):
+    config = {f: device[f] for f in FINGERPRINT_FIELDS if f in device}
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def _parse_time(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+@dataclass
+class SyncPlan:
+    """Device IDs by what a sync does with them"""
+
+    new: list = field(default_factory=list)
+    adopted: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    missing: list = field(default_factory=list)
+    stale: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+
+    def to_fetch(self):
+        return self.new + self.changed + self.missing + self.stale
+
+    def summary(self):
+        return ", ".join(
+            f"{len(getattr(self, name))} {name}"
+            for name in (
+                "new",
+                "adopted",
+                "changed",
+                "missing",
+                "stale",
+                "unchanged",
+                "removed",
+                "failed",
+            )
+        )
+
+
+class TalkgroupSync:
+    """
+    Incremental refresh of the static talkgroup cache.
+
+    The fingerprint and fetch time of every synced device is kept next to the
+    talkgroup cache. A sync compares a fresh device list against it and only
+    re-fetches talkgroups of devices that are:
+
+    - new, or reappeared after being removed, and not cached yet
+    - changed (callsign, frequencies, color code, master, config timestamps)
+    - missing from the talkgroup cache
+    - active in the last active_days, with talkgroups older than max_age_days
+
+    Cached devices the state does not know yet, e.g. on the first sync after
+    ordinary builds filled the cache, are adopted as of their entry's
+    modification time rather than fetched again. Devices that disappeared
+    from the list are evicted and tombstoned.
+
+    Usage:
+        plan = TalkgroupSync(TalkgroupAPI()).run(DeviceDB().refresh())
+    """
+
+    def __init__(
+        self,
+        talkgroup_api,
+        *,
+        active_days=2,
+        max_age_days=7,
+        tombstone_days=90,
+        now=None,
+    ):
+        self.talkgroup_api = talkgroup_api
+        self.active_days = active_days
+        self.max_age_days = max_age_days
+        self.tombstone_days = tombstone_days
+        self.now = now or datetime.now()
+
+    def load_state(self):
+        state = self.talkgroup_api.read_cache(STATE_KEY)
+        if state is None or state.get("version") != SYNC_VERSION:
+            return {"version": SYNC_VERSION, "devices": {}, "tombstones": {}}
+        return state
+
+    def plan(self, devices, state=None):
+        state = state if state is not None else self.load_state()
+        known = state["devices"]
+        plan = SyncPlan()
+
+        current = set()
+        for device in devices:
+            device_id = str(device["id"])
+            current.add(device_id)
+            previous = known.get(device_id)
+            if previous is None:
+                fetched_at = self.talkgroup_api.modified_at(device_id)
+                if fetched_at is None:
+                    plan.new.append(device_id)
+                elif self._is_stale(device, fetched_at):
+                    plan.stale.append(device_id)
+                else:
+                    plan.adopted.append(device_id)
+            elif previous["fingerprint"] != device_fingerprint(device):
+                plan.changed.append(device_id)
+            elif self.talkgroup_api.snapshot_id(device_id) is None:
+                plan.missing.append(device_id)
+            elif self._is_stale(device, _parse_time(previous.get("fetched_at"))):
+                plan.stale.append(device_id)
+            else:
+                plan.unchanged.append(device_id)
+
+        plan.removed = sorted(set(known) - current)
+        return plan
+
+    def _is_stale(self, device, fetched_at):
+        last_seen = _parse_time(device.get("last_seen"))
+        if last_seen is None or self.now - last_seen > timedelta(days=self.active_days):
+            return False
+        return fetched_at is None or self.now - fetched_at > timedelta(
+            days=self.max_age_days
+        )
+
+    def run(self, devices, progress=None):
+        """
+        Sync the talkgroup cache with devices and persist the new state.
+
+        Args:
+            devices: Device list from the Brandmeister /v2/device API
+            progress: Optional callable(done, total, device_id) after each fetch
+
+        Returns:
+            The executed SyncPlan; devices whose fetch failed are listed in
+            plan.failed and retried by the next sync.
+        """
+        devices = list(devices)
+        state = self.load_state()
+        plan = self.plan(devices, state)
+        by_id = {str(d["id"]): d for d in devices}
+        now = self.now.isoformat(timespec="seconds")
+
+        to_fetch = plan.to_fetch()
+        for done, device_id in enumerate(to_fetch, 1):
+            try:
+                self.talkgroup_api.static_talkgroups(device_id, refresh=True)
+            except (requests.RequestException, ValueError):
+                plan.failed.append(device_id)
+                # Keep the old entry, if any, so the device is retried
+                continue
+            finally:
+                if progress:
+                    progress(done, len(to_fetch), device_id)
+            state["devices"][device_id] = {
+                "fingerprint": device_fingerprint(by_id[device_id]),
+                "fetched_at": now,
+            }
+            state["tombstones"].pop(device_id, None)
+
+        for device_id in plan.adopted:
+            fetched_at = self.talkgroup_api.modified_at(device_id)
+            if fetched_at is None:
+                # Evicted meanwhile; the next sync sees it as new
+                continue
+            state["devices"][device_id] = {
+                "fingerprint": device_fingerprint(by_id[device_id]),
+                "fetched_at": fetched_at.isoformat(timespec="seconds"),
+            }
+            state["tombstones"].pop(device_id, None)
+
+        for device_id in plan.removed:
+            self.talkgroup_api.evict(device_id)
+            del state["devices"][device_id]
+            state["tombstones"][device_id] = now
+
+        cutoff = self.now - timedelta(days=self.tombstone_days)
+        state["tombstones"] = {
+            device_id: removed_at
+            for device_id, removed_at in state["tombstones"].items()
+            if _parse_time(removed_at) >= cutoff
+        }
+        state["synced_at"] = now
+        self.talkgroup_api.write_cache(STATE_KEY, state)
+        return plan
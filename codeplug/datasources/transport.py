@@ -0,0 +1,344 @@
+"""
+Shared HTTP transport for all datasources.
+
+One requests.Session keeps a pool of keep-alive connections per host, so
+repeated calls to the same API reuse connections instead of doing a TCP and
+TLS handshake each time. On top of that the transport negotiates compressed
+responses, applies default timeouts, retries idempotent requests with
+jittered exponential backoff (honouring Retry-After), and spaces requests to
+hosts with a rate limit. Retries are made by the transport itself rather than
+by urllib3, so every attempt waits for the host's rate limit.
+
+Large documents can be streamed to disk with download(), which resumes
+interrupted transfers instead of starting over.
+
+Usage:
+    from . import transport
+    response = transport.get(url, params={...})
+    transport.download(url, "cache/bm_devices/.repeaters.download")
+"""
+
+import contextlib
+import email.utils
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (10, 60)
+
+# Minimum seconds between requests to a host
+DEFAULT_RATE_LIMITS = {
+    # Nominatim usage policy: at most one request per second
+    "nominatim.openstreetmap.org": 1.0,
+}
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Errors after which a request is retried
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout)
+
+DOWNLOAD_CHUNK = 64 * 1024
+
+# Errors after which a download is resumed rather than given up
+RESUMABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+class DownloadError(requests.RequestException):
+    """A download completed but failed its integrity checks"""
+
+
+class RateLimiter:
+    """Space calls to wait() at least min_interval seconds apart"""
+
+    def __init__(self, min_interval, clock=time.monotonic, sleep=time.sleep):
+        self.min_interval = min_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = self._clock()
+            if now < self._next:
+                self._sleep(self._next - now)
+                now = self._next
+            self._next = now + self.min_interval
+
+
+class Transport:
+    """
+    Pooled HTTP client shared by the datasources.
+
+    Thread-safe: the prefetcher and the RepeaterBook enrichment call it from
+    worker threads.
+    """
+
+    def __init__(
+        self,
+        pool_size=16,
+        retries=3,
+        backoff=0.5,
+        jitter=0.5,
+        timeout=DEFAULT_TIMEOUT,
+        rate_limits=None,
+        sleep=time.sleep,
+    ):
+        """
+        Args:
+            pool_size: Keep-alive connections kept per host
+            retries: Retries of failed connections and retryable statuses
+            backoff: Base of the exponential backoff between retries, seconds;
+                     the first retry waits this long
+            jitter: Up to this many random seconds added to each backoff
+            timeout: Default (connect, read) timeout, seconds
+            rate_limits: {host: minimum seconds between requests}
+            sleep: Called with the seconds to wait before a retry
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.jitter = jitter
+        self._sleep = sleep
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # gzip and deflate, plus brotli/zstd when their decoders are installed
+        self.session.headers["Accept-Encoding"] = make_headers(accept_encoding=True)[
+            "accept-encoding"
+        ]
+        self._limiters = {
+            host: RateLimiter(interval)
+            for host, interval in (
+                DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+            ).items()
+        }
+
+    def rate_limit(self, host, min_interval):
+        """Space requests to host at least min_interval seconds apart"""
+        self._limiters[host] = RateLimiter(min_interval)
+
+    def get(self, url, **kwargs):
+        """
+        requests.get() through the pool, with the default timeout.
+
+        Connection errors and RETRY_STATUSES are retried; each attempt waits
+        for the host's rate limit. After the last retry the response is
+        returned as is, so callers decide via raise_for_status().
+        """
+        limiter = self._limiters.get(urlsplit(url).hostname)
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            if limiter:
+                limiter.wait()
+            try:
+                response = self.session.get(url, **kwargs)
+            except RETRYABLE_ERRORS:
+                if attempt == self.retries:
+                    raise
+                self._sleep(self._backoff(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                return response
+            delay = max(self._backoff(attempt), _retry_after(response))
+            response.close()
+            self._sleep(delay)
+
+    def _backoff(self, attempt):
+        return self.backoff * 2**attempt + random.uniform(0, self.jitter)
+
+    def download(
+        self,
+        url,
+        path,
+        *,
+        params=None,
+        headers=None,
+        sha256=None,
+        progress=None,
+        attempts=5,
+    ):
+        """
+        Stream url into path without holding the body in memory.
+
+        The body is written to path + ".part" and moved into place once
+        complete. An interrupted transfer, in this call or an earlier one, is
+        resumed with a Range request; If-Range makes the server send the whole
+        document again if it changed in the meantime. Compression is not
+        negotiated, so ranges and lengths refer to the bytes on disk.
+
+        Args:
+            url: Document to download
+            path: Destination file
+            params: Query parameters
+            headers: Extra request headers
+            sha256: Expected hex digest of the complete body, if known
+            progress: Optional callable(done_bytes, total_bytes or None)
+            attempts: Connections tried before giving up
+
+        Raises:
+            requests.RequestException on HTTP errors, after the given attempts,
+            and (as DownloadError) when the size or digest do not match.
+        """
+        part = path + ".part"
+        meta_path = part + ".meta"
+        meta = _read_meta(meta_path)
+        if meta.get("url") != url or meta.get("params") != (params or {}):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(part)
+            meta = {"url": url, "params": params or {}}
+
+        for attempt in range(attempts):
+            try:
+                self._download_part(
+                    url, part, meta, meta_path, params, headers, progress
+                )
+                break
+            except RESUMABLE_ERRORS:
+                if attempt == attempts - 1:
+                    raise
+
+        size = os.path.getsize(part)
+        if meta.get("total") is not None and size != meta["total"]:
+            _discard(part, meta_path)
+            raise DownloadError(f"{url}: got {size} bytes, expected {meta['total']}")
+        if sha256 and _sha256(part) != sha256.lower():
+            _discard(part, meta_path)
+            raise DownloadError(f"{url}: SHA-256 mismatch")
+        os.replace(part, path)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(meta_path)
+        return path
+
+    def _download_part(self, url, part, meta, meta_path, params, headers, progress):
+        headers = {**(headers or {}), "Accept-Encoding": "identity"}
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        if offset:
+            if offset == meta.get("total"):
+                return
+            headers["Range"] = f"bytes={offset}-"
+            if meta.get("validator"):
+                headers["If-Range"] = meta["validator"]
+
+        with self.get(url, params=params, headers=headers, stream=True) as response:
+            if response.status_code == 416:
+                # Nothing past what we have, or the partial file is bogus
+                os.remove(part)
+                raise requests.ConnectionError(f"{url}: range not satisfiable")
+            response.raise_for_status()
+            if response.status_code == 206:
+                start, total = _content_range(response.headers.get("Content-Range"))
+                if start != offset:
+                    raise requests.ConnectionError(f"{url}: unexpected range {start}")
+            else:
+                offset, total = 0, _int(response.headers.get("Content-Length"))
+
+            meta["validator"] = response.headers.get("ETag") or response.headers.get(
+                "Last-Modified"
+            )
+            meta["total"] = total
+            _write_meta(meta_path, meta)
+
+            done = offset
+            with open(part, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK):
+                    f.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(done, total)
+
+    def close(self):
+        self.session.close()
+
+
+def _retry_after(response):
+    """Seconds asked for by a Retry-After header (delay or HTTP date), or 0"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return 0
+    if value.strip().isdigit():
+        return int(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _content_range(value):
+    """(start, total) from a "bytes start-end/total" Content-Range header"""
+    try:
+        unit, _, spec = value.partition(" ")
+        span, _, total = spec.partition("/")
+        return int(span.split("-")[0]), _int(total)
+    except (AttributeError, ValueError):
+        return None, None
+
+
+def _read_meta(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_meta(path, meta):
+    with open(path, "w") as f:
+        json.dump(meta, f)
+
+
+def _discard(part, meta_path):
+    for path in (part, meta_path):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_transport():
+    """The process-wide Transport, created on first use"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Transport()
+        return _default
+
+
+def get(url, **kwargs):
+    return default_transport().get(url, **kwargs)
+
+
+def download(url, path, **kwargs):
+    return default_transport().download(url, path, **kwargs)
@@ -90,6 +90,15 @@ class FilterChain:
                 print(f"[FilterChain] Filtered out: {item_name} - {reason}")
         return filtered_items
 
+    @property
+    def per_site(self) -> bool:
+        """
+        True if every filter only looks at repeater data (location, frequency),
+        so the chain can be evaluated once per RepeaterSite instead of once
+        per channel.
+        """
+        return all(f.per_site for f in self.filters)
+
     def __len__(self) -> int:
         """Return the number of filters in the chain."""
         return len(self.filters)
@@ -102,8 +111,14 @@ class FilterChain:
 class BaseFilter:
     """
     Base class for all filters. Filters test whether an item should be included.
+
+    Filters which only read attributes a RepeaterSite also has (_lat, _lng,
+    _locator, _rpt_callsign, _qth, rx_freq, tx_freq) set per_site, so
+    generators may test a repeater's site once for all its channels.
     """
 
+    per_site = False
+
     def should_include(self, item: Any) -> Tuple[bool, str]:
         """
         Determine if an item should be included.
@@ -133,6 +148,8 @@ class DistanceFilter(BaseFilter):
         channels = generator.channels(sequence)
     """
 
+    per_site = True
+
     def __init__(
         self,
         reference_lat: float,
@@ -218,6 +235,8 @@ class RegionFilter(BaseFilter):
         channels = generator.channels(sequence)
     """
 
+    per_site = True
+
     def __init__(
         self,
         min_lat: float,
@@ -310,6 +329,8 @@ class BandFilter(BaseFilter):
         ])
     """
 
+    per_site = True
+
     def __init__(
         self,
         frequency_ranges: list[tuple[float, float]] = None,
@@ -1,7 +1,108 @@
+import hashlib
+
+
 class Sequence:
     def __init__(self, start=0):
         self.i = start
 
-    def next(self):
+    def next(self, key=None):
+        """
+        Next internal ID. key identifies what the ID is for (see
+        StableSequence); plain sequences number in generation order.
+        """
         self.i += 1
         return self.i
+
+
+def channel_key(callsign, rx_freq, slot=None, tg=None):
+    """Stable key of a channel: repeater callsign (or name), frequency, slot, TG"""
+    key = f"{callsign}@{rx_freq:.5f}"
+    if slot is not None:
+        key += f"/TS{slot}"
+    if tg is not None:
+        key += f"/TG{tg}"
+    return key
+
+
+def contact_key(type, calling_id):
+    return f"{type}:{calling_id}"
+
+
+class StableSequence(Sequence):
+    """
+    IDs derived from content keys, so an entity keeps its ID across runs no
+    matter what was added or removed before it.
+
+    A new key hashes to a slot in [1, space]; when that ID is already taken,
+    the next free one is used. Keys seen before (assigned) get their
+    previous ID back, and their IDs are never handed to new keys. Keys used
+    more than once in a run are told apart by occurrence; calls without a key
+    are keyed by their order among keyless calls.
+
+    Usage:
+        seq = StableSequence(assigned=previous_run_mapping)
+        chan.internal_id = seq.next(channel_key("SR5WA", 439.5625, 1, 260))
+        persist(seq.mapping())
+    """
+
+    def __init__(self, assigned=None, space=1_000_000):
+        super().__init__()
+        self.assigned = dict(assigned or {})
+        self.space = space
+        self.taken = set(self.assigned.values())
+        self._issued = {}
+        self._occurrences = {}
+        self._keyless = 0
+
+    def next(self, key=None):
+        if key is None:
+            self._keyless += 1
+            key = f"#{self._keyless}"
+        key = str(key)
+        count = self._occurrences.get(key, 0) + 1
+        self._occurrences[key] = count
+        if count > 1:
+            key = f"{key}#{count}"
+
+        internal_id = self.assigned.get(key)
+        if internal_id is None:
+            digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+            internal_id = int.from_bytes(digest, "big") % self.space + 1
+            while internal_id in self.taken:
+                internal_id = internal_id % self.space + 1
+            self.taken.add(internal_id)
+        self._issued[key] = internal_id
+        return internal_id
+
+    def mapping(self):
+        """Keys and IDs handed out in this run, to pass as assigned next time"""
+        return dict(self._issued)
+
+
+class IDRegistry:
+    """
+    Stable sequences by section ("channels", "contacts", ...), persisted in
+    the cache so IDs survive between runs.
+
+    Only the keys used in the last run are kept; an entity that disappears
+    loses its ID.
+    """
+
+    def __init__(self, name, cache=None):
+        from datasources.cache import FileCache
+
+        self.key = f"_{name}"
+        self.cache = cache or FileCache("stable_ids")
+        self.sections = {}
+        self._stored = self.cache.read_cache(self.key, {})
+
+    def sequence(self, section):
+        if section not in self.sections:
+            self.sections[section] = StableSequence(self._stored.get(section))
+        return self.sections[section]
+
+    def save(self):
+        self.cache.write_cache(
+            self.key,
+            {name: seq.mapping() for name, seq in self.sections.items()},
+        )
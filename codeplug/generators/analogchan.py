@@ -1,8 +1,7 @@
-from lxml import etree
-import json
-import maidenhead as mh
-
-from models import AnalogChannel, TxPower, ChannelWidth
+from models import AnalogChannel, TxPower, ChannelWidth, RepeaterSite
+from generators import channel_key
+from datasources.przemienniki import project_repeater
+from datasources.records import from_przemienniki, from_repeaterbook, normalize
 
 
 class AnalogPMR446ChannelGenerator:
@@ -19,10 +18,10 @@ class AnalogPMR446ChannelGenerator:
             chan_freq = f + (chan_num - 1) * 0.0125
             self._channels.append(
                 AnalogChannel(
-                    internal_id=sequence.next(),
+                    internal_id=sequence.next(
+                        channel_key(f"PMR {chan_num}", chan_freq)
+                    ),
                     name=f"PMR {chan_num}",
-                    rx_freq=chan_freq,
-                    tx_freq=chan_freq,
                     tx_power=TxPower.Low,
                     scanlist_id="-",
                     tot=None,
@@ -33,11 +32,7 @@ class AnalogPMR446ChannelGenerator:
                     tx_tone=110.9,
                     width=ChannelWidth.Narrow,
                     aprs=self.aprs_config,
-                    _lat=None,
-                    _lng=None,
-                    _locator=None,
-                    _rpt_callsign=None,
-                    _qth=None,
+                    site=RepeaterSite.shared(rx_freq=chan_freq, tx_freq=chan_freq),
                 )
             )
             f += 0.0125  # rounding problem here?
@@ -46,8 +41,22 @@ class AnalogPMR446ChannelGenerator:
 
 class AnalogChannelGeneratorFromPrzemienniki:
     def __init__(self, source, power, *, aprs, filter_chain=None, debug=False):
-        root = source
-        self._repeaters = root.findall("repeaters/repeater")
+        """
+        Initialize analog channel generator from przemienniki.net data
+
+        Args:
+            source: RepeaterRecords (PrzemiennikiAPI.records_2m() etc.), projected
+                    repeaters from PrzemiennikiAPI, or a parsed rxf.xml tree
+            power: Transmit power setting
+            aprs: APRS configuration
+            filter_chain: Optional FilterChain for pre-filtering channels
+            debug: If True, print debug information for filtered channels
+        """
+        if hasattr(source, "findall"):
+            source = [
+                project_repeater(node) for node in source.findall("repeaters/repeater")
+            ]
+        self._records = normalize(from_przemienniki, source)
         self.power = power
         self._channels = []
         self.aprs_config = aprs
@@ -60,69 +69,30 @@ class AnalogChannelGeneratorFromPrzemienniki:
         return self._channels
 
     def generate_channels(self, sequence):
-        for node in self._repeaters:
-            if node.find("status").text not in ["WORKING", "TESTING"]:
+        for record in self._records:
+            if record.status not in ["WORKING", "TESTING"]:
                 continue
 
-            if len(node.findall("band")) > 1:
+            if abs(record.offset) < 0.0001:
                 continue
 
-            if len(node.findall("qrg")) > 2:
-                continue
-
-            rpt_output = float(node.xpath('./qrg[@type="tx"]')[0].text)
-            rpt_input = float(node.xpath('./qrg[@type="rx"]')[0].text)
-            tx_offset = rpt_input - rpt_output
-
-            if abs(tx_offset) < 0.0001:
-                continue
-
-            rx_tone = None
-            tx_tone = None
-            if node.find("ctcss") is not None:
-                rx_tone_node = node.xpath('./ctcss[@type="tx"]')
-                if len(rx_tone_node) > 0:
-                    rx_tone = float(rx_tone_node[0].text)
-
-                tx_tone_node = node.xpath('./ctcss[@type="rx"]')
-                if len(tx_tone_node) > 0:
-                    tx_tone = float(tx_tone_node[0].text)
-
-            lat = None
-            lng = None
-            locator = None
-            if node.find("location") is not None:
-                try:
-                    lat = float(node.find("latitude").text)
-                    lng = float(node.find("longitude").text)
-                    locator = node.find("locator").text
-                except AttributeError:
-                    pass
-
-            callsign = node.find("qra").text
-            qth = node.find("qth").text
+            callsign = record.callsign
 
             # Create channel without ID first for filtering
             channel = AnalogChannel(
                 internal_id=None,  # Will be assigned after filtering
                 name=callsign,
-                rx_freq=rpt_output,
-                tx_freq=rpt_input,
                 tx_power=TxPower.High,
                 scanlist_id="-",
                 tot=None,
                 rx_only=False,
                 admit_crit="Free",
                 squelch=1,
-                rx_tone=rx_tone,
-                tx_tone=tx_tone,
+                rx_tone=record.rx_tone,
+                tx_tone=record.tx_tone,
                 width=ChannelWidth.Narrow,
                 aprs=self.aprs_config,
-                _lat=lat,
-                _lng=lng,
-                _locator=locator,
-                _rpt_callsign=callsign,
-                _qth=qth,
+                site=RepeaterSite.from_record(record),
             )
 
             # Apply filter chain if provided
@@ -136,118 +106,111 @@ class AnalogChannelGeneratorFromPrzemienniki:
                     continue
 
             # Assign ID and add to channels list
-            channel.internal_id = sequence.next()
+            channel.internal_id = sequence.next(channel_key(callsign, channel.rx_freq))
             self._channels.append(channel)
 
 
 class AnalogChannelGeneratorFromRepeaterBook:
-    def __init__(self, source, power, *, aprs, filter_chain=None, debug=False):
+    def __init__(
+        self, source, power, *, aprs, filter_chain=None, debug=False, bands=None
+    ):
         """
         Initialize analog channel generator from RepeaterBook data
 
         Args:
-            source: JSON data from RepeaterBook API
+            source: RepeaterRecords (RepeaterBookAPI.records_by_state() etc.),
+                    or JSON data from RepeaterBook API
             power: Transmit power setting
             aprs: APRS configuration
             filter_chain: Optional FilterChain for pre-filtering channels
             debug: If True, print debug information for filtered channels
+            bands: Optional list of (min_freq, max_freq) tuples in MHz. Each record
+                   is parsed and filtered once and the survivors are partitioned
+                   into these bands in a single sweep; see channels_by_band().
         """
-        self._repeaters = source["results"]
+        if isinstance(source, dict):
+            source = source["results"] or []
+        self._records = normalize(from_repeaterbook, source)
         self.power = power
         self._channels = []
+        self._channels_by_band = {}
         self.aprs_config = aprs
         self.filter_chain = filter_chain
         self.debug = debug
+        self.bands = bands
 
     def channels(self, sequence):
         if len(self._channels) == 0:
             self.generate_channels(sequence)
         return self._channels
 
-    def generate_channels(self, sequence):
-        for repeater in self._repeaters:
-            # Skip if not analog mode or if required fields are missing
-            if repeater.get("FM Analog") != "Yes":
-                continue
-
-            try:
-                # Get frequencies - new format provides Input Freq directly
-                rpt_output = float(repeater.get("Frequency", 0))
-                rpt_input = float(repeater.get("Input Freq", 0))
-
-                # Calculate offset to check if it's a repeater
-                offset = rpt_input - rpt_output
-
-                # Skip if no offset (not a repeater)
-                if abs(offset) < 0.0001:
-                    continue
-
-                # Skip if frequencies are 0 or invalid
-                if rpt_output == 0 or rpt_input == 0:
-                    continue
+    def channels_by_band(self, sequence):
+        """Return generated channels keyed by their (min_freq, max_freq) band."""
+        self.channels(sequence)
+        return self._channels_by_band
+
+    def _band_for(self, rx_freq):
+        for band in self.bands:
+            if band[0] <= rx_freq <= band[1]:
+                return band
+        return None
+
+    def _parse_repeater(self, record):
+        """Build an unnumbered channel from a RepeaterRecord, or None to skip it."""
+        # Skip if not analog mode
+        if not record.analog:
+            return None
+
+        # Skip if no offset (not a repeater)
+        if abs(record.offset) < 0.0001:
+            return None
+
+        # Use callsign and location as name
+        name = f"{record.callsign} {record.qth}".strip()
+
+        # Skip if we don't have a meaningful identifier
+        if not name:
+            return None
+
+        # Create channel without ID first for filtering
+        return AnalogChannel(
+            internal_id=None,  # Will be assigned after filtering
+            name=name,
+            tx_power=TxPower.High,
+            scanlist_id="-",
+            tot=None,
+            rx_only=False,
+            admit_crit="Free",
+            squelch=1,
+            rx_tone=record.rx_tone,
+            tx_tone=record.tx_tone,
+            width=ChannelWidth.Narrow,
+            aprs=self.aprs_config,
+            site=RepeaterSite.from_record(record),
+        )
 
-            except (ValueError, TypeError):
-                continue
+    def generate_channels(self, sequence):
+        """
+        Number the channels that pass the filters. With bands, channels are
+        numbered band by band, as separate per-band generators would.
+        """
+        partitions = {band: [] for band in self.bands} if self.bands else None
 
-            # Get tones - check both PL and TSQ fields
-            rx_tone = None
-            tx_tone = None
-            try:
-                # Try PL first, then TSQ as fallback
-                tone_str = repeater.get("PL") or repeater.get("TSQ")
-                if tone_str and tone_str.strip():
-                    tone_val = float(tone_str)
-                    rx_tone = tone_val
-                    tx_tone = tone_val
-            except (ValueError, TypeError):
-                pass
-
-            # Get location data
-            lat = None
-            lng = None
-            try:
-                if repeater.get("Lat"):
-                    lat = float(repeater.get("Lat"))
-                if repeater.get("Long"):
-                    lng = float(repeater.get("Long"))
-            except (ValueError, TypeError):
-                pass
-
-            # Get callsign and location
-            callsign = repeater.get("Callsign", "").strip()
-            qth = repeater.get("Nearest City", "").strip()
-            if not qth:
-                qth = repeater.get("Landmark", "").strip()
-
-            # Use callsign or frequency as name
-            name = f"{callsign} {qth}".strip()
-
-            # Skip if we don't have a meaningful identifier
-            if not name:
+        for record in self._records:
+            channel = self._parse_repeater(record)
+            if channel is None:
                 continue
 
-            # Create channel without ID first for filtering
-            channel = AnalogChannel(
-                internal_id=None,  # Will be assigned after filtering
-                name=name,
-                rx_freq=rpt_output,
-                tx_freq=rpt_input,
-                tx_power=TxPower.High,
-                scanlist_id="-",
-                tot=None,
-                rx_only=False,
-                admit_crit="Free",
-                squelch=1,
-                rx_tone=rx_tone,
-                tx_tone=tx_tone,
-                width=ChannelWidth.Narrow,
-                aprs=self.aprs_config,
-                _lat=lat,
-                _lng=lng,
-                _locator=None,
-                _rpt_callsign=callsign,
-                _qth=qth,
-            )
+            # Cheap band check first, so out-of-band records skip the filter chain
+            band = None
+            if partitions is not None:
+                band = self._band_for(channel.rx_freq)
+                if band is None:
+                    if self.debug:
+                        print(
+                            f"[AnalogChannelGeneratorFromRepeaterBook] Filtered out: {channel.name} - Frequency {channel.rx_freq} MHz not in generator bands"
+                        )
+                    continue
 
             # Apply filter chain if provided
             if self.filter_chain:
@@ -255,10 +218,24 @@ class AnalogChannelGeneratorFromRepeaterBook:
                 if not should_include:
                     if self.debug:
                         print(
-                            f"[AnalogChannelGeneratorFromRepeaterBook] Filtered out: {name} - {reason}"
+                            f"[AnalogChannelGeneratorFromRepeaterBook] Filtered out: {channel.name} - {reason}"
                         )
                     continue
 
-            # Assign ID and add to channels list
-            channel.internal_id = sequence.next()
-            self._channels.append(channel)
+            if partitions is not None:
+                partitions[band].append(channel)
+            else:
+                self._channels.append(self._numbered(channel, sequence))
+
+        # Assign IDs band by band, as separate per-band generators would have
+        if partitions is not None:
+            self._channels_by_band = partitions
+            for band in self.bands:
+                for channel in partitions[band]:
+                    self._channels.append(self._numbered(channel, sequence))
+
+    def _numbered(self, channel, sequence):
+        channel.internal_id = sequence.next(
+            channel_key(channel._rpt_callsign or channel.name, channel.rx_freq)
+        )
+        return channel
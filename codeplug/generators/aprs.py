@@ -5,7 +5,9 @@ from models import (
     AnalogAdmitCriteria,
     AnalogAPRSConfig,
     DigitalAPRSConfig,
+    RepeaterSite,
 )
+from generators import channel_key
 
 DEFAULT_PERIOD = 60
 
@@ -22,10 +24,8 @@ class AnalogAPRSGenerator:
             return self.aprs_channels
         self.aprs_channels.append(
             AnalogChannel(
-                internal_id=seq.next(),
+                internal_id=seq.next(channel_key("APRS EU", 144.800)),
                 name="APRS EU",
-                rx_freq=144.800,
-                tx_freq=144.800,
                 tx_power=TxPower.High,
                 scanlist_id=None,
                 tot=None,
@@ -36,19 +36,13 @@ class AnalogAPRSGenerator:
                 admit_crit=AnalogAdmitCriteria.Free.value,
                 width=ChannelWidth.Narrow,
                 aprs=None,
-                _lat=None,
-                _lng=None,
-                _locator=None,
-                _rpt_callsign=None,
-                _qth=None,
+                site=RepeaterSite.shared(rx_freq=144.800, tx_freq=144.800),
             )
         )
         self.aprs_channels.append(
             AnalogChannel(
-                internal_id=seq.next(),
+                internal_id=seq.next(channel_key("APRS US", 144.390)),
                 name="APRS US",
-                rx_freq=144.390,
-                tx_freq=144.390,
                 tx_power=TxPower.High,
                 scanlist_id=None,
                 tot=None,
@@ -59,11 +53,7 @@ class AnalogAPRSGenerator:
                 admit_crit=AnalogAdmitCriteria.Free.value,
                 width=ChannelWidth.Narrow,
                 aprs=None,
-                _lat=None,
-                _lng=None,
-                _locator=None,
-                _rpt_callsign=None,
-                _qth=None,
+                site=RepeaterSite.shared(rx_freq=144.390, tx_freq=144.390),
             )
         )
         return self.aprs_channels
@@ -71,7 +61,7 @@ class AnalogAPRSGenerator:
     def aprs_config_eu(self, seq):
         if self._aprs_config_eu is None:
             self._aprs_config_eu = AnalogAPRSConfig(
-                internal_id=seq.next(),
+                internal_id=seq.next("Analog APRS EU"),
                 name="Analog APRS EU",
                 channel_id=self.aprs_channels[0].internal_id,
                 source=f"{self.source}-7",
@@ -86,7 +76,7 @@ class AnalogAPRSGenerator:
     def aprs_config_us(self, seq):
         if self._aprs_config_us is None:
             self._aprs_config_us = AnalogAPRSConfig(
-                internal_id=seq.next(),
+                internal_id=seq.next("Analog APRS US"),
                 name="Analog APRS US",
                 channel_id=self.aprs_channels[1].internal_id,
                 source=f"{self.source}-7",
@@ -111,7 +101,7 @@ class DigitalAPRSGenerator:
     def digital_aprs_config(self, seq):
         if self.aprs_config is None:
             self.aprs_config = DigitalAPRSConfig(
-                internal_id=seq.next(),
+                internal_id=seq.next("DMR APRS"),
                 name="DMR APRS",
                 period=DEFAULT_PERIOD,
                 contact_id=self.aprs_contact.internal_id,
@@ -2,6 +2,7 @@ import re
 import json
 
 from models import Contact, ContactType
+from generators import contact_key
 from datasources.brandmeister import ContactDB, UnlistedContactDB
 
 
@@ -21,7 +22,7 @@ class BrandmeisterTGContactGenerator:
         for key in self._contactdb:
             self._contacts.append(
                 Contact(
-                    internal_id=sequence.next(),
+                    internal_id=sequence.next(contact_key(ContactType.GroupCall, key)),
                     name=self._contactdb[key],
                     type=ContactType.GroupCall,
                     calling_id=int(key),
@@ -31,7 +32,7 @@ class BrandmeisterTGContactGenerator:
         for key in self._unlisted_contactdb:
             self._contacts.append(
                 Contact(
-                    internal_id=sequence.next(),
+                    internal_id=sequence.next(contact_key(ContactType.GroupCall, key)),
                     name=self._unlisted_contactdb[key],
                     type=ContactType.GroupCall,
                     calling_id=int(key),
@@ -71,7 +72,9 @@ class BrandmeisterSpecialContactGenerator:
             ]
             output = [
                 Contact(
-                    internal_id=sequence.next(),
+                    internal_id=sequence.next(
+                        contact_key(ContactType.PrivateCall, d[1])
+                    ),
                     name=d[0],
                     type=ContactType.PrivateCall,
                     calling_id=d[1],
@@ -85,7 +88,7 @@ class BrandmeisterSpecialContactGenerator:
             ]
             output += [
                 Contact(
-                    internal_id=sequence.next(),
+                    internal_id=sequence.next(contact_key(ContactType.GroupCall, d[1])),
                     name=d[0],
                     type=ContactType.GroupCall,
                     calling_id=d[1],
@@ -117,7 +120,7 @@ class APRSDigitalContactGenerator:
         if self._contacts == []:
             self._contacts = [
                 Contact(
-                    internal_id=seq.next(),
+                    internal_id=seq.next(contact_key(ContactType.PrivateCall, 262999)),
                     name="DMR APRS",
                     type=ContactType.PrivateCall,
                     calling_id=262999,
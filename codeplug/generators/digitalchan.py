@@ -1,8 +1,5 @@
-import json
-
-import maidenhead as mh
-
-from models import DigitalChannel, TxPower, DigitalAnytoneExtensions
+from models import DigitalChannel, TxPower, DigitalAnytoneExtensions, RepeaterSite
+from generators import channel_key
 from datasources import brandmeister
 
 
@@ -59,52 +56,44 @@ class HotspotDigitalChannelGenerator:
         for slot in [1, 2]:
             self._channels.append(
                 DigitalChannel(
-                    internal_id=sequence.next(),
+                    internal_id=sequence.next(channel_key("HS", self.f, slot)),
                     name=f"HS TS{slot}",
-                    rx_freq=self.f,
-                    tx_freq=self.f,
                     tx_power=TxPower.Low,
                     scanlist_id="-",
                     tot=None,
                     rx_only=False,
                     admit_crit="Free",
-                    color=self.color,
                     slot=slot,
                     rx_grouplist_id=None,
                     tx_contact_id=self.default_contact_id,
                     aprs=self.aprs_config,
                     anytone=DEFAULT_ANYTONE_EXTENSIONS,
-                    _lat=None,
-                    _lng=None,
-                    _locator=None,
-                    _rpt_callsign=None,
-                    _qth=None,
+                    site=RepeaterSite.shared(
+                        rx_freq=self.f, tx_freq=self.f, color=self.color
+                    ),
                 )
             )
 
         for tg in self.talkgroups:
             self._channels.append(
                 DigitalChannel(
-                    internal_id=sequence.next(),
+                    internal_id=sequence.next(
+                        channel_key("HS", self.f, self.ts, tg.calling_id)
+                    ),
                     name=hotspot_channel_label(tg),
-                    rx_freq=self.f,
-                    tx_freq=self.f,
                     tx_power=TxPower.Low,
                     scanlist_id="-",
                     tot=None,
                     rx_only=False,
                     admit_crit="Free",
-                    color=self.color,
                     slot=self.ts,
                     rx_grouplist_id=None,
                     tx_contact_id=tg.internal_id,
                     aprs=self.aprs_config,
                     anytone=DEFAULT_ANYTONE_EXTENSIONS,
-                    _lat=None,
-                    _lng=None,
-                    _locator=None,
-                    _rpt_callsign=None,
-                    _qth=None,
+                    site=RepeaterSite.shared(
+                        rx_freq=self.f, tx_freq=self.f, color=self.color
+                    ),
                 )
             )
 
@@ -119,8 +108,11 @@ class DigitalChannelGeneratorFromBrandmeister:
         callsign_matcher=None,
         filter_chain=None,
         debug=False,
+        records=None,
     ):
-        self.devices = brandmeister.DeviceDB().devices
+        if records is None:
+            records = brandmeister.DeviceDB().records()
+        self.records = records
         self._channels = []
         self.talkgroups = talkgroups
         self.aprs_config = aprs_config
@@ -145,7 +137,7 @@ class DigitalChannelGeneratorFromBrandmeister:
         DigitalChannel objects for both talkgroup-specific channels and generic timeslot channels.
 
         Process Overview:
-        1. Iterates through all devices in the Brandmeister device database
+        1. Iterates through all repeater records from the Brandmeister device database
         2. Filters devices based on callsign_matcher if provided (used to limit channels to specific regions/repeaters)
         3. Skips hotspots (identified by: rx frequency == tx frequency, pep == 1, or statusText == "DMO")
         4. For each repeater device, queries Brandmeister API for static talkgroups configured on that repeater
@@ -171,73 +163,49 @@ class DigitalChannelGeneratorFromBrandmeister:
         - RX frequency: Set to repeater's TX frequency (what the repeater transmits)
         - TX frequency: Set to repeater's RX frequency (what the repeater receives)
         - Color code: Obtained from repeater's configuration
-        - Geographic data: Latitude, longitude, maidenhead locator, and QTH extracted from repeater info
-        - Handles None values gracefully for missing lat/lng coordinates
+        - Geographic data: Latitude, longitude, maidenhead locator, and QTH from the record
         - Power: Set to High for all repeater channels
         - APRS: Uses the aprs_config provided to the generator
 
+        Frequencies, coordinates, locator and hotspot detection come pre-parsed
+        from the normalized RepeaterRecords (see datasources.records).
+
+        All channels of a repeater share one RepeaterSite. When every filter in
+        the chain only looks at repeater data (FilterChain.per_site), the chain
+        is evaluated once per site, before the repeater's talkgroups are even
+        queried, instead of once per channel.
+
         Parameters:
         - sequence: A sequence generator providing unique internal IDs for each channel
 
         Side Effects:
         - Populates self._channels list with generated DigitalChannel objects
-        - Each channel receives a sequential internal_id from the provided sequence
+        - Each channel receives an internal_id from the provided sequence
         """
-        for dev in self.devices:
-            if self.callsign_matcher and not self.callsign_matcher.matches(
-                dev["callsign"]
-            ):
-                continue
-
-            if dev["rx"] == dev["tx"] or dev["pep"] == 1 or dev["statusText"] == "DMO":
-                # Hotspot
-                continue
-
-            for tg_id, slot in brandmeister.TalkgroupAPI().static_talkgroups(dev["id"]):
+        talkgroup_api = brandmeister.TalkgroupAPI()
+        if self.filter_chain and self.filter_chain.per_site:
+            per_channel_filter = None  # Already applied by queried_sites()
+        else:
+            per_channel_filter = self.filter_chain
+
+        for site in self.queried_sites():
+            for tg_id, slot in talkgroup_api.static_talkgroups(site.source_id):
                 if slot == 0:
                     continue
                 for tg in self.talkgroups:
                     if tg.calling_id == tg_id:
                         # We were passed a TG definition
 
-                        name = channel_label(dev["callsign"], tg)
-
-                        # Handle None values for lat/lng
-                        lat = float(dev["lat"]) if dev["lat"] is not None else None
-                        lng = float(dev["lng"]) if dev["lng"] is not None else None
-                        locator = (
-                            mh.to_maiden(dev["lat"], dev["lng"], 3)
-                            if lat is not None and lng is not None
-                            else None
-                        )
+                        name = channel_label(site.callsign, tg)
 
                         # Create channel without ID first for filtering
-                        channel = DigitalChannel(
-                            internal_id=None,  # Will be assigned after filtering
-                            name=name,
-                            rx_freq=float(dev["tx"]),
-                            tx_freq=float(dev["rx"]),
-                            tx_power=TxPower.High,
-                            scanlist_id="-",
-                            tot=None,
-                            rx_only=False,
-                            admit_crit="Free",
-                            color=dev["colorcode"],
-                            slot=slot,
-                            rx_grouplist_id=None,
-                            tx_contact_id=str(tg.internal_id),
-                            aprs=self.aprs_config,
-                            anytone=DEFAULT_ANYTONE_EXTENSIONS,
-                            _lat=lat,
-                            _lng=lng,
-                            _locator=locator,
-                            _rpt_callsign=dev["callsign"],
-                            _qth=dev["city"],
+                        channel = self._channel(
+                            site, name, slot, tx_contact_id=str(tg.internal_id)
                         )
 
-                        # Apply filter chain if provided
-                        if self.filter_chain:
-                            should_include, reason = self.filter_chain.should_include(
+                        # Apply filter chain if not already applied to the site
+                        if per_channel_filter:
+                            should_include, reason = per_channel_filter.should_include(
                                 channel
                             )
                             if not should_include:
@@ -248,53 +216,29 @@ class DigitalChannelGeneratorFromBrandmeister:
                                 continue
 
                         # Assign ID and add to channels list
-                        channel.internal_id = sequence.next()
+                        channel.internal_id = sequence.next(
+                            channel_key(
+                                site.callsign, site.rx_freq, slot, tg.calling_id
+                            )
+                        )
                         self._channels.append(channel)
 
             for slot in [1, 2]:
                 name = " ".join(
                     [
-                        dev["callsign"],
+                        site.callsign,
                         f"TS{slot}",
                     ]
                 )
 
-                # Handle None values for lat/lng
-                lat = float(dev["lat"]) if dev["lat"] is not None else None
-                lng = float(dev["lng"]) if dev["lng"] is not None else None
-                locator = (
-                    mh.to_maiden(dev["lat"], dev["lng"], 3)
-                    if lat is not None and lng is not None
-                    else None
-                )
-
                 # Create channel without ID first for filtering
-                channel = DigitalChannel(
-                    internal_id=None,  # Will be assigned after filtering
-                    name=name,
-                    rx_freq=float(dev["tx"]),
-                    tx_freq=float(dev["rx"]),
-                    tx_power=TxPower.High,
-                    scanlist_id="-",
-                    tot=None,
-                    rx_only=False,
-                    admit_crit="Free",
-                    color=dev["colorcode"],
-                    slot=slot,
-                    rx_grouplist_id=None,
-                    tx_contact_id=self.default_contact_id,
-                    aprs=self.aprs_config,
-                    anytone=DEFAULT_ANYTONE_EXTENSIONS,
-                    _lat=lat,
-                    _lng=lng,
-                    _locator=locator,
-                    _rpt_callsign=dev["callsign"],
-                    _qth=dev["city"],
+                channel = self._channel(
+                    site, name, slot, tx_contact_id=self.default_contact_id
                 )
 
-                # Apply filter chain if provided
-                if self.filter_chain:
-                    should_include, reason = self.filter_chain.should_include(channel)
+                # Apply filter chain if not already applied to the site
+                if per_channel_filter:
+                    should_include, reason = per_channel_filter.should_include(channel)
                     if not should_include:
                         if self.debug:
                             print(
@@ -303,9 +247,54 @@ class DigitalChannelGeneratorFromBrandmeister:
                         continue
 
                 # Assign ID and add to channels list
-                channel.internal_id = sequence.next()
+                channel.internal_id = sequence.next(
+                    channel_key(site.callsign, site.rx_freq, slot)
+                )
                 self._channels.append(channel)
 
+    def queried_sites(self):
+        """
+        Sites of the repeaters whose static talkgroups generate_channels() reads:
+        callsign matched, not a hotspot, and passing the filter chain when it
+        is per-site. Recipes plan their prefetches from this as well.
+        """
+        for rec in self.records:
+            if self.callsign_matcher and not self.callsign_matcher.matches(
+                rec.callsign
+            ):
+                continue
+
+            if rec.hotspot:
+                continue
+
+            site = RepeaterSite.from_record(rec)
+            if self.filter_chain and self.filter_chain.per_site:
+                should_include, reason = self.filter_chain.should_include(site)
+                if not should_include:
+                    if self.debug:
+                        print(
+                            f"[DigitalChannelGeneratorFromBrandmeister] Filtered out: {rec.callsign} - {reason}"
+                        )
+                    continue
+            yield site
+
+    def _channel(self, site, name, slot, *, tx_contact_id):
+        return DigitalChannel(
+            internal_id=None,  # Will be assigned after filtering
+            name=name,
+            tx_power=TxPower.High,
+            scanlist_id="-",
+            tot=None,
+            rx_only=False,
+            admit_crit="Free",
+            slot=slot,
+            rx_grouplist_id=None,
+            tx_contact_id=tx_contact_id,
+            aprs=self.aprs_config,
+            anytone=DEFAULT_ANYTONE_EXTENSIONS,
+            site=site,
+        )
+
 
 class DigitalPMR446ChannelGenerator:
     def __init__(self):
@@ -318,25 +307,22 @@ class DigitalPMR446ChannelGenerator:
             name = f"dPMR {channum}"
             self._channels.append(
                 DigitalChannel(
-                    internal_id=seq.next(),
+                    internal_id=seq.next(channel_key(name, chan_freq)),
                     name=name,
-                    rx_freq=chan_freq,
-                    tx_freq=chan_freq,
                     tx_power=TxPower.Low,
                     scanlist_id="-",
                     tot=None,
                     rx_only=False,
                     admit_crit="Free",
-                    color=int(64 * (chan_freq % 0.4)),  # per TS 102 658
                     slot=2,
                     rx_grouplist_id=None,
                     tx_contact_id=None,
                     anytone=DEFAULT_ANYTONE_EXTENSIONS,
-                    _lat=None,
-                    _lng=None,
-                    _locator=None,
-                    _rpt_callsign=None,
-                    _qth=None,
+                    site=RepeaterSite.shared(
+                        rx_freq=chan_freq,
+                        tx_freq=chan_freq,
+                        color=int(64 * (chan_freq % 0.4)),  # per TS 102 658
+                    ),
                 )
             )
         return self._channels
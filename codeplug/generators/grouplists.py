@@ -14,5 +14,5 @@ class CountryGroupListGenerator:
             if str(contact.calling_id).startswith(self._country_id)
         ]
         yield GroupList(
-            internal_id=sequence.next(), name="Poland", contact_ids=matching_ids
+            internal_id=sequence.next("Poland"), name="Poland", contact_ids=matching_ids
         )
@@ -219,7 +219,11 @@ class LocationClusterZoneGenerator:
             channel_ids = [chan.internal_id for chan in cluster]
             zone_name = self._generate_zone_name(cluster)
             zones.append(
-                Zone(internal_id=sequence.next(), name=zone_name, channels=channel_ids)
+                Zone(
+                    internal_id=sequence.next(zone_name),
+                    name=zone_name,
+                    channels=channel_ids,
+                )
             )
 
         # Sort zones by name for consistent output
@@ -309,7 +313,7 @@ class DistanceBandedZoneGenerator:
                 zone_name = f"{band_name} ({len(channel_ids)} repeaters)"
                 zones.append(
                     Zone(
-                        internal_id=sequence.next(),
+                        internal_id=sequence.next(band_name),
                         name=zone_name,
                         channels=channel_ids,
                     )
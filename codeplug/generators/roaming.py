@@ -2,12 +2,15 @@ import re
 from collections import defaultdict
 
 from models import DigitalRoamingChannel, DigitalRoamingZone
+from generators import channel_key
 from datasources import brandmeister
 
 
 class RoamingChannelGeneratorFromBrandmeister:
-    def __init__(self, talkgroups):
-        self.devices = brandmeister.DeviceDB().devices_recently_active()
+    def __init__(self, talkgroups, records=None):
+        if records is None:
+            records = brandmeister.DeviceDB().records_recently_active()
+        self.records = records
         self._channels = []
         self.talkgroups = talkgroups
 
@@ -16,29 +19,40 @@ class RoamingChannelGeneratorFromBrandmeister:
             self.generate_channels(sequence)
         return self._channels
 
-    def generate_channels(self, sequence):
-        for dev in self.devices:
-            if not dev["callsign"].startswith("SR"):
+    def queried_records(self):
+        """
+        Records of the repeaters whose static talkgroups generate_channels()
+        reads. Recipes plan their prefetches from this as well.
+        """
+        for rec in self.records:
+            if not rec.callsign.startswith("SR"):
                 continue
 
-            if dev["rx"] == dev["tx"] or dev["pep"] == 1 or dev["statusText"] == "DMO":
-                # Hotspot
+            if rec.hotspot:
                 continue
 
+            yield rec
+
+    def generate_channels(self, sequence):
+        talkgroup_api = brandmeister.TalkgroupAPI()
+        for rec in self.queried_records():
             generated = set()
-            for _, slot in brandmeister.TalkgroupAPI().static_talkgroups(dev["id"]):
+            for _, slot in talkgroup_api.static_talkgroups(rec.source_id):
                 if slot == 0:
                     continue
-                channel_name = f'{dev["callsign"]} TS{slot}'
+                channel_name = f"{rec.callsign} TS{slot}"
                 if channel_name in generated:
                     continue
+                # Roaming channels are written from the repeater's point of view
                 self._channels.append(
                     DigitalRoamingChannel(
-                        internal_id=sequence.next(),
+                        internal_id=sequence.next(
+                            channel_key(rec.callsign, rec.rx_freq, slot)
+                        ),
                         name=channel_name,
-                        tx_freq=float(dev["tx"]),
-                        rx_freq=float(dev["rx"]),
-                        color=dev["colorcode"],
+                        tx_freq=rec.rx_freq,
+                        rx_freq=rec.tx_freq,
+                        color=rec.color_code,
                         slot=slot,
                     )
                 )
@@ -54,14 +68,15 @@ class RoamingZoneFromCallsignGenerator:
         for chan in self._channels:
             if m := re.match("^([A-Z]{2}[0-9])", chan.name):
                 prefix = m.groups()[0]
-                prefix_to_channels[prefix] += [chan.internal_id]
+                prefix_to_channels[prefix] += [(chan.name, chan.internal_id)]
 
         output = []
         for key in sorted(prefix_to_channels.keys()):
-            value = sorted(prefix_to_channels[key])
+            # Order members by name: with stable IDs the ID order is arbitrary
+            value = [id for _, id in sorted(prefix_to_channels[key])]
             output.append(
                 DigitalRoamingZone(
-                    internal_id=sequence.next(), name=key, channels=value
+                    internal_id=sequence.next(key), name=key, channels=value
                 )
             )
         return output
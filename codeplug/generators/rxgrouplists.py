@@ -10,7 +10,7 @@ class RXGroupListGenerator:
     According to the qdmr manual, a group list collects several digital (DMR) contacts
     that should be received on a channel. This generator:
 
-    1. Groups channels by repeater callsign
+    1. Groups channels by repeater, i.e. by their shared RepeaterSite
     2. For each repeater, fetches all static talkgroups configured on it from Brandmeister API
     3. Creates an RXGroupList containing all available contacts/TGs for that repeater
     4. Updates channels to reference the appropriate RXGroupList
@@ -30,7 +30,7 @@ class RXGroupListGenerator:
         self._channels = channels
         self._contacts = contacts
         self._grouplists = []
-        self._repeater_to_grouplist = {}  # Maps repeater callsign to grouplist_id
+        self._repeater_to_grouplist = {}  # Maps repeater to grouplist_id
 
         # Create a mapping from calling_id to contact internal_id for quick lookup
         self._calling_id_to_contact = {
@@ -50,24 +50,31 @@ class RXGroupListGenerator:
         if len(self._grouplists) > 0:
             return self._grouplists
 
-        # Group channels by repeater callsign
+        # Group channels by repeater. Channels of one repeater share a site, so
+        # repeaters with the same callsign (e.g. one per band) stay apart.
         repeater_channels = defaultdict(list)
         for channel in self._channels:
             # Skip hotspot channels and channels without a repeater callsign
             if channel._rpt_callsign and not channel.name.startswith("HS"):
-                repeater_channels[channel._rpt_callsign].append(channel)
+                repeater_channels[channel.site].append(channel)
 
-        # Get Brandmeister device database
-        device_db = brandmeister.DeviceDB()
+        names = self._names(repeater_channels)
         talkgroup_api = brandmeister.TalkgroupAPI()
-
-        # Create a mapping from callsign to device ID
-        callsign_to_device = {dev["callsign"]: dev["id"] for dev in device_db.devices}
+        callsign_to_device = None
 
         # For each repeater, create an RXGroupList
-        for repeater_callsign, channels in repeater_channels.items():
-            # Get the device ID for this repeater
-            device_id = callsign_to_device.get(repeater_callsign)
+        for repeater, channels in repeater_channels.items():
+            repeater_callsign = repeater.callsign
+
+            # Get the device ID for this repeater; Brandmeister sites carry it
+            device_id = repeater.source_id
+            if device_id is None:
+                if callsign_to_device is None:
+                    callsign_to_device = {
+                        rec.callsign: rec.source_id
+                        for rec in brandmeister.DeviceDB().records()
+                    }
+                device_id = callsign_to_device.get(repeater_callsign)
             if not device_id:
                 # Skip if we can't find the device
                 continue
@@ -96,14 +103,15 @@ class RXGroupListGenerator:
 
             # Only create a grouplist if we have contacts
             if contact_ids:
-                grouplist_id = sequence.next()
+                name = names[repeater]
+                grouplist_id = sequence.next(name)
                 grouplist = GroupList(
                     internal_id=grouplist_id,
-                    name=f"RX {repeater_callsign}",
+                    name=name,
                     contact_ids=contact_ids,
                 )
                 self._grouplists.append(grouplist)
-                self._repeater_to_grouplist[repeater_callsign] = grouplist_id
+                self._repeater_to_grouplist[repeater] = grouplist_id
 
                 # Update all channels for this repeater with the grouplist_id
                 for channel in channels:
@@ -111,6 +119,34 @@ class RXGroupListGenerator:
 
         return self._grouplists
 
+    @staticmethod
+    def _names(repeater_channels):
+        """
+        Group list name of each repeater, "RX <callsign>". Repeaters sharing a
+        callsign get their band appended, or their frequency if that is
+        shared too.
+        """
+        by_callsign = defaultdict(list)
+        for repeater, channels in repeater_channels.items():
+            by_callsign[repeater.callsign].append((repeater, channels[0]))
+
+        names = {}
+        for callsign, repeaters in by_callsign.items():
+            bands = []
+            for _, channel in repeaters:
+                try:
+                    bands.append(channel.band().value)
+                except ValueError:
+                    bands.append(None)
+            for (repeater, channel), band in zip(repeaters, bands):
+                if len(repeaters) == 1:
+                    names[repeater] = f"RX {callsign}"
+                elif band and bands.count(band) == 1:
+                    names[repeater] = f"RX {callsign} {band}"
+                else:
+                    names[repeater] = f"RX {callsign} {channel.rx_freq:g}"
+        return names
+
 
 class HotspotRXGroupListGenerator:
     """
@@ -157,7 +193,7 @@ class HotspotRXGroupListGenerator:
         contact_ids = contact_ids[:64]
 
         if contact_ids:
-            grouplist_id = sequence.next()
+            grouplist_id = sequence.next("RX Hotspot")
             grouplist = GroupList(
                 internal_id=grouplist_id, name="RX Hotspot", contact_ids=contact_ids
             )
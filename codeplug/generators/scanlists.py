@@ -19,7 +19,7 @@ class ScanListGenerator:
 
         channel_ids = [ch.internal_id for ch in self.channels]
         scanlist = ScanList(
-            internal_id=seq.next(), name=self.name, channels=channel_ids
+            internal_id=seq.next(self.name), name=self.name, channels=channel_ids
         )
         return [scanlist]
 
@@ -45,19 +45,22 @@ class CallsignPrefixAnalogScanListGenerator:
 
     def scanlists(self, seq: Sequence) -> List[ScanList]:
         grouped = defaultdict(list)
+        prefixes = {}  # By site, shared by a repeater's channels
         for chan in self.analog_channels:
-            prefix = self.callsign_prefix(chan._rpt_callsign)
+            if chan.site not in prefixes:
+                prefixes[chan.site] = self.callsign_prefix(chan._rpt_callsign)
+            prefix = prefixes[chan.site]
             if not prefix:
                 continue
-            grouped[prefix].append(chan)
+            grouped[prefix].append((chan.name, chan.internal_id))
 
         output = []
         for prefix in sorted(grouped.keys()):
-            channels = sorted(grouped[prefix], key=lambda ch: ch.name)
-            channel_ids = [ch.internal_id for ch in channels]
+            members = sorted(grouped[prefix], key=lambda member: member[0])
+            channel_ids = [cid for _, cid in members]
             name = f"{prefix} {self.suffix}"
             output.append(
-                ScanList(internal_id=seq.next(), name=name, channels=channel_ids)
+                ScanList(internal_id=seq.next(name), name=name, channels=channel_ids)
             )
 
         return output[:250]
@@ -91,19 +94,22 @@ class CallsignPrefixDigitalScanListGenerator:
 
     def scanlists(self, seq: Sequence) -> List[ScanList]:
         grouped = defaultdict(list)
+        prefixes = {}  # By site, shared by a repeater's channels
         for chan in self.digital_channels:
-            prefix = self.callsign_prefix(chan._rpt_callsign)
+            if chan.site not in prefixes:
+                prefixes[chan.site] = self.callsign_prefix(chan._rpt_callsign)
+            prefix = prefixes[chan.site]
             if not prefix:
                 continue
-            grouped[prefix].append(chan)
+            grouped[prefix].append((chan.name, chan.internal_id))
 
         output = []
         for prefix in sorted(grouped.keys()):
-            channels = sorted(grouped[prefix], key=lambda ch: ch.name)
-            channel_ids = [ch.internal_id for ch in channels]
+            members = sorted(grouped[prefix], key=lambda member: member[0])
+            channel_ids = [cid for _, cid in members]
             name = f"{prefix} {self.suffix}"
             output.append(
-                ScanList(internal_id=seq.next(), name=name, channels=channel_ids)
+                ScanList(internal_id=seq.next(name), name=name, channels=channel_ids)
             )
 
         return output[:250]
@@ -137,7 +143,7 @@ class StateScanListGenerator:
         if self.analog_channels:
             analog_channel_ids = [ch.internal_id for ch in self.analog_channels]
             analog_scanlist = ScanList(
-                internal_id=seq.next(),
+                internal_id=seq.next(f"{self.state_code} Analog"),
                 name=f"{self.state_code} Analog",
                 channels=analog_channel_ids,
             )
@@ -147,7 +153,7 @@ class StateScanListGenerator:
         if self.digital_channels:
             digital_channel_ids = [ch.internal_id for ch in self.digital_channels]
             digital_scanlist = ScanList(
-                internal_id=seq.next(),
+                internal_id=seq.next(f"{self.state_code} Digital"),
                 name=f"{self.state_code} Digital",
                 channels=digital_channel_ids,
             )
@@ -8,6 +8,36 @@ from models import Zone, DigitalChannel, is_hotspot, AnalogChannel
 from .location_zones import LocationClusterZoneGenerator, DistanceBandedZoneGenerator
 
 
+def _filtered(channels, filter_chain, debug, label):
+    """
+    Channels passing filter_chain (all if None), as a one-pass iterator.
+
+    A per-site chain is evaluated once per RepeaterSite; the verdict is
+    reused for every other channel of that site.
+    """
+    verdicts = {}
+    per_site = filter_chain and filter_chain.per_site
+    for chan in channels:
+        if filter_chain:
+            site = getattr(chan, "site", None) if per_site else None
+            if site is None:
+                should_include, reason = filter_chain.should_include(chan)
+            else:
+                if site not in verdicts:
+                    verdicts[site] = filter_chain.should_include(site)
+                should_include, reason = verdicts[site]
+            if not should_include:
+                if debug:
+                    print(f"[{label}] Filtered out channel: {chan.name} - {reason}")
+                continue
+        yield chan
+
+
+def _by_name(members):
+    # members are (name, internal_id, ...) tuples; equal names keep their order
+    return sorted(members, key=lambda member: member[0])
+
+
 class ZoneFromLocatorGenerator:
     def __init__(self, channels, filter_chain=None, debug=False):
         self.channels = channels
@@ -17,18 +47,9 @@ class ZoneFromLocatorGenerator:
     def zones(self, seq):
         locators_to_channels = defaultdict(lambda: [])
 
-        # Pre-filter channels if filter chain is provided
-        filtered_channels = self.channels
-        if self.filter_chain:
-            filtered_channels = []
-            for chan in self.channels:
-                should_include, reason = self.filter_chain.should_include(chan)
-                if should_include:
-                    filtered_channels.append(chan)
-                elif self.debug:
-                    print(
-                        f"[ZoneFromLocatorGenerator] Filtered out channel: {chan.name} - {reason}"
-                    )
+        filtered_channels = _filtered(
+            self.channels, self.filter_chain, self.debug, "ZoneFromLocatorGenerator"
+        )
 
         for chan in filtered_channels:
             if chan.locator is None:
@@ -40,17 +61,19 @@ class ZoneFromLocatorGenerator:
             else:
                 locator_label = f"Analog {locator}"
 
+            # Only compact (name, ID) keys are held until every channel is seen
             if chan.locator == "":
-                locators_to_channels["No locator"] += [chan]
+                locators_to_channels["No locator"] += [(chan.name, chan.internal_id)]
             else:
-                locators_to_channels[locator_label] += [chan]
+                locators_to_channels[locator_label] += [(chan.name, chan.internal_id)]
 
         output = []
 
         for key in sorted(locators_to_channels.keys()):
-            channels = sorted(locators_to_channels[key], key=lambda chan: chan.name)
-            channel_ids = [chan.internal_id for chan in channels]
-            output.append(Zone(internal_id=seq.next(), name=key, channels=channel_ids))
+            channel_ids = [cid for _, cid in _by_name(locators_to_channels[key])]
+            output.append(
+                Zone(internal_id=seq.next(key), name=key, channels=channel_ids)
+            )
 
         return output[:250]
 
@@ -64,18 +87,9 @@ class ZoneFromCallsignGenerator:
     def zones(self, seq):
         prefix_to_channels = defaultdict(lambda: [])
 
-        # Pre-filter channels if filter chain is provided
-        filtered_channels = self.channels
-        if self.filter_chain:
-            filtered_channels = []
-            for chan in self.channels:
-                should_include, reason = self.filter_chain.should_include(chan)
-                if should_include:
-                    filtered_channels.append(chan)
-                elif self.debug:
-                    print(
-                        f"[ZoneFromCallsignGenerator] Filtered out channel: {chan.name} - {reason}"
-                    )
+        filtered_channels = _filtered(
+            self.channels, self.filter_chain, self.debug, "ZoneFromCallsignGenerator"
+        )
 
         for chan in filtered_channels:
             if m := re.match("^([A-Z]{2}[0-9])", chan._rpt_callsign):
@@ -84,13 +98,14 @@ class ZoneFromCallsignGenerator:
                     label = f"{prefix} Digital"
                 else:
                     label = f"{prefix} Analog"
-                prefix_to_channels[label] += [chan]
+                prefix_to_channels[label] += [(chan.name, chan.internal_id)]
 
         output = []
         for key in sorted(prefix_to_channels.keys()):
-            channels = sorted(prefix_to_channels[key], key=lambda chan: chan.name)
-            channel_ids = [chan.internal_id for chan in channels]
-            output.append(Zone(internal_id=seq.next(), name=key, channels=channel_ids))
+            channel_ids = [cid for _, cid in _by_name(prefix_to_channels[key])]
+            output.append(
+                Zone(internal_id=seq.next(key), name=key, channels=channel_ids)
+            )
         return output[:250]
 
 
@@ -105,34 +120,29 @@ class ZoneFromCallsignGenerator2:
     def zones(self, seq):
         callsign_to_channels = defaultdict(lambda: [])
 
-        # Pre-filter channels if filter chain is provided
-        filtered_channels = self.channels
-        if self.filter_chain:
-            filtered_channels = []
-            for chan in self.channels:
-                should_include, reason = self.filter_chain.should_include(chan)
-                if should_include:
-                    filtered_channels.append(chan)
-                elif self.debug:
-                    print(
-                        f"[ZoneFromCallsignGenerator2] Filtered out channel: {chan.name} - {reason}"
-                    )
+        filtered_channels = _filtered(
+            self.channels, self.filter_chain, self.debug, "ZoneFromCallsignGenerator2"
+        )
 
         for chan in filtered_channels:
             if chan._rpt_callsign is None:
                 continue
-            callsign_to_channels[chan._rpt_callsign].append(chan)
+            callsign_to_channels[chan._rpt_callsign].append(
+                (chan.name, chan.internal_id, chan._qth)
+            )
 
         output = []
 
         for key in sorted(callsign_to_channels.keys()):
-            channels = sorted(callsign_to_channels[key], key=lambda chan: chan.name)
-            channel_ids = [chan.internal_id for chan in channels]
+            members = _by_name(callsign_to_channels[key])
+            channel_ids = [cid for _, cid, _ in members]
             if self.with_qth:
-                name = f"{key} {channels[0]._qth}"
+                name = f"{key} {members[0][2]}"
             else:
                 name = key
-            output.append(Zone(internal_id=seq.next(), name=name, channels=channel_ids))
+            output.append(
+                Zone(internal_id=seq.next(name), name=name, channels=channel_ids)
+            )
         return output[:250]
 
 
@@ -143,7 +153,7 @@ class PMRZoneGenerator:
     def zones(self, seq):
         return [
             Zone(
-                internal_id=seq.next(),
+                internal_id=seq.next("PMR"),
                 name="PMR",
                 channels=[ch.internal_id for ch in self.channels],
             )
@@ -172,7 +182,11 @@ class AnalogZoneGenerator:
             analog_channels = analog_channels[:250]
 
         return [
-            Zone(internal_id=seq.next(), name=self.zone_name, channels=analog_channels),
+            Zone(
+                internal_id=seq.next(self.zone_name),
+                name=self.zone_name,
+                channels=analog_channels,
+            ),
         ][:250]
 
 
@@ -186,18 +200,9 @@ class AnalogZoneByBandGenerator:
     def zones(self, seq):
         zones = {}
 
-        # Pre-filter channels if filter chain is provided
-        filtered_channels = self.channels
-        if self.filter_chain:
-            filtered_channels = []
-            for chan in self.channels:
-                should_include, reason = self.filter_chain.should_include(chan)
-                if should_include:
-                    filtered_channels.append(chan)
-                elif self.debug:
-                    print(
-                        f"[AnalogZoneByBandGenerator] Filtered out channel: {chan.name} - {reason}"
-                    )
+        filtered_channels = _filtered(
+            self.channels, self.filter_chain, self.debug, "AnalogZoneByBandGenerator"
+        )
 
         for chan in filtered_channels:
             if isinstance(chan, AnalogChannel):
@@ -207,7 +212,7 @@ class AnalogZoneByBandGenerator:
 
         return [
             Zone(
-                internal_id=seq.next(),
+                internal_id=seq.next(f"{self.prefix} {band} Analog"),
                 name=f"{self.prefix} {band} Analog",
                 channels=channel_ids,
             )
@@ -226,5 +231,9 @@ class HotspotZoneGenerator:
                 hotspot_channels.append(chan.internal_id)
 
         return [
-            Zone(internal_id=seq.next(), name="Hotspot", channels=hotspot_channels)
+            Zone(
+                internal_id=seq.next("Hotspot"),
+                name="Hotspot",
+                channels=hotspot_channels,
+            )
         ][:250]
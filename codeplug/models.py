@@ -1,6 +1,7 @@
+import weakref
 from enum import Enum, StrEnum
 from typing import List, Optional, NewType, Union, Literal
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 # type definitions
 
@@ -93,12 +94,116 @@ class AnalogAnytoneExtensions(AnytoneExtensions):
     scrambler: Optional[bool]
 
 
+@dataclass(frozen=True)
+class RepeaterSite:
+    """
+    What all channels of one repeater share: frequencies, color code,
+    location and callsign. Generators create one site per repeater and every
+    channel of it refers to the same instance (see shared()). Channels read
+    these values through their site rather than holding copies, and filters
+    and grouping can work once per site instead of once per channel.
+
+    Channels that are no repeater's, like PMR or hotspot channels, have a
+    site with just their frequencies (and color code).
+
+    The _lat, _lng, _locator, _rpt_callsign and _qth properties mirror the
+    channel attributes, so filters written for channels apply to sites.
+    """
+
+    rx_freq: float
+    tx_freq: float
+    callsign: Optional[str] = None
+    color: Optional[int] = None
+    lat: Latitude = None
+    lng: Longitude = None
+    locator: Locator = None
+    qth: QTH = None
+    source_id: Optional[str] = None
+
+    # Live sites by value; a site is dropped once no channel refers to it
+    _interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def shared(cls, **fields):
+        site = cls(**fields)
+        return cls._interned.setdefault(site, site)
+
+    @classmethod
+    def from_record(cls, rec):
+        """The shared site of a datasources.records.RepeaterRecord"""
+        return cls.shared(
+            callsign=rec.callsign,
+            rx_freq=rec.rx_freq,
+            tx_freq=rec.tx_freq,
+            color=rec.color_code,
+            lat=rec.lat,
+            lng=rec.lng,
+            locator=rec.locator,
+            qth=rec.qth,
+            source_id=rec.source_id,
+        )
+
+    @property
+    def _lat(self):
+        return self.lat
+
+    @property
+    def _lng(self):
+        return self.lng
+
+    @property
+    def _locator(self):
+        return self.locator
+
+    @property
+    def _rpt_callsign(self):
+        return self.callsign
+
+    @property
+    def _qth(self):
+        return self.qth
+
+
+class SiteFields:
+    """Channel attributes read from the channel's RepeaterSite"""
+
+    @property
+    def rx_freq(self):
+        return self.site.rx_freq
+
+    @property
+    def tx_freq(self):
+        return self.site.tx_freq
+
+    @property
+    def _lat(self):
+        return self.site.lat
+
+    @property
+    def _lng(self):
+        return self.site.lng
+
+    @property
+    def _locator(self):
+        return self.site.locator
+
+    @property
+    def _rpt_callsign(self):
+        return self.site.callsign
+
+    @property
+    def _qth(self):
+        return self.site.qth
+
+
 @dataclass
 class Contact:
     internal_id: ContactID
     name: str
     type: ContactType
     calling_id: DMRID
+    # Generator that produced the item, see validators.tag_generator
+    _generator: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -106,6 +211,7 @@ class GroupList:
     internal_id: GroupListID
     name: str
     contact_ids: List[ContactID]
+    _generator: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -114,30 +220,31 @@ class DigitalAPRSConfig:
     name: str
     period: Period10s
     contact_id: ContactID
+    _generator: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
-class DigitalChannel:
+class DigitalChannel(SiteFields):
     internal_id: ChannelID
     name: str
-    rx_freq: float
-    tx_freq: float
     tx_power: TxPower
     scanlist_id: Optional[ScanListID]
     tot: TOT
     rx_only: bool
     admit_crit: DigitalAdmitCriteria
-    color: ColorCode
     slot: Slot
     rx_grouplist_id: Optional[GroupListID]
     tx_contact_id: Optional[ContactID]
     aprs: Optional[DigitalAPRSConfig]
     anytone: Optional[DigitalAnytoneExtensions]
-    _lat: Latitude
-    _lng: Longitude
-    _locator: Locator
-    _rpt_callsign: Optional[str]  # Optional repeater callsign, for zone grouping
-    _qth: QTH
+    # Repeater the channel belongs to, shared with its other channels; holds
+    # the frequencies, color code, location and repeater callsign
+    site: RepeaterSite
+    _generator: Optional[str] = field(default=None, repr=False, compare=False)
+
+    @property
+    def color(self):
+        return self.site.color
 
     def band(self) -> Band:
         if 136.0 <= self.rx_freq <= 174.0:
@@ -163,14 +270,13 @@ class AnalogAPRSConfig:
     icon: str
     period: Period10s
     message: str
+    _generator: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
-class AnalogChannel:
+class AnalogChannel(SiteFields):
     internal_id: ChannelID
     name: str
-    rx_freq: float
-    tx_freq: float
     tx_power: TxPower
     scanlist_id: Optional[ScanListID]
     tot: TOT
@@ -181,11 +287,8 @@ class AnalogChannel:
     tx_tone: Optional[float]
     width: ChannelWidth
     aprs: Optional[AnalogAPRSConfig]
-    _lat: Latitude
-    _lng: Longitude
-    _locator: Locator
-    _rpt_callsign: Optional[str]
-    _qth: Optional[str]
+    site: RepeaterSite
+    _generator: Optional[str] = field(default=None, repr=False, compare=False)
 
     def band(self) -> Band:
         if 136.0 <= self.rx_freq <= 174.0:
@@ -201,6 +304,7 @@ class Zone:
     internal_id: ZoneID
     name: str
     channels: List[ChannelID]
+    _generator: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -211,6 +315,7 @@ class DigitalRoamingChannel:
     rx_freq: float
     color: ColorCode
     slot: Slot
+    _generator: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -218,6 +323,7 @@ class DigitalRoamingZone:
     internal_id: ZoneID
     name: str
     channels: List[ChannelID]
+    _generator: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -225,3 +331,4 @@ class ScanList:
     internal_id: ScanListID
     name: str
     channels: List[ChannelID]
+    _generator: Optional[str] = field(default=None, repr=False, compare=False)
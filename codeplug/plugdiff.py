@@ -0,0 +1,222 @@
+"""
+Structural diff of two written codeplugs (plug-*.yaml).
+
+Internal IDs (ch<N>, contact<N>, ...) shift whenever something is added
+early in a generator's input, so entries are matched by stable keys instead:
+contacts by call type and number, group lists and zones by name, channels by
+name, frequency and, for DMR, color code, time slot and TG number. References
+between sections are resolved to those keys before entries are compared,
+so a renumbered but otherwise unchanged channel is not reported.
+
+Every section is indexed once, so a diff takes linear time in the plug size.
+
+Usage:
+    diff = diff_plugs(load_plug("old.yaml"), load_plug("new.yaml"))
+    print(diff.summary())
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import yaml
+
+SECTIONS = ("contacts", "groupLists", "channels", "zones")
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class PlugLoader(_Loader):
+    """
+    Safe loader which also reads values the writer dumped with Python tags,
+    e.g. enum members, as their plain value.
+    """
+
+
+def _construct_python_value(loader, suffix, node):
+    if isinstance(node, yaml.SequenceNode):
+        args = loader.construct_sequence(node, deep=True)
+        return args[0] if len(args) == 1 else args
+    if isinstance(node, yaml.MappingNode):
+        value = loader.construct_mapping(node, deep=True)
+        args = value.get("args")
+        return args[0] if args and len(args) == 1 else value
+    return loader.construct_scalar(node)
+
+
+PlugLoader.add_multi_constructor("tag:yaml.org,2002:python/", _construct_python_value)
+
+
+def load_plug(path):
+    with open(path, encoding="utf-8") as f:
+        return yaml.load(f, Loader=PlugLoader)
+
+
+@dataclass
+class SectionDiff:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    # (entry, [(field, old, new), ...])
+    modified: List[Tuple[str, List[Tuple[str, object, object]]]] = field(
+        default_factory=list
+    )
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+    def counts(self):
+        return f"+{len(self.added)} -{len(self.removed)} ~{len(self.modified)}"
+
+
+@dataclass
+class PlugDiff:
+    sections: Dict[str, SectionDiff]
+
+    def __bool__(self):
+        return any(self.sections.values())
+
+    def summary(self):
+        return "\n".join(
+            f"{name}: {section.counts()}" for name, section in self.sections.items()
+        )
+
+    def lines(self):
+        for name, section in self.sections.items():
+            if not section:
+                continue
+            yield f"{name}: {section.counts()}"
+            for entry in section.added:
+                yield f"  + {entry}"
+            for entry in section.removed:
+                yield f"  - {entry}"
+            for entry, changes in section.modified:
+                yield f"  ~ {entry}"
+                for field_name, old, new in changes:
+                    yield f"      {field_name}: {_describe_change(old, new)}"
+
+
+def _describe_change(old, new):
+    if (
+        isinstance(old, list)
+        and isinstance(new, list)
+        and all(isinstance(v, str) for v in old + new)
+    ):
+        # Members of zones and group lists: what came and went
+        new_set, old_set = set(new), set(old)
+        added = [v for v in new if v not in old_set]
+        removed = [v for v in old if v not in new_set]
+        if added or removed:
+            parts = [f"+{v}" for v in added] + [f"-{v}" for v in removed]
+            return ", ".join(parts)
+        return "reordered"
+    return f"{old!r} -> {new!r}"
+
+
+def _unwrap(entry):
+    # Channels and contacts are {"digital": {...}} / {"analog": {...}}
+    if len(entry) == 1:
+        kind, body = next(iter(entry.items()))
+        if isinstance(body, dict):
+            return kind, body
+    return None, entry
+
+
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}{key}.")
+    else:
+        yield prefix[:-1], value
+
+
+class _PlugIndex:
+    """One plug's sections keyed by stable keys, with references resolved"""
+
+    def __init__(self, plug):
+        self.labels = {}  # internal ID -> stable label
+
+        contacts = self._entries(plug, "contacts", self._contact_key)
+        grouplists = self._entries(plug, "groupLists", lambda kind, e: e["name"])
+        self.labels.update(
+            {
+                e["id"]: e.get("name", e["id"])
+                for section in ("scanLists", "positioning", "roamingZones")
+                for e in (_unwrap(x)[1] for x in plug.get(section) or [])
+            }
+        )
+        channels = self._entries(plug, "channels", self._channel_key)
+        zones = self._entries(plug, "zones", lambda kind, e: e["name"])
+
+        self.sections = {
+            "contacts": contacts,
+            "groupLists": grouplists,
+            "channels": channels,
+            "zones": zones,
+        }
+
+    def _contact_key(self, kind, entry):
+        return f"{entry.get('type')} {entry.get('number')}"
+
+    def _channel_key(self, kind, entry):
+        key = f"{kind} {entry.get('name')!r} {entry.get('rxFrequency')}"
+        if kind == "digital":
+            contact = self.labels.get(entry.get("contact"), entry.get("contact"))
+            key += (
+                f" CC{entry.get('colorCode')} {entry.get('timeSlot')}"
+                f" [{contact or '-'}]"
+            )
+        return key
+
+    def _entries(self, plug, section, key_func):
+        entries = {}
+        seen = Counter()
+        for raw in plug.get(section) or []:
+            kind, entry = _unwrap(raw)
+            key = key_func(kind, entry)
+            # Keep identical keys apart in file order
+            seen[key] += 1
+            if seen[key] > 1:
+                key = f"{key} #{seen[key]}"
+            self.labels[entry["id"]] = key
+            entries[key] = entry
+        return entries
+
+    def resolve(self, value):
+        if isinstance(value, list):
+            return [self.resolve(v) for v in value]
+        if isinstance(value, str):
+            return self.labels.get(value, value)
+        return value
+
+    def comparable(self, entry):
+        return {
+            name: self.resolve(value) for name, value in _flatten(entry) if name != "id"
+        }
+
+
+def _diff_section(old_index, new_index, section):
+    old, new = old_index.sections[section], new_index.sections[section]
+    diff = SectionDiff()
+    for key, entry in new.items():
+        if key not in old:
+            diff.added.append(key)
+            continue
+        before = old_index.comparable(old[key])
+        after = new_index.comparable(entry)
+        if before != after:
+            changes = [
+                (name, before.get(name), after.get(name))
+                for name in sorted(before.keys() | after.keys())
+                if before.get(name) != after.get(name)
+            ]
+            diff.modified.append((key, changes))
+    diff.removed = [key for key in old if key not in new]
+    return diff
+
+
+def diff_plugs(old, new):
+    """Compare two loaded plugs (see load_plug) section by section"""
+    old_index, new_index = _PlugIndex(old), _PlugIndex(new)
+    return PlugDiff(
+        {section: _diff_section(old_index, new_index, section) for section in SECTIONS}
+    )
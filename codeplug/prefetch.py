@@ -0,0 +1,98 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from datasources.resources import Resource
+
+
+@dataclass
+class PrefetchReport:
+    cached: List[Resource] = field(default_factory=list)
+    fetched: List[Resource] = field(default_factory=list)
+    failed: List[Tuple[Resource, Exception]] = field(default_factory=list)
+
+    def summary(self):
+        return (
+            f"{len(self.fetched)} fetched, {len(self.cached)} already cached, "
+            f"{len(self.failed)} failed"
+        )
+
+
+class ProgressPrinter:
+    """Single-line progress with an ETA extrapolated from the fetches so far"""
+
+    def __init__(self, out=sys.stderr):
+        self.out = out
+
+    def __call__(self, done, total, elapsed, resource):
+        eta = elapsed / done * (total - done) if done else 0
+        self.out.write(
+            f"\r[{done}/{total}] {done * 100 // total}% "
+            f"ETA {int(eta) // 60}m{int(eta) % 60:02d}s  {resource}"[:120].ljust(120)
+        )
+        if done == total:
+            self.out.write("\n")
+        self.out.flush()
+
+
+class Prefetcher:
+    """
+    Warm the caches a recipe reads from, before it is run.
+
+    A recipe's data_plan() yields phases, each a list of Resources. Resources
+    of one phase are downloaded in parallel; the next phase is only planned
+    afterwards, so it can depend on data fetched earlier (the talkgroups to
+    fetch depend on the device list, for instance).
+
+    Usage:
+        report = Prefetcher(max_workers=8).run(recipe.data_plan())
+    """
+
+    def __init__(self, max_workers=8, progress=None, force=False):
+        """
+        Args:
+            max_workers: Number of parallel downloads
+            progress: Optional callable(done, total, elapsed_seconds, resource)
+            force: Fetch resources even if they are cached
+        """
+        self.max_workers = max_workers
+        self.progress = progress
+        self.force = force
+
+    def run(self, plan):
+        report = PrefetchReport()
+        seen = set()
+        for phase in plan:
+            pending = []
+            for resource in phase:
+                if resource in seen:
+                    continue
+                seen.add(resource)
+                if not self.force and resource.is_cached():
+                    report.cached.append(resource)
+                else:
+                    pending.append(resource)
+            self._fetch(pending, report)
+        return report
+
+    def _fetch(self, resources, report):
+        if not resources:
+            return
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(resource.fetch): resource for resource in resources
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                resource = futures[future]
+                try:
+                    future.result()
+                    report.fetched.append(resource)
+                except Exception as e:
+                    report.failed.append((resource, e))
+                if self.progress:
+                    self.progress(
+                        done, len(resources), time.monotonic() - started, resource
+                    )
@@ -0,0 +1,119 @@
+from typing import Iterable, List, Optional
+
+from models import Contact, ContactID
+
+
+def contact_ref(value) -> Optional[ContactID]:
+    """
+    Normalise a contact reference as stored on a channel or APRS config.
+
+    Generators are not consistent here: some store the contact's internal ID as an
+    int, some as a string, and "-" or None mean "no contact".
+    """
+    if value is None or value == "-" or value == "":
+        return None
+    return int(value)
+
+
+class ContactPruner:
+    """
+    Drop contacts which nothing in the codeplug refers to.
+
+    A contact is reachable when it is the TX contact of a digital channel (this
+    covers hotspot channels too), a member of a group list, or the destination of a
+    digital APRS configuration. Contacts whose DMR number is on the allow-list are
+    kept regardless. Surviving contacts are renumbered 1..N and every reference is
+    rewritten to match.
+
+    Usage:
+        contacts = ContactPruner(allowlist=[9990]).prune(
+            contacts,
+            channels=digital_channels,
+            grouplists=grouplists,
+            aprs_configs=[digital_aprs_config],
+        )
+    """
+
+    def __init__(self, allowlist: Iterable[int] = (), renumber=True, debug=False):
+        """
+        Initialize the contact pruner.
+
+        Args:
+            allowlist: DMR numbers (calling IDs) to keep even if unreferenced
+            renumber: If True, reassign contiguous internal IDs to kept contacts
+            debug: If True, print a summary of what was pruned
+        """
+        self.allowlist = {int(number) for number in allowlist}
+        self.renumber = renumber
+        self.debug = debug
+
+    def referenced_ids(self, channels=(), grouplists=(), aprs_configs=()):
+        """Return the set of contact internal IDs reachable from the given sections."""
+        referenced = set()
+        for chan in channels:
+            ref = contact_ref(getattr(chan, "tx_contact_id", None))
+            if ref is not None:
+                referenced.add(ref)
+        for gpl in grouplists:
+            referenced.update(contact_ref(cid) for cid in gpl.contact_ids)
+        for aprs in aprs_configs:
+            if aprs is None:
+                continue
+            ref = contact_ref(aprs.contact_id)
+            if ref is not None:
+                referenced.add(ref)
+        return referenced
+
+    def prune(
+        self, contacts: List[Contact], *, channels=(), grouplists=(), aprs_configs=()
+    ) -> List[Contact]:
+        """
+        Return the reachable subset of contacts.
+
+        Channels, group lists and APRS configurations are updated in place when
+        renumbering is enabled.
+        """
+        channels = list(channels)
+        grouplists = list(grouplists)
+        # The same APRS config object is shared by many channels; rewrite it once
+        aprs_configs = list(
+            {id(aprs): aprs for aprs in aprs_configs if aprs is not None}.values()
+        )
+
+        referenced = self.referenced_ids(channels, grouplists, aprs_configs)
+        kept = [
+            contact
+            for contact in contacts
+            if contact.internal_id in referenced or contact.calling_id in self.allowlist
+        ]
+
+        if self.debug:
+            print(
+                f"[ContactPruner] Kept {len(kept)} of {len(contacts)} contacts, "
+                f"pruned {len(contacts) - len(kept)} unreferenced"
+            )
+
+        if self.renumber:
+            self._renumber(kept, channels, grouplists, aprs_configs)
+        return kept
+
+    def _renumber(self, contacts, channels, grouplists, aprs_configs):
+        mapping = {}
+        for new_id, contact in enumerate(contacts, start=1):
+            mapping[contact.internal_id] = new_id
+            contact.internal_id = new_id
+
+        def remap(value):
+            ref = contact_ref(value)
+            if ref is None or ref not in mapping:
+                # Leave empty and dangling references alone
+                return value
+            return mapping[ref]
+
+        for chan in channels:
+            if hasattr(chan, "tx_contact_id"):
+                chan.tx_contact_id = remap(chan.tx_contact_id)
+        for gpl in grouplists:
+            gpl.contact_ids = [remap(cid) for cid in gpl.contact_ids]
+        for aprs in aprs_configs:
+            aprs.contact_id = remap(aprs.contact_id)
@@ -1,4 +1,12 @@
 class BaseRecipe:
+    # Drop contacts nothing refers to before writing; DMR numbers listed in
+    # contact_allowlist are always kept.
+    prune_unreferenced_contacts = True
+    contact_allowlist = ()
+    # Check references, names and the radio's limits before writing; errors
+    # abort the build
+    validate_before_write = True
+
     def __init__(
         self,
         callsign,
@@ -9,6 +17,7 @@ class BaseRecipe:
         timezone=None,
         debug=False,
         aprs_region="EU",
+        stable_ids=False,
     ):
         self.callsign = callsign
         self.dmr_id = dmr_id
@@ -18,6 +27,10 @@ class BaseRecipe:
         self.timezone = timezone
         self.debug = debug
         self.aprs_region = aprs_region  # "EU" or "US"
+        # Derive internal IDs from content keys and keep them between runs
+        # (see generators.StableSequence), instead of numbering in order
+        self.stable_ids = stable_ids
+        self.id_registry = None
         # Subclasses can define their own location as (latitude, longitude)
         self.location = None
 
@@ -38,27 +51,58 @@ class BaseRecipe:
 
     def prepare(self):
         """Main preparation method that orchestrates all section preparation."""
-        from generators import Sequence
+        from generators import IDRegistry
+
+        if self.stable_ids:
+            self.id_registry = IDRegistry(type(self).__module__.rsplit(".", 1)[-1])
 
         # Create sequences for each section
-        self.contact_seq = Sequence()
-        self.aprs_seq = Sequence()
-        self.chan_seq = Sequence()
-        self.zone_seq = Sequence()
-        self.rch_seq = Sequence()
-
-        # Prepare APRS contacts first (needed by both contacts and APRS config)
-        self.prepare_aprs_contacts()
-
-        # Prepare each section in order (contacts first as they're used by channels)
-        self.prepare_contacts()
-        self.prepare_aprs()
-        self.prepare_digital_channels()
-        self.prepare_analog_channels()
-        self.prepare_zones()
-        self.prepare_roaming()
-        self.prepare_scanlists()
-        self.prepare_grouplists()
+        self.contact_seq = self.sequence("contacts")
+        self.aprs_seq = self.sequence("aprs")
+        self.chan_seq = self.sequence("channels")
+        self.zone_seq = self.sequence("zones")
+        self.rch_seq = self.sequence("roaming_channels")
+
+        # Prepare APRS contacts first (needed by both contacts and APRS config),
+        # then each section in order (contacts first as they're used by
+        # channels). Items are tagged with the step that added them, unless a
+        # generator aggregator already did, so validation can name it.
+        for step in (
+            self.prepare_aprs_contacts,
+            self.prepare_contacts,
+            self.prepare_aprs,
+            self.prepare_digital_channels,
+            self.prepare_analog_channels,
+            self.prepare_zones,
+            self.prepare_roaming,
+            self.prepare_scanlists,
+            self.prepare_grouplists,
+        ):
+            step()
+            self._tag_sections(f"{type(self).__name__}.{step.__name__}")
+        self.prune_contacts()
+
+    def sequence(self, section):
+        """
+        ID sequence for a codeplug section, e.g. "zones". With stable IDs all
+        callers share the section's persisted sequence; otherwise every call
+        starts a new one.
+        """
+        from generators import Sequence
+
+        if self.id_registry is not None:
+            return self.id_registry.sequence(section)
+        return Sequence()
+
+    def data_plan(self):
+        """
+        Remote data this recipe reads, as phases of prefetch.Resource lists.
+
+        Subclasses yield one phase at a time; see prefetch.Prefetcher. Selection
+        logic should be shared with the prepare_* methods so the plan matches
+        what a build actually reads.
+        """
+        return []
 
     def prepare_aprs_contacts(self):
         """Prepare APRS digital contact. Called before prepare_contacts()."""
@@ -115,8 +159,71 @@ class BaseRecipe:
         """Prepare talkgroup lists. Override in subclasses."""
         pass
 
+    def prune_contacts(self):
+        """Keep only contacts referenced by channels, group lists or APRS configs."""
+        if not self.prune_unreferenced_contacts:
+            return
+
+        from pruners import ContactPruner
+
+        # Renumbering would undo stable IDs
+        self.contacts = ContactPruner(
+            allowlist=self.contact_allowlist,
+            renumber=not self.stable_ids,
+            debug=self.debug,
+        ).prune(
+            self.contacts,
+            channels=self.digital_channels,
+            grouplists=self.grouplists,
+            aprs_configs=[self.digital_aprs_config],
+        )
+
+    def _tag_sections(self, source):
+        from validators import tag_generator
+
+        for section in (
+            self.contacts,
+            self.grouplists,
+            self.analog_channels,
+            self.digital_channels,
+            self.zones,
+            self.roaming_channels,
+            self.roaming_zones,
+            self.scanlists,
+            [self.analog_aprs_config, self.digital_aprs_config],
+        ):
+            tag_generator([item for item in section if item is not None], source)
+
+    def validate(self):
+        """Check the prepared codeplug against the radio; returns a ValidationReport."""
+        from validators import CodeplugValidator
+
+        return CodeplugValidator(self.radio_class.LIMITS).validate(
+            contacts=self.contacts,
+            grouplists=self.grouplists,
+            scanlists=self.scanlists,
+            analog_channels=self.analog_channels,
+            digital_channels=self.digital_channels,
+            zones=self.zones,
+            roaming_channels=self.roaming_channels,
+            roaming_zones=self.roaming_zones,
+            analog_aprs_config=self.analog_aprs_config,
+            digital_aprs_config=self.digital_aprs_config,
+        )
+
     def generate(self):
         self.prepare()
+        if self.validate_before_write and hasattr(self.radio_class, "LIMITS"):
+            from validators import ValidationError
+
+            report = self.validate()
+            for issue in report.warnings() if self.debug else ():
+                print(issue)
+            if not report.ok:
+                raise ValidationError(report)
+            print(f"Validation: {report.summary()}")
+        if self.id_registry is not None:
+            self.id_registry.save()
         with open(self.filename, "wt") as f:
             writer = self.writer_class(f)
             self.radio_class(
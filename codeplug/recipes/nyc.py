@@ -1,13 +1,11 @@
 from .usa import USABaseRecipe
 
-from generators import Sequence
 from generators.zones import (
     AnalogZoneByBandGenerator,
     ZoneFromCallsignGenerator2,
 )
 from generators.scanlists import StateScanListGenerator
 from aggregators import ZoneAggregator
-from datasources.repeaterbook import RepeaterBookAPI
 from callsign_matchers import NYNJCallsignMatcher, CTCallsignMatcher, MultiMatcher
 
 # New York City coordinates
@@ -32,6 +30,7 @@ class Recipe(USABaseRecipe):
         writer_class,
         timezone=None,
         debug=False,
+        stable_ids=False,
     ):
         super().__init__(
             callsign,
@@ -41,6 +40,7 @@ class Recipe(USABaseRecipe):
             writer_class,
             timezone,
             debug,
+            stable_ids=stable_ids,
         )
 
         # Set location parameters for NYC
@@ -48,6 +48,15 @@ class Recipe(USABaseRecipe):
         self.reference_lng = NYC_LNG
         self.max_distance_km = 100.0
 
+    repeaterbook_states = [STATE_NY, STATE_NJ, STATE_CT]
+
+    def digital_callsign_matcher(self):
+        """Multi-matcher for NY/NJ/CT callsigns."""
+        return MultiMatcher(
+            NYNJCallsignMatcher(),  # Matches call district 2 (NY/NJ)
+            CTCallsignMatcher(),  # Matches call district 1 (CT)
+        )
+
     def prepare_digital_channels(self):
         """Prepare digital (DMR) channels from Brandmeister for NYC area.
 
@@ -56,15 +65,11 @@ class Recipe(USABaseRecipe):
         """
         usa_tgs = self.get_usa_talkgroups()
 
-        # Create multi-matcher for NY/NJ/CT callsigns
-        nyc_callsign_matcher = MultiMatcher(
-            NYNJCallsignMatcher(),  # Matches call district 2 (NY/NJ)
-            CTCallsignMatcher(),  # Matches call district 1 (CT)
-        )
-
         # Generate NYC-area digital channels with callsign filtering
         nyc_digital_generator = self.create_digital_channel_generator(
-            usa_tgs, callsign_matcher=nyc_callsign_matcher
+            usa_tgs,
+            callsign_matcher=self.digital_callsign_matcher(),
+            default_contact_id=self.bm_special_gen.parrot().internal_id,
         )
         self.nyc_digital_channels = nyc_digital_generator.channels(self.chan_seq)
 
@@ -73,30 +78,14 @@ class Recipe(USABaseRecipe):
 
     def generate_nyc_analog_channels(self):
         """Generate analog channels for NYC area (NY/NJ/CT)."""
-        # Get repeaters from NY, NJ, and CT
-        ny_repeaters = RepeaterBookAPI().get_repeaters_by_state(STATE_NY)
-        nj_repeaters = RepeaterBookAPI().get_repeaters_by_state(STATE_NJ)
-        ct_repeaters = RepeaterBookAPI().get_repeaters_by_state(STATE_CT)
-
-        all_channels = []
-
-        # Generate channels for each state
-        for state_repeaters in [ny_repeaters, nj_repeaters, ct_repeaters]:
-            # Generate 2m channels
-            state_2m_generator = self.create_analog_channel_generator(
-                state_repeaters, band_range=(144.0, 148.0)
-            )
-            state_2m_channels = state_2m_generator.channels(self.chan_seq)
+        # Analog repeaters from NY, NJ and CT; listed in several states once
+        repeaters = self.analog_repeaters()
 
-            # Generate 70cm channels
-            state_70cm_generator = self.create_analog_channel_generator(
-                state_repeaters, band_range=(420.0, 450.0)
-            )
-            state_70cm_channels = state_70cm_generator.channels(self.chan_seq)
-
-            all_channels.extend(state_2m_channels + state_70cm_channels)
-
-        return all_channels
+        # Generate 2m and 70cm channels in one pass
+        nyc_generator = self.create_analog_channel_generator_by_band(
+            repeaters, band_ranges=[(144.0, 148.0), (420.0, 450.0)]
+        )
+        return nyc_generator.channels(self.chan_seq)
 
     def prepare_analog_channels(self):
         """Prepare analog channels for NYC area."""
@@ -108,7 +97,7 @@ class Recipe(USABaseRecipe):
 
     def prepare_zones(self):
         """Prepare channel zones organized by callsign and band."""
-        zone_seq = Sequence()
+        zone_seq = self.sequence("zones")
         self.zones = ZoneAggregator(
             ZoneFromCallsignGenerator2(self.digital_channels),
             AnalogZoneByBandGenerator(self.nyc_analog_channels, prefix="NYC"),
@@ -122,7 +111,7 @@ class Recipe(USABaseRecipe):
         )
 
         # Generate all scan lists using a single sequence to avoid ID collisions
-        scanlist_seq = Sequence()
+        scanlist_seq = self.sequence("scanlists")
         nyc_scanlists = nyc_scanlist_gen.scanlists(scanlist_seq)
 
         self.scanlists = nyc_scanlists
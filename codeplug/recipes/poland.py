@@ -1,6 +1,5 @@
 from . import BaseRecipe
 
-from generators import Sequence
 from generators.analogchan import (
     AnalogPMR446ChannelGenerator,
     AnalogChannelGeneratorFromPrzemienniki,
@@ -30,8 +29,12 @@ from generators.zones import (
 )
 from aggregators import ChannelAggregator, ZoneAggregator, ContactAggregator
 from callsign_matchers import RegexMatcher
+from datasources.brandmeister import DeviceDB, TalkgroupAPI
 from datasources.przemienniki import PrzemiennikiAPI
 
+# Brandmeister device ID prefix (MCC) of Polish repeaters
+POLAND_MCC = "260"
+
 
 class Recipe(BaseRecipe):
     def __init__(
@@ -43,6 +46,7 @@ class Recipe(BaseRecipe):
         writer_class,
         timezone=None,
         debug=False,
+        stable_ids=False,
     ):
         super().__init__(
             callsign,
@@ -52,9 +56,29 @@ class Recipe(BaseRecipe):
             writer_class,
             timezone,
             debug,
+            stable_ids=stable_ids,
             aprs_region="EU",  # Poland uses EU APRS frequency
         )
 
+    def digital_callsign_matcher(self):
+        return RegexMatcher(r"^SR[0-9]")
+
+    def data_plan(self):
+        """Device list and przemienniki.net exports, then static talkgroups."""
+        device_db = DeviceDB()
+        yield [device_db.resource(), *PrzemiennikiAPI().resources()]
+
+        # Repeaters whose talkgroups the digital and roaming generators read
+        device_ids = {
+            site.source_id
+            for site in self.brandmeister_channel_generator([], None).queried_sites()
+        }
+        device_ids |= {
+            r.source_id for r in self.roaming_channel_generator([]).queried_records()
+        }
+        talkgroup_api = TalkgroupAPI()
+        yield [talkgroup_api.resource(device_id) for device_id in sorted(device_ids)]
+
     def prepare_contacts(self):
         """Prepare DMR contacts including Brandmeister TGs and special contacts."""
         # Get APRS contact generator from BaseRecipe
@@ -80,15 +104,29 @@ class Recipe(BaseRecipe):
                 aprs_config=self.digital_aprs_config,
                 default_contact_id=self.bm_special_gen.parrot().internal_id,
             ),
-            DigitalChannelGeneratorFromBrandmeister(
-                "High",
-                talkgroups=polish_tgs,
-                aprs_config=self.digital_aprs_config,
-                default_contact_id=self.bm_special_gen.parrot().internal_id,
-                callsign_matcher=RegexMatcher(r"^SR[0-9]"),
+            self.brandmeister_channel_generator(
+                polish_tgs, self.bm_special_gen.parrot().internal_id
             ),
         ).channels(self.chan_seq)
 
+    def brandmeister_channel_generator(self, talkgroups, default_contact_id):
+        """Channels of Polish Brandmeister repeaters; data_plan() uses it too."""
+        return DigitalChannelGeneratorFromBrandmeister(
+            "High",
+            talkgroups=talkgroups,
+            aprs_config=self.digital_aprs_config,
+            default_contact_id=default_contact_id,
+            callsign_matcher=self.digital_callsign_matcher(),
+            records=DeviceDB().records(prefixes=[POLAND_MCC]),
+        )
+
+    def roaming_channel_generator(self, talkgroups):
+        """Roaming channels of recently active Polish repeaters."""
+        return RoamingChannelGeneratorFromBrandmeister(
+            talkgroups,
+            records=DeviceDB().records_recently_active(prefixes=[POLAND_MCC]),
+        )
+
     def prepare_analog_channels(self):
         """Prepare analog (FM) channels from Przemienniki and PMR446."""
         self.analog_pmr_chan_gen = AnalogPMR446ChannelGenerator(
@@ -99,12 +137,12 @@ class Recipe(BaseRecipe):
             self.analog_aprs,
             self.analog_pmr_chan_gen,
             AnalogChannelGeneratorFromPrzemienniki(
-                PrzemiennikiAPI().repeaters_2m(),
+                PrzemiennikiAPI().records_2m(),
                 "High",
                 aprs=self.analog_aprs_config,
             ),
             AnalogChannelGeneratorFromPrzemienniki(
-                PrzemiennikiAPI().repeaters_70cm(),
+                PrzemiennikiAPI().records_70cm(),
                 "High",
                 aprs=self.analog_aprs_config,
             ),
@@ -122,16 +160,16 @@ class Recipe(BaseRecipe):
     def prepare_roaming(self):
         """Prepare roaming channels and zones for Polish repeaters."""
         polish_tgs = self.brandmeister_contact_gen.matched_contacts("^260")
-        self.roaming_channels = RoamingChannelGeneratorFromBrandmeister(
-            polish_tgs
-        ).channels(self.rch_seq)
+        self.roaming_channels = self.roaming_channel_generator(polish_tgs).channels(
+            self.rch_seq
+        )
         self.roaming_zones = RoamingZoneFromCallsignGenerator(
             self.roaming_channels
-        ).zones(Sequence())
+        ).zones(self.sequence("roaming_zones"))
 
     def prepare_scanlists(self):
         """Prepare scan lists grouped by callsign prefix for analog and digital channels."""
-        scanlist_seq = Sequence()
+        scanlist_seq = self.sequence("scanlists")
         analog_scanlist_gen = CallsignPrefixAnalogScanListGenerator(
             self.analog_channels
         )
@@ -166,7 +204,9 @@ class Recipe(BaseRecipe):
     def prepare_grouplists(self):
         """Prepare talkgroup lists for Polish country code (260)."""
         self.grouplists = list(
-            CountryGroupListGenerator(self.contacts, 260).grouplists(Sequence())
+            CountryGroupListGenerator(self.contacts, 260).grouplists(
+                self.sequence("grouplists")
+            )
         )
 
         # Assign the Poland grouplist to all digital channels
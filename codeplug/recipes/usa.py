@@ -1,6 +1,5 @@
 from . import BaseRecipe
 
-from generators import Sequence
 from generators.rxgrouplists import RXGroupListGenerator
 from generators.contacts import (
     BrandmeisterTGContactGenerator,
@@ -18,8 +17,11 @@ from generators.zones import (
 )
 from generators.scanlists import StateScanListGenerator
 from aggregators import ChannelAggregator, ZoneAggregator, ContactAggregator
+from datasources.brandmeister import DeviceDB, TalkgroupAPI
+from datasources.catalog import catalog_covers, query_catalog
 from datasources.przemienniki import PrzemiennikiAPI
-from datasources.repeaterbook import RepeaterBookAPI
+from datasources.rbplanner import plan_queries
+from datasources.repeaterbook import RepeaterBookAPI, region_name
 from callsign_matchers import (
     CACallsignMatcher,
 )
@@ -32,10 +34,25 @@ from filters import (
 MOUNTAIN_VIEW_LAT = 37.3861
 MOUNTAIN_VIEW_LNG = -122.0839
 
+# RepeaterBook state codes
+STATE_CA = "06"  # California
+
+# Caches the catalog's rows of each source are ingested from
+CATALOG_SOURCES = {"brandmeister": DeviceDB, "repeaterbook": RepeaterBookAPI}
+
 
 class USABaseRecipe(BaseRecipe):
     """Base class for all USA codeplug recipes."""
 
+    # RepeaterBook states the recipe reads analog repeaters from; empty for
+    # every state within reach of the location filters
+    repeaterbook_states = []
+
+    # Repeater catalog built by `tools.py build-catalog`; when it covers the
+    # recipe's regions and was built from the current downloads of a source,
+    # repeaters are looked up in it instead of the source's dumps
+    catalog_path = "cache/catalog.sqlite"
+
     def __init__(
         self,
         callsign,
@@ -45,6 +62,7 @@ class USABaseRecipe(BaseRecipe):
         writer_class,
         timezone=None,
         debug=False,
+        stable_ids=False,
     ):
         super().__init__(
             callsign,
@@ -54,6 +72,7 @@ class USABaseRecipe(BaseRecipe):
             writer_class,
             timezone,
             debug,
+            stable_ids=stable_ids,
             aprs_region="US",  # USA uses US APRS frequency
         )
 
@@ -62,6 +81,110 @@ class USABaseRecipe(BaseRecipe):
         self.reference_lng = None
         self.max_distance_km = None
 
+    def digital_callsign_matcher(self):
+        """Callsign matcher for Brandmeister repeaters, or None for all."""
+        return None
+
+    def location_filter_chain(self):
+        """Filters on the recipe's area, shared by all channel generators."""
+        if self.reference_lat is None or self.reference_lng is None:
+            raise ValueError("reference_lat and reference_lng must be set in subclass")
+
+        if self.max_distance_km is None:
+            raise ValueError("max_distance_km must be set in subclass")
+
+        return FilterChain(
+            [
+                DistanceFilter(
+                    reference_lat=self.reference_lat,
+                    reference_lng=self.reference_lng,
+                    max_distance_km=self.max_distance_km,
+                ),
+            ]
+        )
+
+    def catalog_snapshot_id(self, source):
+        """snapshot_id of the cache the catalog's rows of source were read from"""
+        return CATALOG_SOURCES[source]().snapshot_id
+
+    def catalog_repeaters(self, source, regions=None, **query):
+        """
+        RepeaterRecords of source within max_distance_km of the reference
+        point, from the repeater catalog. None if the catalog does not cover
+        regions (if given) or was ingested from older downloads of source.
+        """
+        records = query_catalog(
+            self.catalog_path,
+            source,
+            regions=regions,
+            snapshot_id=self.catalog_snapshot_id(source),
+            near=(self.reference_lat, self.reference_lng, self.max_distance_km),
+            **query,
+        )
+        if records is not None and self.debug:
+            print(
+                f"[RepeaterCatalog] {len(records)} {source} repeaters within "
+                f"{self.max_distance_km}km"
+            )
+        return records
+
+    def analog_query_plan(self):
+        """
+        RepeaterBook exports holding the recipe's analog repeaters: states in
+        reach of the location filters, analog mode only.
+        """
+        return plan_queries(
+            self.location_filter_chain(),
+            mode="analog",
+            within_states=self.repeaterbook_states,
+        )
+
+    def analog_catalog_regions(self):
+        """Catalog regions holding the exports of analog_query_plan()"""
+        plan = self.analog_query_plan()
+        return [region_name(plan.country, state_id) for state_id in plan.states]
+
+    def analog_from_catalog(self):
+        """Whether analog_repeaters() reads the catalog rather than exports"""
+        return catalog_covers(
+            self.catalog_path,
+            "repeaterbook",
+            self.analog_catalog_regions(),
+            self.catalog_snapshot_id("repeaterbook"),
+        )
+
+    def analog_repeaters(self):
+        """RepeaterRecords for the recipe's analog channels."""
+        records = self.catalog_repeaters(
+            "repeaterbook", regions=self.analog_catalog_regions(), analog=True
+        )
+        if records is not None:
+            return records
+
+        plan = self.analog_query_plan()
+        if self.debug:
+            print(f"[RepeaterBook] Fetching {plan.describe()}")
+        return RepeaterBookAPI().records_for_plan(plan)
+
+    def data_plan(self):
+        """Device list and RepeaterBook states, then static talkgroups."""
+        device_db = DeviceDB()
+        if self.analog_from_catalog():
+            yield [device_db.resource()]
+        else:
+            yield [device_db.resource()] + RepeaterBookAPI().plan_resources(
+                self.analog_query_plan()
+            )
+
+        # Repeaters whose talkgroups the digital channel generator reads
+        generator = self.create_digital_channel_generator(
+            [], callsign_matcher=self.digital_callsign_matcher()
+        )
+        talkgroup_api = TalkgroupAPI()
+        yield [
+            talkgroup_api.resource(site.source_id) for site in generator.queried_sites()
+        ]
+
     def prepare_contacts(self):
         """Prepare DMR contacts including Brandmeister TGs and special contacts."""
         # Get APRS contact generator from BaseRecipe
@@ -91,7 +214,7 @@ class USABaseRecipe(BaseRecipe):
         return self.brandmeister_contact_gen.matched_contacts("^260")
 
     def create_digital_channel_generator(
-        self, talkgroups, callsign_matcher=None, bands=None
+        self, talkgroups, callsign_matcher=None, bands=None, default_contact_id=None
     ):
         """
         Create a digital channel generator with location-based filtering.
@@ -100,6 +223,7 @@ class USABaseRecipe(BaseRecipe):
             talkgroups: List of talkgroup contacts
             callsign_matcher: Optional callsign matcher for filtering
             bands: Optional band filter ranges, defaults to 2m and 70cm
+            default_contact_id: TX contact of the generic timeslot channels
         """
         if self.reference_lat is None or self.reference_lng is None:
             raise ValueError("reference_lat and reference_lng must be set in subclass")
@@ -125,9 +249,10 @@ class USABaseRecipe(BaseRecipe):
             talkgroups=talkgroups,
             aprs_config=self.digital_aprs_config,
             callsign_matcher=callsign_matcher,
-            default_contact_id=self.bm_special_gen.parrot().internal_id,
+            default_contact_id=default_contact_id,
             filter_chain=filter_chain,
             debug=self.debug,
+            records=self.catalog_repeaters("brandmeister"),
         )
 
     def create_analog_channel_generator(self, repeaters, band_range):
@@ -135,7 +260,7 @@ class USABaseRecipe(BaseRecipe):
         Create an analog channel generator with location and band filtering.
 
         Args:
-            repeaters: List of repeater data from RepeaterBook
+            repeaters: RepeaterRecords from RepeaterBookAPI
             band_range: Tuple of (min_freq, max_freq) in MHz
         """
         if self.reference_lat is None or self.reference_lng is None:
@@ -165,9 +290,31 @@ class USABaseRecipe(BaseRecipe):
             debug=self.debug,
         )
 
+    def create_analog_channel_generator_by_band(self, repeaters, band_ranges):
+        """
+        Create a single analog channel generator covering several bands.
+
+        Each repeater record is parsed and location-filtered once, and survivors
+        are partitioned into band_ranges in one sweep. Channels are numbered band
+        by band, in the order given.
+
+        Args:
+            repeaters: RepeaterRecords from RepeaterBookAPI
+            band_ranges: List of (min_freq, max_freq) tuples in MHz
+        """
+        # Band membership is checked by the generator itself
+        return AnalogChannelGeneratorFromRepeaterBook(
+            repeaters,
+            "High",
+            aprs=self.analog_aprs_config,
+            filter_chain=self.location_filter_chain(),
+            debug=self.debug,
+            bands=band_ranges,
+        )
+
     def prepare_grouplists(self):
         """Prepare RXGroupLists for repeater channels."""
-        grouplist_seq = Sequence()
+        grouplist_seq = self.sequence("grouplists")
 
         # Generate RXGroupLists for repeater channels
         # This will create one group list per repeater containing all its static TGs
@@ -188,6 +335,7 @@ class Recipe(USABaseRecipe):
         writer_class,
         timezone=None,
         debug=False,
+        stable_ids=False,
     ):
         super().__init__(
             callsign,
@@ -197,6 +345,7 @@ class Recipe(USABaseRecipe):
             writer_class,
             timezone,
             debug,
+            stable_ids=stable_ids,
         )
 
         # Set location parameters for Mountain View, CA
@@ -204,13 +353,20 @@ class Recipe(USABaseRecipe):
         self.reference_lng = MOUNTAIN_VIEW_LNG
         self.max_distance_km = 50.0
 
+    repeaterbook_states = [STATE_CA]
+
+    def digital_callsign_matcher(self):
+        return CACallsignMatcher()
+
     def prepare_digital_channels(self):
         """Prepare digital (DMR) channels from Brandmeister for USA."""
         usa_tgs = self.get_usa_talkgroups()
 
         # Generate California-specific channels
         ca_digital_generator = self.create_digital_channel_generator(
-            usa_tgs, callsign_matcher=CACallsignMatcher()
+            usa_tgs,
+            callsign_matcher=self.digital_callsign_matcher(),
+            default_contact_id=self.bm_special_gen.parrot().internal_id,
         )
         self.ca_digital_channels = ca_digital_generator.channels(self.chan_seq)
 
@@ -219,22 +375,14 @@ class Recipe(USABaseRecipe):
 
     def generate_ca_analog_channels(self):
         """Generate analog channels for California."""
-        # Get California repeaters
-        ca_repeaters = RepeaterBookAPI().get_repeaters_by_state("06")  # California
+        # Analog California repeaters in reach of Mountain View
+        ca_repeaters = self.analog_repeaters()
 
-        # Generate 2m channels
-        ca_2m_generator = self.create_analog_channel_generator(
-            ca_repeaters, band_range=(144.0, 148.0)
+        # Generate 2m and 70cm channels in one pass
+        ca_generator = self.create_analog_channel_generator_by_band(
+            ca_repeaters, band_ranges=[(144.0, 148.0), (420.0, 450.0)]
         )
-        ca_2m_channels = ca_2m_generator.channels(self.chan_seq)
-
-        # Generate 70cm channels
-        ca_70cm_generator = self.create_analog_channel_generator(
-            ca_repeaters, band_range=(420.0, 450.0)
-        )
-        ca_70cm_channels = ca_70cm_generator.channels(self.chan_seq)
-
-        return ca_2m_channels + ca_70cm_channels
+        return ca_generator.channels(self.chan_seq)
 
     def prepare_analog_channels(self):
         """Prepare analog channels for California."""
@@ -246,7 +394,7 @@ class Recipe(USABaseRecipe):
 
     def prepare_zones(self):
         """Prepare channel zones organized by callsign, state, band, sorted by distance."""
-        zone_seq = Sequence()
+        zone_seq = self.sequence("zones")
         self.zones = ZoneAggregator(
             ZoneFromCallsignGenerator2(self.digital_channels),
             AnalogZoneByBandGenerator(self.ca_analog_channels, prefix="CA"),
@@ -260,7 +408,7 @@ class Recipe(USABaseRecipe):
         )
 
         # Generate all scan lists using a single sequence to avoid ID collisions
-        scanlist_seq = Sequence()
+        scanlist_seq = self.sequence("scanlists")
         ca_scanlists = ca_scanlist_gen.scanlists(scanlist_seq)
 
         self.scanlists = ca_scanlists
@@ -0,0 +1,360 @@
+import argparse
+import importlib
+import os
+import sys
+from datetime import datetime, timedelta
+
+from datasources.cachegc import (
+    cache_stats,
+    collect_garbage,
+    format_size,
+    parse_size,
+    scan,
+)
+from datasources.catalog import RepeaterCatalog
+from datasources.gazetteer import GazetteerGeocoder
+from datasources.serializers import benchmark, codec_for, decode_entry
+from datasources.transport import download
+from plugdiff import diff_plugs, load_plug
+from prefetch import Prefetcher, ProgressPrinter
+from userdb import UserFilter, export_users
+
+
+def build_gazetteer(args):
+    count = GazetteerGeocoder().build_index(
+        args.dump,
+        admin1_path=args.admin1,
+        country_info_path=args.country_info,
+        min_population=args.min_population,
+    )
+    print(f"Indexed {count} places from {args.dump}")
+
+
+def build_catalog(args):
+    catalog = RepeaterCatalog(args.path)
+    if "brandmeister" in args.sources:
+        from datasources.brandmeister import DeviceDB
+
+        # Snapshots of the entries read let builds notice a newer download
+        device_db = DeviceDB()
+        catalog.ingest(
+            "brandmeister",
+            device_db.records(),
+            snapshots={"repeaters": device_db.snapshot_id("repeaters")},
+        )
+    if "przemienniki" in args.sources:
+        from datasources.przemienniki import PrzemiennikiAPI
+
+        api = PrzemiennikiAPI()
+        catalog.ingest(
+            "przemienniki",
+            api.records_2m() + api.records_70cm(),
+            snapshots={
+                key: api.snapshot_id(key)
+                for key in ("2m_fm_records", "70cm_fm_records")
+            },
+        )
+    if "repeaterbook" in args.sources and (args.rb_states or args.rb_countries):
+        from datasources.repeaterbook import RepeaterBookAPI
+
+        api = RepeaterBookAPI()
+        regions = dict(states=args.rb_states, countries=args.rb_countries)
+        catalog.ingest_regions(
+            "repeaterbook",
+            api.records_by_region(**regions),
+            snapshots={key: api.snapshot_id(key) for key in api.export_keys(**regions)},
+        )
+    for source, count in catalog.sources().items():
+        print(f"{source}: {count} repeaters")
+    catalog.close()
+
+
+def sync_talkgroups(args):
+    from datasources.brandmeister import DeviceDB, TalkgroupAPI
+    from datasources.tgsync import TalkgroupSync
+
+    device_db = DeviceDB()
+    devices = device_db.devices if args.no_refresh else device_db.refresh()
+    sync = TalkgroupSync(
+        TalkgroupAPI(), active_days=args.active_days, max_age_days=args.max_age_days
+    )
+    plan = sync.run(devices)
+    print(f"Synced static talkgroups of {len(devices)} devices: {plan.summary()}")
+
+
+def prefetch(args):
+    recipe_class = importlib.import_module(f"recipes.{args.recipe}").Recipe
+    # Only the data plan is used, which needs no radio or output settings
+    recipe = recipe_class("N0CALL", 0, None, None, None)
+    report = Prefetcher(
+        max_workers=args.workers, progress=ProgressPrinter(), force=args.force
+    ).run(recipe.data_plan())
+    print(f"Prefetched {args.recipe}: {report.summary()}")
+    for resource, error in report.failed:
+        print(f"  failed: {resource}: {error}")
+    if report.failed:
+        sys.exit(1)
+
+
+def show_cache_stats(args):
+    stats = cache_stats(prefixes=args.prefix)
+    for prefix, s in stats.items():
+        oldest = datetime.fromtimestamp(s["oldest_access"]).strftime("%Y-%m-%d")
+        newest = datetime.fromtimestamp(s["newest_access"]).strftime("%Y-%m-%d")
+        print(
+            f"{prefix:24} {s['entries']:7} entries {format_size(s['bytes']):>10}"
+            f"  accessed {oldest} .. {newest}"
+        )
+    total = sum(s["bytes"] for s in stats.values())
+    entries = sum(s["entries"] for s in stats.values())
+    print(f"{'total':24} {entries:7} entries {format_size(total):>10}")
+
+
+def gc_cache(args):
+    evicted = collect_garbage(
+        max_bytes=parse_size(args.max_size) if args.max_size else None,
+        max_age=timedelta(days=args.max_age_days) if args.max_age_days else None,
+        prefixes=args.prefix,
+        dry_run=args.dry_run,
+    )
+    if args.verbose:
+        for entry in evicted:
+            print(f"  {entry.path}")
+    verb = "Would evict" if args.dry_run else "Evicted"
+    size = format_size(sum(e.size for e in evicted))
+    print(f"{verb} {len(evicted)} entries ({size})")
+
+
+def bench_cache(args):
+    by_prefix = {}
+    for entry in scan(prefixes=args.prefix):
+        # Only codec-encoded entries; derived files such as .bin are skipped
+        if not entry.path.endswith(".json"):
+            continue
+        with open(entry.path, "rb") as f:
+            try:
+                value = decode_entry(f.read())
+            except ValueError:
+                continue
+        by_prefix.setdefault(entry.prefix, []).append(value)
+
+    for prefix, values in by_prefix.items():
+        current = codec_for(prefix).name
+        print(f"{prefix} ({len(values)} entries, writing {current})")
+        results = benchmark(values[: args.sample], args.codec)
+        for name, r in sorted(results.items(), key=lambda item: item[1]["decode"]):
+            print(
+                f"  {name:16} {format_size(r['bytes']):>10}"
+                f"  load {r['decode'] * 1000:9.1f}ms"
+                f"  store {r['encode'] * 1000:9.1f}ms"
+            )
+
+
+def print_download_progress(done, total):
+    if total:
+        line = f"{format_size(done)} of {format_size(total)} ({done * 100 // total}%)"
+    else:
+        line = format_size(done)
+    sys.stderr.write(f"\r{line:40}")
+    sys.stderr.flush()
+
+
+def download_file(args):
+    os.makedirs(os.path.dirname(args.path) or ".", exist_ok=True)
+    download(args.url, args.path, sha256=args.sha256, progress=print_download_progress)
+    sys.stderr.write("\n")
+
+
+def export_user_db(args):
+    active_ids = None
+    if args.active_ids:
+        with open(args.active_ids) as f:
+            active_ids = {int(line) for line in f if line.strip()}
+    count = export_users(
+        args.output,
+        source=args.source,
+        user_filter=UserFilter(args.country, args.state, active_ids),
+        format=args.format,
+        limit=args.limit,
+        max_in_memory=args.max_in_memory,
+    )
+    print(f"Exported {count} users to {args.output}")
+
+
+def diff_codeplugs(args):
+    diff = diff_plugs(load_plug(args.old), load_plug(args.new))
+    if args.summary:
+        print(diff.summary())
+    else:
+        for line in diff.lines():
+            print(line)
+    # Like diff(1): 1 when the plugs differ
+    sys.exit(1 if diff else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Codeplug data maintenance tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gazetteer = subparsers.add_parser(
+        "build-gazetteer", help="Build the offline geocoding index"
+    )
+    gazetteer.add_argument("dump", help="GeoNames dump, e.g. cities1000.txt")
+    gazetteer.add_argument("--admin1", help="GeoNames admin1CodesASCII.txt")
+    gazetteer.add_argument("--country-info", help="GeoNames countryInfo.txt")
+    gazetteer.add_argument(
+        "--min-population",
+        type=int,
+        default=0,
+        help="Skip places with a smaller population",
+    )
+    gazetteer.set_defaults(func=build_gazetteer)
+
+    catalog = subparsers.add_parser(
+        "build-catalog", help="Load repeater sources into the local catalog"
+    )
+    catalog.add_argument("--path", default="cache/catalog.sqlite")
+    catalog.add_argument(
+        "--sources",
+        nargs="+",
+        choices=["brandmeister", "przemienniki", "repeaterbook"],
+        default=["brandmeister", "przemienniki", "repeaterbook"],
+    )
+    catalog.add_argument(
+        "--rb-state",
+        dest="rb_states",
+        action="append",
+        default=[],
+        help="RepeaterBook state FIPS code to ingest, e.g. 06 (repeatable)",
+    )
+    catalog.add_argument(
+        "--rb-country",
+        dest="rb_countries",
+        action="append",
+        default=[],
+        help="RepeaterBook country to ingest, e.g. Canada (repeatable)",
+    )
+    catalog.set_defaults(func=build_catalog)
+
+    sync = subparsers.add_parser(
+        "sync-talkgroups",
+        help="Refresh static talkgroups of new, changed and active devices",
+    )
+    sync.add_argument(
+        "--no-refresh",
+        action="store_true",
+        help="Use the cached device list instead of downloading it again",
+    )
+    sync.add_argument(
+        "--active-days",
+        type=int,
+        default=2,
+        help="Devices seen within this many days count as active",
+    )
+    sync.add_argument(
+        "--max-age-days",
+        type=int,
+        default=7,
+        help="Re-fetch active devices whose talkgroups are older than this",
+    )
+    sync.set_defaults(func=sync_talkgroups)
+
+    prefetch_parser = subparsers.add_parser(
+        "prefetch", help="Download everything a recipe reads into the cache"
+    )
+    prefetch_parser.add_argument("recipe", help="Recipe name, e.g. poland")
+    prefetch_parser.add_argument(
+        "--workers", type=int, default=8, help="Parallel downloads"
+    )
+    prefetch_parser.add_argument(
+        "--force", action="store_true", help="Download resources already cached"
+    )
+    prefetch_parser.set_defaults(func=prefetch)
+
+    users_parser = subparsers.add_parser(
+        "export-users", help="Export radioid.net users as a digital contact list"
+    )
+    users_parser.add_argument("output", help="Output file")
+    users_parser.add_argument("--source", default="data/radiod_users.json")
+    users_parser.add_argument(
+        "--format", choices=["anytone", "qdmr"], default="anytone"
+    )
+    users_parser.add_argument(
+        "--country", action="append", help="Only users from this country (repeatable)"
+    )
+    users_parser.add_argument(
+        "--state", action="append", help="Only users from this state (repeatable)"
+    )
+    users_parser.add_argument(
+        "--active-ids", help="File of radio IDs to keep, one per line"
+    )
+    users_parser.add_argument(
+        "--limit", type=int, help="At most this many users, e.g. the radio's capacity"
+    )
+    users_parser.add_argument(
+        "--max-in-memory",
+        type=int,
+        default=100_000,
+        help="Users sorted in memory before spilling to disk",
+    )
+    users_parser.set_defaults(func=export_user_db)
+
+    download_parser = subparsers.add_parser(
+        "download", help="Download a large file, resuming an interrupted transfer"
+    )
+    download_parser.add_argument("url")
+    download_parser.add_argument("path")
+    download_parser.add_argument("--sha256", help="Expected SHA-256 of the file")
+    download_parser.set_defaults(func=download_file)
+
+    diff_parser = subparsers.add_parser(
+        "diff", help="Show channels, zones, contacts and group lists that changed"
+    )
+    diff_parser.add_argument("old", help="Previous plug, e.g. plug-poland.yaml")
+    diff_parser.add_argument("new", help="New plug")
+    diff_parser.add_argument(
+        "--summary", action="store_true", help="Only count changes per section"
+    )
+    diff_parser.set_defaults(func=diff_codeplugs)
+
+    cache_parser = subparsers.add_parser("cache", help="Inspect and trim cache/")
+    cache_commands = cache_parser.add_subparsers(dest="cache_command", required=True)
+
+    stats_parser = cache_commands.add_parser(
+        "stats", help="Entries, size and last access per prefix"
+    )
+    stats_parser.add_argument(
+        "--prefix", action="append", help="Only this prefix (repeatable)"
+    )
+    stats_parser.set_defaults(func=show_cache_stats)
+
+    gc_parser = cache_commands.add_parser(
+        "gc", help="Evict old and least recently used entries"
+    )
+    gc_parser.add_argument("--max-size", help="Size cap, e.g. 500M or 2G")
+    gc_parser.add_argument(
+        "--max-age-days", type=int, help="Evict entries not accessed for this long"
+    )
+    gc_parser.add_argument(
+        "--prefix", action="append", help="Only this prefix (repeatable)"
+    )
+    gc_parser.add_argument("--dry-run", action="store_true")
+    gc_parser.add_argument("-v", "--verbose", action="store_true")
+    gc_parser.set_defaults(func=gc_cache)
+
+    bench_parser = cache_commands.add_parser(
+        "bench", help="Compare codecs on the cached entries"
+    )
+    bench_parser.add_argument(
+        "--prefix", action="append", help="Only this prefix (repeatable)"
+    )
+    bench_parser.add_argument(
+        "--codec", action="append", help="Only this codec (repeatable)"
+    )
+    bench_parser.add_argument(
+        "--sample", type=int, default=200, help="Entries per prefix to measure"
+    )
+    bench_parser.set_defaults(func=bench_cache)
+
+    args = parser.parse_args()
+    args.func(args)
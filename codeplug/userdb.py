@@ -0,0 +1,199 @@
+"""
+Export the radioid.net user database as a digital contact list for the
+radio's caller ID display.
+
+Users are streamed from users.json, filtered, and sorted by radio ID in
+bounded memory: sorted runs of at most max_in_memory users are spilled to
+temporary files and merged. Output is written as it is merged.
+
+Usage:
+    export_users("users.csv", user_filter=UserFilter(countries=["Poland"]))
+"""
+
+import contextlib
+import csv
+import heapq
+import json
+import os
+import tempfile
+from itertools import islice
+
+from datasources.radioid import USERS_PATH, iter_users
+
+
+class UserFilter:
+    """
+    Keep users from the given countries and states (case-insensitive), and
+    optionally only the given radio IDs, e.g. ones recently heard.
+    """
+
+    def __init__(self, countries=None, states=None, active_ids=None):
+        self.countries = {c.lower() for c in countries} if countries else None
+        self.states = {s.lower() for s in states} if states else None
+        self.active_ids = set(active_ids) if active_ids is not None else None
+
+    def matches(self, user):
+        country, state = user["country"].lower(), user["state"].lower()
+        if self.countries is not None and country not in self.countries:
+            return False
+        if self.states is not None and state not in self.states:
+            return False
+        if self.active_ids is not None and user["radio_id"] not in self.active_ids:
+            return False
+        return True
+
+
+def _radio_id(user):
+    return user["radio_id"]
+
+
+def _write_run(users, directory):
+    fd, path = tempfile.mkstemp(dir=directory, prefix="users.", suffix=".run")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for user in users:
+            f.write(json.dumps(user, ensure_ascii=False))
+            f.write("\n")
+    return path
+
+
+def _read_run(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def sorted_users(users, max_in_memory=100_000, directory=None):
+    """
+    Yield users by ascending radio ID, dropping duplicate IDs, with at most
+    max_in_memory users held at a time (plus one per run while merging).
+
+    Args:
+        users: Iterable of normalized users
+        max_in_memory: Users sorted in memory before spilling a run to disk
+        directory: Where runs are written (default: the system temp dir)
+    """
+    users = iter(users)
+    first = sorted(islice(users, max_in_memory), key=_radio_id)
+    runs = []
+    try:
+        if len(first) == max_in_memory:
+            runs.append(_write_run(first, directory))
+            while True:
+                batch = sorted(islice(users, max_in_memory), key=_radio_id)
+                if not batch:
+                    break
+                runs.append(_write_run(batch, directory))
+            first = []
+            merged = heapq.merge(*(_read_run(p) for p in runs), key=_radio_id)
+        else:
+            # Everything fit in memory
+            merged = iter(first)
+
+        previous = None
+        for user in merged:
+            if user["radio_id"] != previous:
+                previous = user["radio_id"]
+                yield user
+    finally:
+        for path in runs:
+            os.remove(path)
+
+
+class AnyToneCSVWriter:
+    """Digital contact list CSV, as imported by the AnyTone CPS"""
+
+    HEADER = [
+        "No.",
+        "Radio ID",
+        "Callsign",
+        "Name",
+        "City",
+        "State",
+        "Country",
+        "Remarks",
+        "Call Type",
+        "Call Alert",
+    ]
+
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, users):
+        writer = csv.writer(self.file, quoting=csv.QUOTE_ALL, lineterminator="\r\n")
+        writer.writerow(self.HEADER)
+        count = 0
+        for count, user in enumerate(users, 1):
+            name = " ".join(filter(None, (user["fname"], user["surname"])))
+            writer.writerow(
+                [
+                    count,
+                    user["radio_id"],
+                    user["callsign"],
+                    name,
+                    user["city"],
+                    user["state"],
+                    user["country"],
+                    user["remarks"],
+                    "Private Call",
+                    "None",
+                ]
+            )
+        return count
+
+
+class QDMRUserDBWriter:
+    """
+    User database in the radioid.net JSON layout that qdmr reads, holding
+    only the exported users
+    """
+
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, users):
+        self.file.write('{"users": [\n')
+        count = 0
+        for count, user in enumerate(users, 1):
+            if count > 1:
+                self.file.write(",\n")
+            self.file.write(json.dumps(user, ensure_ascii=False))
+        self.file.write("\n]}\n")
+        return count
+
+
+WRITERS = {"anytone": AnyToneCSVWriter, "qdmr": QDMRUserDBWriter}
+
+
+def export_users(
+    path,
+    source=USERS_PATH,
+    user_filter=None,
+    format="anytone",
+    limit=None,
+    max_in_memory=100_000,
+):
+    """
+    Write the filtered, sorted user database to path.
+
+    Args:
+        path: Output file
+        source: radioid.net users.json
+        user_filter: UserFilter, or None for every user
+        format: "anytone" (CPS CSV) or "qdmr" (JSON user DB)
+        limit: Stop after this many users, e.g. the radio's capacity
+        max_in_memory: Memory budget of the sort, in users
+
+    Returns:
+        Number of users written
+    """
+    users = iter_users(source)
+    if user_filter is not None:
+        users = filter(user_filter.matches, users)
+    directory = os.path.dirname(os.path.abspath(path))
+
+    newline = "" if format == "anytone" else None
+    # closing() removes the sort's runs even when the limit stops it early
+    with contextlib.closing(
+        sorted_users(users, max_in_memory, directory)
+    ) as ordered, open(path, "w", encoding="utf-8", newline=newline) as f:
+        return WRITERS[format](f).write(islice(ordered, limit))
@@ -0,0 +1,395 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from models import (
+    AnalogAdmitCriteria,
+    ChannelWidth,
+    ContactType,
+    DigitalAdmitCriteria,
+    TxPower,
+)
+from pruners import contact_ref
+
+# APRS symbols (primary table) the AnyTone APRS settings can carry, by the
+# names qdmr uses for them
+APRS_ICONS = {
+    "None",
+    "PoliceStation",
+    "Digipeater",
+    "Phone",
+    "DXCluster",
+    "HFGateway",
+    "SmallPlane",
+    "MobileSatelliteStation",
+    "WheelChair",
+    "Snowmobile",
+    "RedCross",
+    "BoyScout",
+    "Home",
+    "X",
+    "RedDot",
+    "Fire",
+    "Campground",
+    "Motorcycle",
+    "RailEngine",
+    "Car",
+    "FileServer",
+    "HCFuture",
+    "AidStation",
+    "BBS",
+    "Canoe",
+    "Eyeball",
+    "Tractor",
+    "GridSquare",
+    "Hotel",
+    "TCPIP",
+    "School",
+    "Logon",
+    "MacOS",
+    "NTSStation",
+    "Balloon",
+    "PoliceCar",
+    "RecreationalVehicle",
+    "Shuttle",
+    "SSTV",
+    "Bus",
+    "ATV",
+    "WXService",
+    "Helo",
+    "Yacht",
+    "MSDOS",
+    "Truck",
+    "Van",
+    "Ambulance",
+    "Bike",
+    "IncidentCommandPost",
+    "FireTruck",
+    "Horse",
+    "Jeep",
+    "Jogger",
+    "Kite",
+    "Sailboat",
+    "Ship",
+    "WaterStation",
+    "Weather",
+}
+
+# Icons dmrconf fails to encode into the binary codeplug for the radio
+# ("The enum value 'Jogger' cannot be encoded", see TODO.md); the radio then
+# picks an icon itself
+UNENCODABLE_APRS_ICONS = {"Jogger"}
+
+
+@dataclass(frozen=True)
+class RadioLimits:
+    """Capacities of a radio's codeplug sections"""
+
+    channels: int
+    zones: int
+    channels_per_zone: int
+    scanlists: int
+    channels_per_scanlist: int
+    grouplists: int
+    contacts_per_grouplist: int
+    contacts: int
+    roaming_channels: int
+    roaming_zones: int
+    channels_per_roaming_zone: int
+    name_length: int = 16
+
+
+@dataclass
+class Issue:
+    severity: str  # "error" or "warning"
+    section: str
+    item: str
+    message: str
+    generator: Optional[str] = None
+
+    def __str__(self):
+        source = f" [from {self.generator}]" if self.generator else ""
+        return f"{self.severity}: {self.section} {self.item}: {self.message}{source}"
+
+
+@dataclass
+class ValidationReport:
+    issues: List[Issue] = field(default_factory=list)
+
+    def errors(self):
+        return [i for i in self.issues if i.severity == "error"]
+
+    def warnings(self):
+        return [i for i in self.issues if i.severity == "warning"]
+
+    @property
+    def ok(self):
+        return not self.errors()
+
+    def summary(self):
+        return f"{len(self.errors())} errors, {len(self.warnings())} warnings"
+
+
+class ValidationError(ValueError):
+    def __init__(self, report):
+        self.report = report
+        lines = [str(issue) for issue in report.errors()]
+        super().__init__(
+            f"Codeplug failed validation ({report.summary()}):\n" + "\n".join(lines)
+        )
+
+
+def tag_generator(items, source):
+    """
+    Record which generator (or recipe step) produced items, so validation
+    issues can name it. Items already tagged keep their first source.
+    """
+    name = source if isinstance(source, str) else type(source).__name__
+    for item in items:
+        if getattr(item, "_generator", None) is None:
+            item._generator = name
+    return items
+
+
+def _list_ref(value):
+    # Generators use "-" or None for "no scan/group list"
+    return None if not value or value == "-" else value
+
+
+class CodeplugValidator:
+    """
+    Structural checks of the in-memory codeplug, run before it is written.
+
+    Checks references between sections (contacts, group lists, scan lists,
+    zones, APRS configurations), name lengths, the radio's capacity limits,
+    duplicate IDs and enum values. Every check is a lookup in an ID index,
+    so validating even a full radio takes milliseconds.
+
+    Usage:
+        report = CodeplugValidator(AT878UV.LIMITS).validate(
+            contacts=contacts, digital_channels=digital_channels, ...
+        )
+        if not report.ok:
+            raise ValidationError(report)
+    """
+
+    def __init__(self, limits: RadioLimits):
+        self.limits = limits
+
+    def validate(
+        self,
+        *,
+        contacts=(),
+        grouplists=(),
+        scanlists=(),
+        analog_channels=(),
+        digital_channels=(),
+        zones=(),
+        roaming_channels=(),
+        roaming_zones=(),
+        analog_aprs_config=None,
+        digital_aprs_config=None,
+    ) -> ValidationReport:
+        self.report = ValidationReport()
+        channels = list(analog_channels) + list(digital_channels)
+
+        contact_ids = self._index("contact", contacts)
+        grouplist_ids = self._index("grouplist", grouplists)
+        scanlist_ids = self._index("scanlist", scanlists)
+        channel_ids = self._index("channel", channels)
+        self._index("zone", zones)
+        roaming_ids = self._index("roaming channel", roaming_channels)
+        self._index("roaming zone", roaming_zones)
+
+        limits = self.limits
+        self._capacity("channel", channels, limits.channels)
+        self._capacity("zone", zones, limits.zones)
+        self._capacity("scanlist", scanlists, limits.scanlists)
+        self._capacity("grouplist", grouplists, limits.grouplists)
+        self._capacity("contact", contacts, limits.contacts)
+        self._capacity("roaming channel", roaming_channels, limits.roaming_channels)
+        self._capacity("roaming zone", roaming_zones, limits.roaming_zones)
+
+        for contact in contacts:
+            self._name("contact", contact)
+            self._enum("contact", contact, "type", contact.type, ContactType)
+
+        for gpl in grouplists:
+            self._name("grouplist", gpl)
+            self._members(
+                "grouplist",
+                gpl,
+                [contact_ref(c) for c in gpl.contact_ids],
+                contact_ids,
+                "contact",
+                limits.contacts_per_grouplist,
+            )
+
+        for scanlist in scanlists:
+            self._name("scanlist", scanlist)
+            self._members(
+                "scanlist",
+                scanlist,
+                scanlist.channels,
+                channel_ids,
+                "channel",
+                limits.channels_per_scanlist,
+            )
+
+        for zone in zones:
+            self._name("zone", zone)
+            self._members(
+                "zone",
+                zone,
+                zone.channels,
+                channel_ids,
+                "channel",
+                limits.channels_per_zone,
+            )
+
+        for zone in roaming_zones:
+            self._name("roaming zone", zone)
+            self._members(
+                "roaming zone",
+                zone,
+                zone.channels,
+                roaming_ids,
+                "roaming channel",
+                limits.channels_per_roaming_zone,
+            )
+
+        aprs_ids = {
+            aprs.internal_id
+            for aprs in (analog_aprs_config, digital_aprs_config)
+            if aprs is not None
+        }
+
+        for chan in analog_channels:
+            self._channel(chan, scanlist_ids, aprs_ids)
+            self._enum("channel", chan, "admit", chan.admit_crit, AnalogAdmitCriteria)
+            self._enum("channel", chan, "width", chan.width, ChannelWidth)
+
+        for chan in digital_channels:
+            self._channel(chan, scanlist_ids, aprs_ids)
+            self._enum("channel", chan, "admit", chan.admit_crit, DigitalAdmitCriteria)
+            if chan.slot not in (1, 2):
+                self._add("error", "channel", chan, f"invalid time slot {chan.slot}")
+            if not (isinstance(chan.color, int) and 0 <= chan.color <= 15):
+                self._add("error", "channel", chan, f"invalid color code {chan.color}")
+            self._reference(
+                "channel", chan, "contact", contact_ref(chan.tx_contact_id), contact_ids
+            )
+            self._reference(
+                "channel",
+                chan,
+                "grouplist",
+                _list_ref(chan.rx_grouplist_id),
+                grouplist_ids,
+            )
+
+        if digital_aprs_config is not None:
+            self._reference(
+                "digital APRS",
+                digital_aprs_config,
+                "contact",
+                contact_ref(digital_aprs_config.contact_id),
+                contact_ids,
+            )
+            self._period("digital APRS", digital_aprs_config)
+        if analog_aprs_config is not None:
+            self._analog_aprs(analog_aprs_config, channel_ids)
+
+        return self.report
+
+    def _add(self, severity, section, item, message):
+        name = getattr(item, "name", None) or f"#{item.internal_id}"
+        self.report.issues.append(
+            Issue(
+                severity,
+                section,
+                f"{name!r}",
+                message,
+                getattr(item, "_generator", None),
+            )
+        )
+
+    def _index(self, section, items):
+        ids = set()
+        for item in items:
+            if item.internal_id in ids:
+                self._add("error", section, item, f"duplicate ID {item.internal_id}")
+            ids.add(item.internal_id)
+        return ids
+
+    def _capacity(self, section, items, limit):
+        if len(items) > limit:
+            self.report.issues.append(
+                Issue(
+                    "error",
+                    section,
+                    "*",
+                    f"{len(items)} {section}s exceed the radio's {limit}",
+                )
+            )
+
+    def _name(self, section, item):
+        if len(item.name) > self.limits.name_length:
+            self._add(
+                "warning",
+                section,
+                item,
+                f"name longer than {self.limits.name_length} characters is truncated",
+            )
+
+    def _enum(self, section, item, field_name, value, enum):
+        if value not in enum.__members__.values():
+            self._add("error", section, item, f"invalid {field_name} {value!r}")
+
+    def _reference(self, section, item, kind, ref, ids):
+        if ref is not None and ref not in ids:
+            self._add("error", section, item, f"refers to missing {kind} {ref!r}")
+
+    def _members(self, section, item, refs, ids, kind, limit):
+        missing = [ref for ref in refs if ref not in ids]
+        if missing:
+            self._add(
+                "error", section, item, f"refers to missing {kind}s {missing[:5]!r}"
+            )
+        if len(refs) > limit:
+            self._add(
+                "error",
+                section,
+                item,
+                f"{len(refs)} {kind}s exceed the radio's {limit}",
+            )
+
+    def _channel(self, chan, scanlist_ids, aprs_ids):
+        self._name("channel", chan)
+        self._enum("channel", chan, "power", chan.tx_power, TxPower)
+        try:
+            chan.band()
+        except ValueError as e:
+            self._add("error", "channel", chan, str(e))
+        self._reference(
+            "channel", chan, "scanlist", _list_ref(chan.scanlist_id), scanlist_ids
+        )
+        if chan.aprs is not None:
+            self._reference("channel", chan, "APRS", chan.aprs.internal_id, aprs_ids)
+
+    def _analog_aprs(self, aprs, channel_ids):
+        self._reference("analog APRS", aprs, "channel", aprs.channel_id, channel_ids)
+        if aprs.icon not in APRS_ICONS:
+            self._add("error", "analog APRS", aprs, f"unknown icon {aprs.icon!r}")
+        elif aprs.icon in UNENCODABLE_APRS_ICONS:
+            self._add(
+                "warning",
+                "analog APRS",
+                aprs,
+                f"icon {aprs.icon!r} cannot be encoded for the radio",
+            )
+        self._period("analog APRS", aprs)
+
+    def _period(self, kind, aprs):
+        if aprs.period <= 0 or aprs.period % 10:
+            self._add(
+                "error", kind, aprs, f"period {aprs.period} is not a multiple of 10s"
+            )
@@ -95,8 +95,8 @@ class QDMRWriter:
                     # "vox": False,
                     "scanList": (
                         fmt_scanlist_id(chan.scanlist_id)
-                        if chan.scanlist_id
-                        else chan.scanlist_id
+                        if chan.scanlist_id and chan.scanlist_id != "-"
+                        else None
                     ),
                     "admit": chan.admit_crit,
                     "squelch": 1,
@@ -131,8 +131,8 @@ class QDMRWriter:
                     # "vox": False,
                     "scanList": (
                         fmt_scanlist_id(chan.scanlist_id)
-                        if chan.scanlist_id
-                        else chan.scanlist_id
+                        if chan.scanlist_id and chan.scanlist_id != "-"
+                        else None
                     ),
                     "admit": chan.admit_crit,
                     "colorCode": chan.color,
@@ -9,7 +9,7 @@ from pathlib import Path
 # Add parent directory to path to import codeplug modules
 sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
 
-from models import AnalogChannel, TxPower, ChannelWidth
+from models import AnalogChannel, TxPower, ChannelWidth, RepeaterSite
 from generators import Sequence
 from filters import BandFilter, FilterChain
 
@@ -48,8 +48,6 @@ class MockAnalogChannelGenerator:
                 AnalogChannel(
                     internal_id=sequence.next(),
                     name=name,
-                    rx_freq=rx_freq,
-                    tx_freq=rx_freq + 0.600,  # Standard offset
                     tx_power=TxPower.High,
                     scanlist_id=None,
                     tot=None,
@@ -60,11 +58,10 @@ class MockAnalogChannelGenerator:
                     tx_tone=None,
                     width=ChannelWidth.Narrow,
                     aprs=None,
-                    _lat=None,
-                    _lng=None,
-                    _locator=None,
-                    _rpt_callsign=None,
-                    _qth=None,
+                    site=RepeaterSite.shared(
+                        rx_freq=rx_freq,
+                        tx_freq=rx_freq + 0.600,  # Standard offset
+                    ),
                 )
             )
 
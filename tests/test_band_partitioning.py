@@ -0,0 +1,157 @@
+"""Tests for single-pass band partitioning of RepeaterBook analog channels"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from filters import BaseFilter, BandFilter, DistanceFilter, FilterChain
+from generators import Sequence
+from generators.analogchan import AnalogChannelGeneratorFromRepeaterBook
+
+BANDS = [(144.0, 148.0), (420.0, 450.0)]
+
+SOURCE = {
+    "results": [
+        {
+            "Callsign": "W6AAA",
+            "Nearest City": "Mountain View",
+            "Frequency": "442.1000",
+            "Input Freq": "447.1000",
+            "PL": "100.0",
+            "Lat": "37.39",
+            "Long": "-122.08",
+            "FM Analog": "Yes",
+        },
+        {
+            "Callsign": "W6BBB",
+            "Nearest City": "Palo Alto",
+            "Frequency": "145.2300",
+            "Input Freq": "144.6300",
+            "PL": "",
+            "TSQ": "88.5",
+            "Lat": "37.44",
+            "Long": "-122.14",
+            "FM Analog": "Yes",
+        },
+        {
+            "Callsign": "W6CCC",
+            "Nearest City": "Sacramento",
+            "Frequency": "146.9400",
+            "Input Freq": "146.3400",
+            "Lat": "38.58",
+            "Long": "-121.49",
+            "FM Analog": "Yes",
+        },
+        {
+            "Callsign": "W6DDD",
+            "Nearest City": "San Jose",
+            "Frequency": "224.5000",
+            "Input Freq": "222.9000",
+            "Lat": "37.33",
+            "Long": "-121.89",
+            "FM Analog": "Yes",
+        },
+        {
+            "Callsign": "W6EEE",
+            "Nearest City": "Sunnyvale",
+            "Frequency": "147.3900",
+            "Input Freq": "147.9900",
+            "Lat": "37.37",
+            "Long": "-122.04",
+            "FM Analog": "Yes",
+        },
+        {
+            "Callsign": "W6FFF",
+            "Nearest City": "Sunnyvale",
+            "Frequency": "441.0000",
+            "Input Freq": "446.0000",
+            "Lat": "37.37",
+            "Long": "-122.04",
+            "FM Analog": "No",
+        },
+    ]
+}
+
+
+class CountingFilter(BaseFilter):
+    def __init__(self):
+        self.seen = []
+
+    def should_include(self, item):
+        self.seen.append(item.name)
+        return (True, "")
+
+
+def distance_filter():
+    return DistanceFilter(
+        reference_lat=37.3861, reference_lng=-122.0839, max_distance_km=50.0
+    )
+
+
+def test_single_pass_matches_per_band_generators():
+    per_band_seq = Sequence()
+    per_band = []
+    for band in BANDS:
+        generator = AnalogChannelGeneratorFromRepeaterBook(
+            SOURCE,
+            "High",
+            aprs=None,
+            filter_chain=FilterChain([distance_filter(), BandFilter([band])]),
+        )
+        per_band += generator.channels(per_band_seq)
+
+    single_pass = AnalogChannelGeneratorFromRepeaterBook(
+        SOURCE,
+        "High",
+        aprs=None,
+        filter_chain=FilterChain([distance_filter()]),
+        bands=BANDS,
+    ).channels(Sequence())
+
+    assert [(c.internal_id, c.name) for c in single_pass] == [
+        (c.internal_id, c.name) for c in per_band
+    ]
+    assert [c.name for c in single_pass] == [
+        "W6BBB Palo Alto",
+        "W6EEE Sunnyvale",
+        "W6AAA Mountain View",
+    ]
+
+
+def test_single_pass_partitions_by_band():
+    generator = AnalogChannelGeneratorFromRepeaterBook(
+        SOURCE,
+        "High",
+        aprs=None,
+        filter_chain=FilterChain([distance_filter()]),
+        bands=BANDS,
+    )
+
+    by_band = generator.channels_by_band(Sequence())
+
+    assert [c.name for c in by_band[(144.0, 148.0)]] == [
+        "W6BBB Palo Alto",
+        "W6EEE Sunnyvale",
+    ]
+    assert [c.internal_id for c in by_band[(420.0, 450.0)]] == [3]
+    assert by_band[(144.0, 148.0)][0].rx_tone == 88.5
+
+
+def test_single_pass_filters_each_in_band_record_once():
+    counting = CountingFilter()
+    AnalogChannelGeneratorFromRepeaterBook(
+        SOURCE,
+        "High",
+        aprs=None,
+        filter_chain=FilterChain([counting]),
+        bands=BANDS,
+    ).channels(Sequence())
+
+    # The 1.25m repeater is rejected by the band check before the filter chain
+    assert counting.seen == [
+        "W6AAA Mountain View",
+        "W6BBB Palo Alto",
+        "W6CCC Sacramento",
+        "W6EEE Sunnyvale",
+    ]
@@ -0,0 +1,153 @@
+"""Tests for concurrency-safe FileCache reads and writes"""
+
+import copy
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources import transport
+from datasources.cache import FileCache, MemoryCache
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def slow_get(downloads, delay=0.2):
+    def get(url, *args, **kwargs):
+        downloads.append(url)
+        time.sleep(delay)
+        return FakeResponse(b'{"value": 1}')
+
+    return get
+
+
+def test_write_cache_leaves_no_temporary_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fc = FileCache("test")
+
+    fc.write_cache("key", {"a": 1})
+    fc.write_cache("key", {"a": 2})
+
+    assert fc.read_cache("key") == {"a": 2}
+    assert sorted(p.name for p in (tmp_path / "cache" / "test").iterdir()) == [
+        "key.json"
+    ]
+
+
+def test_concurrent_misses_download_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    downloads = []
+    monkeypatch.setattr(transport, "get", slow_get(downloads))
+    results = []
+
+    def worker():
+        results.append(FileCache("test").cached("key", "https://example.org/doc"))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert downloads == ["https://example.org/doc"]
+    assert results == [{"value": 1}] * 4
+
+
+def test_corrupted_entries_are_refetched(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    downloads = []
+    monkeypatch.setattr(transport, "get", slow_get(downloads, delay=0))
+    fc = FileCache("test")
+    (tmp_path / "cache" / "test" / "key.json").write_text('{"value": ')
+
+    assert fc.read_cache("key", default="missing") == "missing"
+    assert fc.cached("key", "https://example.org/doc") == {"value": 1}
+    assert downloads == ["https://example.org/doc"]
+    assert fc.read_cache("key") == {"value": 1}
+
+
+def test_error_responses_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    class ErrorResponse(FakeResponse):
+        def raise_for_status(self):
+            raise requests.HTTPError("503 Service Unavailable")
+
+    monkeypatch.setattr(transport, "get", lambda url: ErrorResponse(b"busy"))
+    fc = FileCache("test")
+
+    with pytest.raises(requests.HTTPError):
+        fc.cached("key", "https://example.org/doc")
+    assert fc.read_cache("key") is None
+
+
+def test_repeated_lookups_are_served_from_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    downloads = []
+    monkeypatch.setattr(transport, "get", slow_get(downloads, delay=0))
+    FileCache.memory.clear()
+
+    first = FileCache("test").cached("key", "https://example.org/doc")
+    # Gone from disk, but still in memory
+    (tmp_path / "cache" / "test" / "key.json").unlink()
+    second = FileCache("test").cached("key", "https://example.org/doc")
+
+    assert second is first
+    assert downloads == ["https://example.org/doc"]
+    assert FileCache.memory.stats()["hits"] == 1
+
+
+def test_memory_values_are_read_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fc = FileCache("test")
+    fc.write_cache("key", {"devices": [{"id": 1}]})
+    monkeypatch.setattr(transport, "get", slow_get([], delay=0))
+
+    value = fc.cached("key", "https://example.org/doc")
+
+    with pytest.raises(TypeError):
+        value["devices"].append({"id": 2})
+    with pytest.raises(TypeError):
+        value["devices"][0]["id"] = 2
+    mutable = copy.deepcopy(value)
+    mutable["devices"].append({"id": 2})
+    assert value == {"devices": [{"id": 1}]}
+    assert json.loads(json.dumps(value)) == value
+
+
+def test_writes_invalidate_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fc = FileCache("test")
+    fc.write_cache("key", [1])
+    assert fc.cached("key", "https://example.org/doc") == [1]
+
+    fc.write_cache("key", [2])
+
+    assert fc.cached("key", "https://example.org/doc") == [2]
+
+
+def test_memory_cache_is_bounded():
+    memory = MemoryCache(max_entries=2, max_bytes=100)
+    memory.put("a", 1, 10)
+    memory.put("b", 2, 10)
+    memory.get("a")
+    memory.put("c", 3, 10)
+
+    assert memory.get("b") == (False, None)
+    assert memory.get("a") == (True, 1)
+
+    memory.put("big", 4, 95)
+    assert memory.stats()["entries"] == 1
+    assert memory.stats()["bytes"] == 95
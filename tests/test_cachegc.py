@@ -0,0 +1,93 @@
+"""Tests for cache accounting and garbage collection"""
+
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources import cache
+from datasources.cache import FileCache
+from datasources.cachegc import cache_stats, collect_garbage, parse_size
+
+DAY = 24 * 3600
+
+
+def make_entry(root, prefix, name, size, age_days):
+    directory = root / prefix
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    when = time.time() - age_days * DAY
+    os.utime(path, (when, when))
+    return path
+
+
+def remaining(root):
+    return sorted(f"{p.parent.name}/{p.name}" for p in root.rglob("*") if p.is_file())
+
+
+def test_parse_size():
+    assert parse_size("500") == 500
+    assert parse_size("2K") == 2048
+    assert parse_size("1.5M") == 1572864
+    assert parse_size("1gb") == 1024**3
+
+
+def test_stats_per_prefix(tmp_path):
+    make_entry(tmp_path, "static_talkgroups", "1.json", 100, 3)
+    make_entry(tmp_path, "static_talkgroups", "2.json", 50, 1)
+    make_entry(tmp_path, "static_talkgroups", ".1.lock", 0, 0)
+    make_entry(tmp_path, "nominatim", "q.json", 10, 0)
+
+    stats = cache_stats(tmp_path)
+
+    assert stats["static_talkgroups"]["entries"] == 2
+    assert stats["static_talkgroups"]["bytes"] == 150
+    assert stats["nominatim"]["entries"] == 1
+
+
+def test_gc_evicts_by_age_then_lru(tmp_path):
+    make_entry(tmp_path, "static_talkgroups", "old.json", 10, 40)
+    make_entry(tmp_path, "static_talkgroups", "lru.json", 100, 5)
+    make_entry(tmp_path, "static_talkgroups", "hot.json", 100, 0)
+    make_entry(tmp_path, "static_talkgroups", "_sync_state.json", 100, 60)
+    make_entry(tmp_path, "gazetteer", "index.json", 100, 90)
+
+    evicted = collect_garbage(tmp_path, max_bytes=350, max_age=timedelta(days=30))
+
+    assert [Path(e.path).name for e in evicted] == ["old.json", "lru.json"]
+    assert remaining(tmp_path) == [
+        "gazetteer/index.json",
+        "static_talkgroups/_sync_state.json",
+        "static_talkgroups/hot.json",
+    ]
+
+
+def test_gc_dry_run_and_prefix_selection(tmp_path):
+    make_entry(tmp_path, "a", "1.json", 10, 40)
+    make_entry(tmp_path, "b", "1.json", 10, 40)
+
+    evicted = collect_garbage(tmp_path, max_age=timedelta(days=30), dry_run=True)
+    assert len(evicted) == 2
+    assert len(remaining(tmp_path)) == 2
+
+    collect_garbage(tmp_path, max_age=timedelta(days=30), prefixes=["a"])
+    assert remaining(tmp_path) == ["b/1.json"]
+
+
+def test_reads_record_access_without_changing_snapshot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fc = FileCache("test")
+    fc.write_cache("key", {"a": 1})
+    path = tmp_path / "cache" / "test" / "key.json"
+    long_ago = time.time() - 10 * DAY
+    os.utime(path, (long_ago, long_ago))
+    snapshot = fc.snapshot_id("key")
+
+    fc.read_cache("key")
+
+    assert path.stat().st_atime > time.time() - cache.ACCESS_RESOLUTION
+    assert fc.snapshot_id("key") == snapshot
@@ -0,0 +1,148 @@
+"""Tests for the SQLite repeater catalog"""
+
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources.catalog import RepeaterCatalog, bounding_box, query_catalog
+from datasources.records import RepeaterRecord
+
+
+def record(source, source_id, callsign, rx_freq, lat, lng, **kwargs):
+    fields = dict(
+        source=source,
+        source_id=source_id,
+        callsign=callsign,
+        rx_freq=rx_freq,
+        tx_freq=rx_freq - 0.6,
+        rx_tone=None,
+        tx_tone=None,
+        color_code=None,
+        lat=lat,
+        lng=lng,
+        locator=None,
+        qth=None,
+        analog=True,
+        dmr=False,
+        hotspot=False,
+        status=None,
+        last_seen=None,
+    )
+    fields.update(kwargs)
+    return RepeaterRecord(**fields)
+
+
+RB = [
+    record("repeaterbook", "06-1", "W6AAA", 145.23, 37.44, -122.14),
+    record("repeaterbook", "06-2", "W6BBB", 442.10, 37.39, -122.08),
+    record("repeaterbook", "06-3", "W6CCC", 146.94, 38.58, -121.49),
+    record("repeaterbook", "06-4", "W6DDD", 147.39, None, None),
+]
+BM = [
+    record("brandmeister", "1", "W6DMR", 444.5, 37.37, -122.04, analog=False, dmr=True),
+    record("brandmeister", "2", "W6HS", 438.8, 37.37, -122.04, hotspot=True),
+]
+
+
+@pytest.fixture
+def catalog():
+    catalog = RepeaterCatalog(":memory:")
+    catalog.ingest("repeaterbook", RB)
+    catalog.ingest("brandmeister", BM)
+    yield catalog
+    catalog.close()
+
+
+def test_round_trips_records(catalog):
+    assert catalog.sources() == {"brandmeister": 2, "repeaterbook": 4}
+    assert catalog.query(sources=["repeaterbook"]) == sorted(
+        RB, key=lambda r: r.rx_freq
+    )
+
+
+def test_near_and_band_query(catalog):
+    found = catalog.query(near=(37.3861, -122.0839, 50), bands=[(144.0, 148.0)])
+
+    assert [r.callsign for r in found] == ["W6AAA"]
+
+
+def test_mode_hotspot_and_callsign_filters(catalog):
+    assert [r.callsign for r in catalog.query(dmr=True)] == ["W6DMR"]
+    assert [r.callsign for r in catalog.query(callsign="W6H%", hotspots=True)] == [
+        "W6HS"
+    ]
+    assert catalog.query(callsign="W6H%") == []
+
+
+def test_reingest_replaces_source_rows(catalog):
+    updated = replace(RB[0], lat=40.71, lng=-74.0)
+    assert catalog.ingest("repeaterbook", [updated, updated]) == 1
+
+    assert catalog.query(bbox=bounding_box(37.39, -122.08, 50), sources=None) == [BM[0]]
+    assert catalog.query(near=(40.7128, -74.006, 10)) == [updated]
+
+
+def test_ingest_rejects_records_from_other_sources(catalog):
+    with pytest.raises(ValueError):
+        catalog.ingest("repeaterbook", BM)
+    # The failed ingest left the previous rows in place
+    assert catalog.sources()["repeaterbook"] == 4
+
+
+def test_bounding_box_widens_across_antimeridian():
+    assert bounding_box(0.0, 179.9, 50)[2:] == (-180.0, 180.0)
+
+
+def test_query_catalog_needs_the_source(tmp_path):
+    path = str(tmp_path / "catalog.sqlite")
+    assert query_catalog(path, "repeaterbook") is None
+
+    catalog = RepeaterCatalog(path)
+    catalog.ingest("repeaterbook", RB)
+    catalog.close()
+
+    assert query_catalog(path, "brandmeister") is None
+    near = query_catalog(path, "repeaterbook", near=(37.39, -122.08, 20))
+    assert [r.callsign for r in near] == ["W6AAA", "W6BBB"]
+
+
+def test_query_catalog_needs_the_regions(tmp_path):
+    path = str(tmp_path / "catalog.sqlite")
+    ny = record("repeaterbook", "36-1", "W2AAA", 147.0, 40.71, -74.0)
+    nj = record("repeaterbook", "34-1", "W2BBB", 146.7, 40.73, -74.17)
+    catalog = RepeaterCatalog(path)
+    catalog.ingest_regions(
+        "repeaterbook",
+        {
+            "United States:36": [ny],
+            "United States:34": [nj, replace(ny, source_id="34-2")],
+        },
+    )
+    catalog.close()
+
+    assert query_catalog(path, "repeaterbook", regions=["United States:06"]) is None
+    assert query_catalog(path, "repeaterbook", regions=["United States:34"]) == [nj]
+    # A repeater listed in both regions is kept in the first
+    both = query_catalog(
+        path, "repeaterbook", regions=["United States:36", "United States:34"]
+    )
+    assert [r.source_id for r in both] == ["34-1", "36-1"]
+
+
+def test_query_catalog_rejects_stale_snapshots(tmp_path):
+    path = str(tmp_path / "catalog.sqlite")
+    catalog = RepeaterCatalog(path)
+    catalog.ingest("brandmeister", BM, snapshots={"repeaters": "100-5"})
+    catalog.close()
+
+    current = {"repeaters": "100-5"}
+    assert query_catalog(path, "brandmeister", snapshot_id=current.get) == [BM[0]]
+
+    current["repeaters"] = "200-7"
+    assert query_catalog(path, "brandmeister", snapshot_id=current.get) is None
+    del current["repeaters"]
+    assert query_catalog(path, "brandmeister", snapshot_id=current.get) is None
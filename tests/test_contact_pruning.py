@@ -0,0 +1,108 @@
+"""Tests for pruning unreferenced contacts"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from models import (
+    Contact,
+    ContactType,
+    DigitalAPRSConfig,
+    DigitalChannel,
+    GroupList,
+    RepeaterSite,
+    TxPower,
+)
+from pruners import ContactPruner
+
+
+def make_contact(internal_id, calling_id, type=ContactType.GroupCall):
+    return Contact(
+        internal_id=internal_id,
+        name=f"TG{calling_id}",
+        type=type,
+        calling_id=calling_id,
+    )
+
+
+def make_channel(internal_id, tx_contact_id, aprs=None):
+    return DigitalChannel(
+        internal_id=internal_id,
+        name=f"Channel {internal_id}",
+        tx_power=TxPower.High,
+        scanlist_id="-",
+        tot=None,
+        rx_only=False,
+        admit_crit="Free",
+        slot=1,
+        rx_grouplist_id=None,
+        tx_contact_id=tx_contact_id,
+        aprs=aprs,
+        anytone=None,
+        site=RepeaterSite.shared(
+            rx_freq=439.0, tx_freq=431.4, callsign="SR5WA", color=1
+        ),
+    )
+
+
+def test_prune_keeps_only_referenced_contacts():
+    contacts = [make_contact(i, 260 + i) for i in range(1, 7)]
+    channels = [make_channel(1, "2"), make_channel(2, 4)]
+    grouplists = [GroupList(internal_id=1, name="RX", contact_ids=[4, 5])]
+
+    kept = ContactPruner().prune(contacts, channels=channels, grouplists=grouplists)
+
+    assert [c.calling_id for c in kept] == [262, 264, 265]
+
+
+def test_prune_renumbers_and_rewrites_references():
+    contacts = [make_contact(i, 260 + i) for i in range(1, 7)]
+    aprs = DigitalAPRSConfig(internal_id=1, name="DMR APRS", period=60, contact_id=6)
+    channels = [make_channel(1, "3", aprs=aprs), make_channel(2, 3, aprs=aprs)]
+    grouplists = [GroupList(internal_id=1, name="RX", contact_ids=[3, 5])]
+
+    kept = ContactPruner().prune(
+        contacts,
+        channels=channels,
+        grouplists=grouplists,
+        aprs_configs=[aprs, aprs],
+    )
+
+    assert [c.internal_id for c in kept] == [1, 2, 3]
+    by_id = {c.internal_id: c.calling_id for c in kept}
+    assert by_id[channels[0].tx_contact_id] == 263
+    assert by_id[channels[1].tx_contact_id] == 263
+    assert [by_id[cid] for cid in grouplists[0].contact_ids] == [263, 265]
+    assert by_id[aprs.contact_id] == 266
+
+
+def test_prune_allowlist_keeps_unreferenced_contacts():
+    contacts = [make_contact(1, 9990, ContactType.PrivateCall), make_contact(2, 91)]
+    channels = [make_channel(1, None)]
+
+    kept = ContactPruner(allowlist=[9990]).prune(contacts, channels=channels)
+
+    assert [c.calling_id for c in kept] == [9990]
+
+
+def test_prune_without_renumber_keeps_ids():
+    contacts = [make_contact(i, 260 + i) for i in range(1, 5)]
+    channels = [make_channel(1, 4)]
+
+    kept = ContactPruner(renumber=False).prune(contacts, channels=channels)
+
+    assert [c.internal_id for c in kept] == [4]
+    assert channels[0].tx_contact_id == 4
+
+
+def test_prune_leaves_empty_references_alone():
+    contacts = [make_contact(1, 91), make_contact(2, 92)]
+    channels = [make_channel(1, None), make_channel(2, "-"), make_channel(3, 2)]
+
+    kept = ContactPruner().prune(contacts, channels=channels)
+
+    assert [c.calling_id for c in kept] == [92]
+    assert channels[0].tx_contact_id is None
+    assert channels[1].tx_contact_id == "-"
+    assert channels[2].tx_contact_id == 1
@@ -0,0 +1,114 @@
+"""Tests for the memory-mapped columnar Brandmeister device store"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources.devicestore import DeviceStore, partition_key
+from datasources.records import from_brandmeister, normalize
+
+DEVICES = [
+    {
+        "id": 260201,
+        "callsign": "SR2UVG",
+        "rx": "430.4250",
+        "tx": "438.0250",
+        "colorcode": 1,
+        "lat": 54.35,
+        "lng": 18.65,
+        "city": "Gdańsk",
+        "pep": 10,
+        "statusText": "DMR",
+        "last_seen": "2026-10-01 12:00:00",
+    },
+    {
+        "id": 260202,
+        "callsign": "SR2HS",
+        "rx": "439.1000",
+        "tx": "439.1000",
+        "colorcode": None,
+        "lat": None,
+        "lng": None,
+        "city": "Gdańsk",
+        "pep": 1,
+        "statusText": "DMO",
+        "last_seen": None,
+    },
+    {
+        "id": 310501,
+        "callsign": "W6DMR",
+        "rx": "439.5000",
+        "tx": "444.5000",
+        "colorcode": 3,
+        "lat": 37.37,
+        "lng": -122.04,
+        "city": "Sunnyvale",
+        "pep": 50,
+        "statusText": "DMR",
+        "last_seen": "2026-09-01 08:30:00",
+    },
+]
+
+RECORDS = normalize(from_brandmeister, DEVICES)
+
+
+def test_partition_key_is_mcc():
+    assert partition_key("260201") == "260"
+
+
+def test_round_trips_records_per_partition(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = DeviceStore()
+    store.sync("snap-1", lambda: RECORDS)
+
+    assert store.prefixes() == ["260", "310"]
+    assert store.records(hotspots=True) == RECORDS
+    assert store.records(["260"], hotspots=True) == RECORDS[:2]
+    assert (tmp_path / "cache" / "bm_devices_columnar" / "260.bin").exists()
+
+
+def test_filters_run_on_columns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = DeviceStore()
+    store.sync("snap-1", lambda: RECORDS)
+    partition = store.partition("260")
+
+    assert partition.select() == [0]
+    assert partition.select(hotspots=True, bands=[(439.0, 440.0)]) == [1]
+    assert store.records(bbox=(37.0, 38.0, -123.0, -122.0)) == [RECORDS[2]]
+
+
+def test_rebuilds_only_on_new_snapshot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    builds = []
+
+    def build(records):
+        def inner():
+            builds.append(1)
+            return records
+
+        return inner
+
+    DeviceStore().sync("snap-1", build(RECORDS))
+    store = DeviceStore()
+    store.sync("snap-1", build(RECORDS))
+    assert len(builds) == 1
+    assert store.records(hotspots=True) == RECORDS
+
+    store = DeviceStore()
+    store.sync("snap-2", build(RECORDS[:2]))
+    assert len(builds) == 2
+    assert store.prefixes() == ["260"]
+    assert not (tmp_path / "cache" / "bm_devices_columnar" / "310.bin").exists()
+
+
+def test_unsynced_store_uses_the_last_sync(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match="sync"):
+        DeviceStore().prefixes()
+
+    DeviceStore().sync("snap-1", lambda: RECORDS)
+    assert DeviceStore().records(["310"]) == [RECORDS[2]]
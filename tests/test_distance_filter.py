@@ -3,7 +3,12 @@
 Test script to demonstrate the DistanceFilter functionality.
 """
 
-from codeplug.models import DigitalChannel, TxPower, DigitalAnytoneExtensions
+from codeplug.models import (
+    DigitalChannel,
+    TxPower,
+    DigitalAnytoneExtensions,
+    RepeaterSite,
+)
 from codeplug.generators import Sequence
 from codeplug.filters import DistanceFilter, FilterChain, haversine_distance
 
@@ -54,24 +59,19 @@ class MockChannelGenerator:
                 DigitalChannel(
                     internal_id=sequence.next(),
                     name=name,
-                    rx_freq=145.500,
-                    tx_freq=145.500,
                     tx_power=TxPower.High,
                     scanlist_id=None,
                     tot=None,
                     rx_only=False,
                     admit_crit="Always",
-                    color=1,
                     slot=2,
                     rx_grouplist_id=None,
                     tx_contact_id=None,
                     aprs=None,
                     anytone=anytone_ext,
-                    _lat=lat,
-                    _lng=lng,
-                    _locator=None,
-                    _rpt_callsign=None,
-                    _qth=None,
+                    site=RepeaterSite.shared(
+                        rx_freq=145.500, tx_freq=145.500, color=1, lat=lat, lng=lng
+                    ),
                 )
             )
 
@@ -0,0 +1,153 @@
+"""Tests for the offline gazetteer geocoder"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources.gazetteer import (
+    ChainedGeocoder,
+    GazetteerGeocoder,
+    normalize_place,
+)
+
+GEONAMES_ROWS = [
+    # geonameid, name, asciiname, alternatenames, lat, lon, class, code, country,
+    # cc2, admin1, admin2, admin3, admin4, population, elevation, dem, tz, modified
+    ("5375480", "Mountain View", "Mountain View", "", "37.38605", "-122.08385")
+    + ("P", "PPL", "US", "", "CA", "085", "", "", "82376", "", "32")
+    + ("America/Los_Angeles", "2019-09-05"),
+    ("4407066", "St. Louis", "St. Louis", "", "38.62727", "-90.19789")
+    + ("P", "PPLA2", "US", "", "MO", "510", "", "", "315685", "", "149")
+    + ("America/Chicago", "2019-09-05"),
+    ("5128581", "New York City", "New York City", "", "40.71427", "-74.00597")
+    + ("P", "PPL", "US", "", "NY", "", "", "", "8804190", "", "57")
+    + ("America/New_York", "2022-05-17"),
+    ("5128638", "Kraków", "Krakow", "", "50.06143", "19.93658")
+    + ("P", "PPLA", "PL", "", "77", "1261", "", "", "804237", "", "219")
+    + ("Europe/Warsaw", "2023-01-10"),
+    ("5101798", "Newark", "Newark", "", "40.73566", "-74.17237")
+    + ("P", "PPL", "US", "", "NJ", "013", "", "", "281944", "", "9")
+    + ("America/New_York", "2017-05-23"),
+    ("4964462", "Newark", "Newark", "", "39.68372", "-75.74966")
+    + ("P", "PPL", "US", "", "DE", "003", "", "", "31454", "", "38")
+    + ("America/New_York", "2017-05-23"),
+]
+
+
+@pytest.fixture
+def geonames(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dump = tmp_path / "cities.txt"
+    dump.write_text(
+        "\n".join("\t".join(row) for row in GEONAMES_ROWS) + "\n", encoding="utf-8"
+    )
+    admin1 = tmp_path / "admin1CodesASCII.txt"
+    admin1.write_text(
+        "US.CA\tCalifornia\tCalifornia\t5332921\n"
+        "US.MO\tMissouri\tMissouri\t4398678\n"
+        "US.NY\tNew York\tNew York\t5128638\n"
+        "US.NJ\tNew Jersey\tNew Jersey\t5101760\n"
+        "US.DE\tDelaware\tDelaware\t4142224\n"
+        "PL.77\tLesser Poland\tLesser Poland\t858785\n",
+        encoding="utf-8",
+    )
+    country_info = tmp_path / "countryInfo.txt"
+    country_info.write_text(
+        "#ISO\tISO3\tISO-Numeric\tfips\tCountry\n"
+        "US\tUSA\t840\tUS\tUnited States\n"
+        "PL\tPOL\t616\tPL\tPoland\n",
+        encoding="utf-8",
+    )
+    GazetteerGeocoder().build_index(
+        str(dump), admin1_path=str(admin1), country_info_path=str(country_info)
+    )
+    return tmp_path
+
+
+def test_normalize_place():
+    assert normalize_place("St. Louis") == "saint louis"
+    assert normalize_place("  Kraków ") == "krakow"
+    assert normalize_place("Mt. Hamilton") == "mount hamilton"
+
+
+def test_geocode_exact_match(geonames):
+    coords = GazetteerGeocoder().geocode("Mountain View", "California", "United States")
+    assert coords == {"lat": 37.38605, "lon": -122.08385}
+
+
+def test_geocode_accepts_codes_and_abbreviations(geonames):
+    coords = GazetteerGeocoder().geocode("Saint Louis", "MO", "US")
+    assert coords == {"lat": 38.62727, "lon": -90.19789}
+
+
+def test_geocode_prefers_state_over_population(geonames):
+    coords = GazetteerGeocoder().geocode("Newark", "Delaware", "United States")
+    assert coords == {"lat": 39.68372, "lon": -75.74966}
+
+
+def test_geocode_without_state_picks_most_populous(geonames):
+    coords = GazetteerGeocoder().geocode("Newark", None, "United States")
+    assert coords == {"lat": 40.73566, "lon": -74.17237}
+
+
+def test_geocode_fuzzy_fallback(geonames):
+    coords = GazetteerGeocoder().geocode("Mountian View", "California", "United States")
+    assert coords == {"lat": 37.38605, "lon": -122.08385, "fuzzy": True}
+
+
+def test_geocode_fuzzy_is_bounded(geonames):
+    # No fuzzy matching without a country, nor across first letters
+    assert GazetteerGeocoder().geocode("Mountian View") is None
+    assert GazetteerGeocoder().geocode("Nountain View", None, "US") is None
+
+
+def test_geocode_miss(geonames):
+    assert (
+        GazetteerGeocoder().geocode("Atlantis", "California", "United States") is None
+    )
+    assert GazetteerGeocoder().geocode("Krakow", None, "Narnia") is None
+    assert GazetteerGeocoder().geocode("", None, None) is None
+
+
+def test_geocode_without_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    geocoder = GazetteerGeocoder()
+    assert not geocoder.available()
+    assert geocoder.geocode("Mountain View", "California", "United States") is None
+
+
+class RecordingGeocoder:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def geocode(self, city, state=None, country=None):
+        self.calls.append((city, state, country))
+        return self.result
+
+
+def test_chained_geocoder_only_falls_through_on_miss(geonames):
+    fallback = RecordingGeocoder({"lat": 1.0, "lon": 2.0})
+    chain = ChainedGeocoder(GazetteerGeocoder(), fallback)
+
+    assert chain.geocode("Krakow", "Lesser Poland", "Poland") == {
+        "lat": 50.06143,
+        "lon": 19.93658,
+    }
+    assert fallback.calls == []
+
+    assert chain.geocode("Atlantis", None, "Poland") == {"lat": 1.0, "lon": 2.0}
+    assert fallback.calls == [("Atlantis", None, "Poland")]
+
+
+def test_chained_geocoder_prefers_exact_hits_over_fuzzy(geonames):
+    query = ("Mountian View", "California", "United States")
+
+    chain = ChainedGeocoder(GazetteerGeocoder(), RecordingGeocoder({"lat": 1.0}))
+    assert chain.geocode(*query) == {"lat": 1.0}
+
+    chain = ChainedGeocoder(GazetteerGeocoder(), RecordingGeocoder(None))
+    assert chain.geocode(*query)["fuzzy"]
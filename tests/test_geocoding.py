@@ -0,0 +1,259 @@
+"""Tests for Nominatim caching and batched geocoding of RepeaterBook results"""
+
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources import repeaterbook, transport
+from datasources.repeaterbook import NominatimGeocoder, RepeaterBookAPI
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def nominatim(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    responses = {}
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        calls.append(params["q"])
+        response = responses.get(params["q"], [])
+        if isinstance(response, Exception):
+            raise response
+        return FakeResponse(response)
+
+    monkeypatch.setattr(transport, "get", fake_get)
+    geocoder = NominatimGeocoder()
+    return geocoder, calls, responses
+
+
+def test_nominatim_caches_hits(nominatim):
+    geocoder, calls, responses = nominatim
+    responses["Albany, New York"] = [{"lat": "42.65", "lon": "-73.75"}]
+
+    assert geocoder.geocode("Albany", "New York") == {"lat": 42.65, "lon": -73.75}
+    assert geocoder.geocode("Albany", "New York") == {"lat": 42.65, "lon": -73.75}
+    assert calls == ["Albany, New York"]
+
+
+def test_nominatim_caches_misses(nominatim):
+    geocoder, calls, _ = nominatim
+
+    assert geocoder.geocode("Nowhere", "New York") is None
+    assert geocoder.geocode("Nowhere", "New York") is None
+    assert calls == ["Nowhere, New York"]
+
+
+def test_nominatim_negative_cache_expires(nominatim):
+    geocoder, calls, _ = nominatim
+
+    assert geocoder.geocode("Nowhere") is None
+    geocoder.write_cache(
+        "geocode_nowhere",
+        {"cached_at": (datetime.now() - timedelta(days=31)).isoformat()},
+    )
+    assert geocoder.geocode("Nowhere") is None
+    assert calls == ["Nowhere", "Nowhere"]
+
+
+def test_nominatim_retries_legacy_negative_entries(nominatim):
+    geocoder, calls, _ = nominatim
+    geocoder.write_cache("geocode_nowhere", None)
+
+    assert geocoder.geocode("Nowhere") is None
+    assert calls == ["Nowhere"]
+
+
+def test_nominatim_does_not_cache_request_failures(nominatim):
+    geocoder, calls, responses = nominatim
+    responses["Albany"] = requests.ConnectionError("offline")
+
+    assert geocoder.geocode("Albany") is None
+    responses["Albany"] = [{"lat": "42.65", "lon": "-73.75"}]
+    assert geocoder.geocode("Albany") == {"lat": 42.65, "lon": -73.75}
+    assert calls == ["Albany", "Albany"]
+
+
+class CountingGeocoder:
+    def __init__(self, known):
+        self.known = known
+        self.batches = []
+
+    def geocode(self, city, state=None, country=None):
+        return self.known.get(city)
+
+    def geocode_many(self, queries):
+        queries = list(queries)
+        self.batches.append(queries)
+        return {query: self.geocode(*query) for query in queries}
+
+
+def test_enhance_geocodes_each_location_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    geocoder = CountingGeocoder({"Albany": {"lat": 42.65, "lon": -73.75}})
+    api = RepeaterBookAPI(geocoder=geocoder)
+    data = {
+        "count": 4,
+        "results": [
+            {"Callsign": "W2A", "Nearest City": "Albany", "State": "New York"},
+            {"Callsign": "W2B", "Nearest City": "Albany ", "State": "New York"},
+            {"Callsign": "W2C", "Nearest City": "Atlantis", "State": "New York"},
+            {"Callsign": "W2D", "Lat": "40.1", "Long": "-74.2"},
+            {"Callsign": "W2E", "Lat": "0", "Long": "0"},
+        ],
+    }
+
+    enhanced = api._enhance_with_coordinates(data)
+
+    assert geocoder.batches == [
+        [("Albany", "New York", None), ("Atlantis", "New York", None)]
+    ]
+    results = enhanced["results"]
+    assert [r["_geocoded"] for r in results] == [True, True, False, False, False]
+    assert (results[0]["Lat"], results[0]["Long"]) == ("42.65", "-73.75")
+    assert (results[1]["Lat"], results[1]["Long"]) == ("42.65", "-73.75")
+    assert "Lat" not in results[2]
+    assert results[3]["Lat"] == "40.1"
+    assert "Lat" not in data["results"][0]
+
+
+@pytest.fixture
+def repeaterbook_api(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    payloads = []
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        return FakeResponse(payloads.pop(0))
+
+    monkeypatch.setattr(transport, "get", fake_get)
+    geocoder = CountingGeocoder(
+        {
+            "Albany": {"lat": 42.65, "lon": -73.75},
+            "Troy": {"lat": 42.73, "lon": -73.69},
+        }
+    )
+    return RepeaterBookAPI(geocoder=geocoder), geocoder, payloads
+
+
+def test_cache_hit_returns_enriched_payload_without_geocoding(repeaterbook_api):
+    api, geocoder, payloads = repeaterbook_api
+    payloads.append(
+        {"count": 1, "results": [{"Callsign": "W2A", "Nearest City": "Albany"}]}
+    )
+
+    fetched = api.get_repeaters_by_state("36")
+    cached = api.get_repeaters_by_state("36")
+
+    assert len(geocoder.batches) == 1
+    assert cached == fetched
+    assert cached["results"][0]["Lat"] == "42.65"
+    assert cached["_enrichment_version"] == repeaterbook.ENRICHMENT_VERSION
+
+
+def test_legacy_cached_payload_is_upgraded_once(repeaterbook_api):
+    api, geocoder, _ = repeaterbook_api
+    api.write_cache(
+        "export.php_country=United States_state_id=36",
+        {"count": 1, "results": [{"Callsign": "W2A", "Nearest City": "Albany"}]},
+    )
+
+    upgraded = api.get_repeaters_by_state("36")
+    again = api.get_repeaters_by_state("36")
+
+    assert len(geocoder.batches) == 1
+    assert upgraded["results"][0]["_enriched"] == repeaterbook.ENRICHMENT_VERSION
+    assert again == upgraded
+
+
+def test_refresh_only_enriches_new_or_changed_records(repeaterbook_api):
+    api, geocoder, payloads = repeaterbook_api
+    payloads.append(
+        {
+            "count": 2,
+            "results": [
+                {"Callsign": "W2A", "Nearest City": "Albany"},
+                {"Callsign": "W2B", "Nearest City": "Albany", "PL": "100.0"},
+            ],
+        }
+    )
+    payloads.append(
+        {
+            "count": 3,
+            "results": [
+                {"Callsign": "W2A", "Nearest City": "Albany"},
+                {"Callsign": "W2B", "Nearest City": "Troy", "PL": "100.0"},
+                {"Callsign": "W2C", "Nearest City": "Troy"},
+            ],
+        }
+    )
+
+    api._make_request("export.php", state_id="36")
+    refreshed = api._make_request("export.php", refresh=True, state_id="36")
+
+    assert geocoder.batches == [[("Albany", None, None)], [("Troy", None, None)]]
+    assert [r["Lat"] for r in refreshed["results"]] == ["42.65", "42.73", "42.73"]
+
+
+def test_concurrent_exports_are_downloaded_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    downloads = []
+
+    def slow_get(url, params=None, headers=None, timeout=None):
+        downloads.append(params)
+        time.sleep(0.2)
+        return FakeResponse({"count": 1, "results": [{"Callsign": "W2D"}]})
+
+    monkeypatch.setattr(transport, "get", slow_get)
+    results = []
+
+    def worker():
+        api = RepeaterBookAPI(geocoder=CountingGeocoder({}))
+        results.append(api.get_repeaters_by_state("36"))
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(downloads) == 1
+    assert len(results) == 3 and results[0] == results[2]
+
+
+def test_concurrent_geocodes_ask_nominatim_once(nominatim, monkeypatch):
+    _, calls, responses = nominatim
+    responses["Albany"] = [{"lat": "42.65", "lon": "-73.75"}]
+    fake_get = transport.get
+
+    def slow_get(*args, **kwargs):
+        time.sleep(0.2)
+        return fake_get(*args, **kwargs)
+
+    monkeypatch.setattr(transport, "get", slow_get)
+    threads = [
+        threading.Thread(target=NominatimGeocoder().geocode, args=("Albany",))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["Albany"]
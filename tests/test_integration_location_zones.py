@@ -15,7 +15,7 @@ from generators.location_zones import (
     DistanceBandedZoneGenerator,
 )
 from aggregators import ZoneAggregator
-from models import DigitalChannel
+from models import DigitalChannel, RepeaterSite
 
 
 def create_integration_test_channels():
@@ -27,90 +27,94 @@ def create_integration_test_channels():
         DigitalChannel(
             internal_id=1,
             name="W2ABC NYC",
-            rx_freq=439.0,
-            tx_freq=439.0,
             tx_power="High",
             scanlist_id=None,
             tot=180,
             rx_only=False,
             admit_crit="Always",
-            color=1,
             slot=1,
             rx_grouplist_id=None,
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=40.7128,
-            _lng=-74.0060,
-            _locator=None,
-            _rpt_callsign="W2ABC",
-            _qth="New York",
+            site=RepeaterSite.shared(
+                rx_freq=439.0,
+                tx_freq=439.0,
+                callsign="W2ABC",
+                color=1,
+                lat=40.7128,
+                lng=-74.0060,
+                qth="New York",
+            ),
         ),
         DigitalChannel(
             internal_id=2,
             name="W2DEF Manhattan",
-            rx_freq=442.0,
-            tx_freq=442.0,
             tx_power="High",
             scanlist_id=None,
             tot=180,
             rx_only=False,
             admit_crit="Always",
-            color=1,
             slot=1,
             rx_grouplist_id=None,
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=40.7505,
-            _lng=-73.9934,
-            _locator=None,
-            _rpt_callsign="W2DEF",
-            _qth="Manhattan",
+            site=RepeaterSite.shared(
+                rx_freq=442.0,
+                tx_freq=442.0,
+                callsign="W2DEF",
+                color=1,
+                lat=40.7505,
+                lng=-73.9934,
+                qth="Manhattan",
+            ),
         ),
         DigitalChannel(
             internal_id=3,
             name="W2GHI Brooklyn",
-            rx_freq=441.0,
-            tx_freq=441.0,
             tx_power="High",
             scanlist_id=None,
             tot=180,
             rx_only=False,
             admit_crit="Always",
-            color=1,
             slot=1,
             rx_grouplist_id=None,
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=40.6782,
-            _lng=-73.9442,
-            _locator=None,
-            _rpt_callsign="W2GHI",
-            _qth="Brooklyn",
+            site=RepeaterSite.shared(
+                rx_freq=441.0,
+                tx_freq=441.0,
+                callsign="W2GHI",
+                color=1,
+                lat=40.6782,
+                lng=-73.9442,
+                qth="Brooklyn",
+            ),
         ),
         DigitalChannel(
             internal_id=4,
             name="W2JKL Newark",
-            rx_freq=444.0,
-            tx_freq=444.0,
             tx_power="High",
             scanlist_id=None,
             tot=180,
             rx_only=False,
             admit_crit="Always",
-            color=1,
             slot=1,
             rx_grouplist_id=None,
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=40.7357,
-            _lng=-74.1724,
-            _locator=None,
-            _rpt_callsign="W2JKL",
-            _qth="Newark",
+            site=RepeaterSite.shared(
+                rx_freq=444.0,
+                tx_freq=444.0,
+                callsign="W2JKL",
+                color=1,
+                lat=40.7357,
+                lng=-74.1724,
+                qth="Newark",
+            ),
         ),
     ]
 
@@ -119,46 +123,48 @@ def create_integration_test_channels():
         DigitalChannel(
             internal_id=5,
             name="W6XYZ San Francisco",
-            rx_freq=440.0,
-            tx_freq=440.0,
             tx_power="High",
             scanlist_id=None,
             tot=180,
             rx_only=False,
             admit_crit="Always",
-            color=1,
             slot=1,
             rx_grouplist_id=None,
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=37.7749,
-            _lng=-122.4194,
-            _locator=None,
-            _rpt_callsign="W6XYZ",
-            _qth="San Francisco",
+            site=RepeaterSite.shared(
+                rx_freq=440.0,
+                tx_freq=440.0,
+                callsign="W6XYZ",
+                color=1,
+                lat=37.7749,
+                lng=-122.4194,
+                qth="San Francisco",
+            ),
         ),
         DigitalChannel(
             internal_id=6,
             name="W6MNO Los Angeles",
-            rx_freq=442.0,
-            tx_freq=442.0,
             tx_power="High",
             scanlist_id=None,
             tot=180,
             rx_only=False,
             admit_crit="Always",
-            color=1,
             slot=1,
             rx_grouplist_id=None,
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=34.0522,
-            _lng=-118.2437,
-            _locator=None,
-            _rpt_callsign="W6MNO",
-            _qth="Los Angeles",
+            site=RepeaterSite.shared(
+                rx_freq=442.0,
+                tx_freq=442.0,
+                callsign="W6MNO",
+                color=1,
+                lat=34.0522,
+                lng=-118.2437,
+                qth="Los Angeles",
+            ),
         ),
     ]
 
@@ -167,46 +173,48 @@ def create_integration_test_channels():
         DigitalChannel(
             internal_id=7,
             name="W2PQR Yonkers",
-            rx_freq=443.0,
-            tx_freq=443.0,
             tx_power="High",
             scanlist_id=None,
             tot=180,
             rx_only=False,
             admit_crit="Always",
-            color=1,
             slot=1,
             rx_grouplist_id=None,
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=40.9312,
-            _lng=-73.8985,
-            _locator=None,
-            _rpt_callsign="W2PQR",
-            _qth="Yonkers",
+            site=RepeaterSite.shared(
+                rx_freq=443.0,
+                tx_freq=443.0,
+                callsign="W2PQR",
+                color=1,
+                lat=40.9312,
+                lng=-73.8985,
+                qth="Yonkers",
+            ),
         ),
         DigitalChannel(
             internal_id=8,
             name="W2STU White Plains",
-            rx_freq=444.0,
-            tx_freq=444.0,
             tx_power="High",
             scanlist_id=None,
             tot=180,
             rx_only=False,
             admit_crit="Always",
-            color=1,
             slot=1,
             rx_grouplist_id=None,
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=41.1220,
-            _lng=-73.7949,
-            _locator=None,
-            _rpt_callsign="W2STU",
-            _qth="White Plains",
+            site=RepeaterSite.shared(
+                rx_freq=444.0,
+                tx_freq=444.0,
+                callsign="W2STU",
+                color=1,
+                lat=41.1220,
+                lng=-73.7949,
+                qth="White Plains",
+            ),
         ),
     ]
 
@@ -0,0 +1,49 @@
+"""Tests for incremental JSON decoding of large downloads"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources import jsonstream
+from datasources.jsonstream import iter_array
+
+DEVICES = [{"id": i, "callsign": f"SR{i}", "city": "Łódź"} for i in range(20)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+def test_top_level_array(chunk_size):
+    document = " \n" + json.dumps(DEVICES, ensure_ascii=False)
+    assert list(iter_array(io.StringIO(document), None, chunk_size)) == DEVICES
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 13))
+def test_numbers_split_by_chunks(chunk_size):
+    document = '[1, 23, 456, -7.5e1, "8"]'
+    items = list(iter_array(io.StringIO(document), None, chunk_size))
+    assert items == [1, 23, 456, -75.0, "8"]
+
+
+def test_top_level_array_required():
+    with pytest.raises(ValueError):
+        list(iter_array(io.StringIO(json.dumps({"devices": DEVICES})), None, 4))
+
+
+def test_load_decodes_arrays_item_by_item(monkeypatch):
+    data = json.dumps(DEVICES, ensure_ascii=False).encode()
+    monkeypatch.setattr(
+        json, "load", lambda f: pytest.fail("array read as one document")
+    )
+
+    f = io.BytesIO(data)
+    assert jsonstream.load(f, chunk_size=16) == DEVICES
+    assert not f.closed
+
+
+def test_load_falls_back_for_objects():
+    f = io.BytesIO(b'{"count": 1, "results": null}')
+    assert jsonstream.load(f) == {"count": 1, "results": None}
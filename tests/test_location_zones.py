@@ -13,7 +13,7 @@ from generators.location_zones import (
     LocationClusterZoneGenerator,
     DistanceBandedZoneGenerator,
 )
-from models import DigitalChannel, AnalogChannel
+from models import DigitalChannel, AnalogChannel, RepeaterSite
 
 
 def create_test_channel(name, lat, lng, rpt_callsign=None, qth=None, channel_id=1):
@@ -22,24 +22,25 @@ def create_test_channel(name, lat, lng, rpt_callsign=None, qth=None, channel_id=
     channel = DigitalChannel(
         internal_id=channel_id,
         name=name,
-        rx_freq=439.0,  # 70cm frequency
-        tx_freq=439.0,
         tx_power="High",
         scanlist_id=None,
         tot=180,
         rx_only=False,
         admit_crit="Always",
-        color=1,
         slot=1,
         rx_grouplist_id=None,
         tx_contact_id=None,
         aprs=None,
         anytone=None,
-        _lat=lat,
-        _lng=lng,
-        _locator=None,
-        _rpt_callsign=rpt_callsign,
-        _qth=qth,
+        site=RepeaterSite.shared(
+            rx_freq=439.0,
+            tx_freq=439.0,
+            callsign=rpt_callsign,
+            color=1,
+            lat=lat,
+            lng=lng,
+            qth=qth,
+        ),
     )
     return channel
 
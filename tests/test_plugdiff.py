@@ -0,0 +1,167 @@
+"""Tests for the structural codeplug diff"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from anytone import AT878UV
+from models import (
+    AnalogAPRSConfig,
+    Contact,
+    ContactType,
+    DigitalAPRSConfig,
+    DigitalAdmitCriteria,
+    DigitalAnytoneExtensions,
+    DigitalChannel,
+    GroupList,
+    RepeaterSite,
+    TxPower,
+    Zone,
+)
+from plugdiff import diff_plugs, load_plug
+from writers import QDMRWriter
+
+REPO = Path(__file__).parent.parent
+
+ANYTONE = DigitalAnytoneExtensions(
+    talkaround=None,
+    frequencyCorrection=None,
+    handsFree=None,
+    fmAPRSFrequency=None,
+    callConfirm=False,
+    sms=True,
+    smsConfirm=True,
+    dataACK=None,
+    simplexTDMA=None,
+    adaptiveTDMA=None,
+    loneWorker=None,
+    throughMode=None,
+)
+
+
+def make_channel(internal_id, name, contact_id, rx_freq=439.0, **kwargs):
+    fields = dict(
+        internal_id=internal_id,
+        name=name,
+        tx_power=TxPower.High,
+        scanlist_id=None,
+        tot=None,
+        rx_only=False,
+        admit_crit=DigitalAdmitCriteria.ColorCode,
+        slot=1,
+        rx_grouplist_id=None,
+        tx_contact_id=contact_id,
+        aprs=None,
+        anytone=ANYTONE,
+        site=RepeaterSite.shared(rx_freq=rx_freq, tx_freq=rx_freq - 7.6, color=1),
+    )
+    fields.update(kwargs)
+    return DigitalChannel(**fields)
+
+
+def write_plug(path, contacts, channels, grouplists=(), zones=()):
+    with open(path, "w") as f:
+        AT878UV(
+            dmr_id=2600000,
+            callsign="SP5ABC",
+            contacts=contacts,
+            grouplists=list(grouplists),
+            digital_channels=channels,
+            zones=list(zones),
+            analog_aprs_config=AnalogAPRSConfig(
+                internal_id=1,
+                name="APRS",
+                channel_id=1,
+                source="SP5ABC",
+                destination="APAT81",
+                path=["WIDE1-1"],
+                icon="Car",
+                period=300,
+                message="",
+            ),
+            digital_aprs_config=DigitalAPRSConfig(
+                internal_id=2, name="DMR APRS", period=60, contact_id=1
+            ),
+        ).generate(QDMRWriter(f))
+    return load_plug(path)
+
+
+def contact(internal_id, tg, name=None):
+    return Contact(internal_id, name or f"TG{tg}", ContactType.GroupCall, tg)
+
+
+@pytest.fixture
+def plugs(tmp_path, monkeypatch):
+    monkeypatch.chdir(REPO)
+
+    old = write_plug(
+        tmp_path / "old.yaml",
+        contacts=[contact(1, 260), contact(2, 2602), contact(3, 91)],
+        channels=[
+            make_channel(1, "SR5WA TG260", 1),
+            make_channel(2, "SR5WA TG2602", 2),
+            make_channel(3, "SR5WA TG91", 3),
+        ],
+        grouplists=[GroupList(1, "RX", [1, 2])],
+        zones=[Zone(1, "Warszawa", [1, 2, 3])],
+    )
+    # A new talkgroup early on shifts every ID; TG91 is gone, TG2602 moved
+    new = write_plug(
+        tmp_path / "new.yaml",
+        contacts=[
+            contact(1, 9),
+            contact(2, 260, name="Polska"),
+            contact(3, 2602),
+        ],
+        channels=[
+            make_channel(1, "SR5WA TG9", 1),
+            make_channel(2, "SR5WA TG260", 2),
+            make_channel(3, "SR5WA TG2602", 3, tx_power=TxPower.Low),
+        ],
+        grouplists=[GroupList(1, "RX", [2, 3, 1])],
+        zones=[Zone(1, "Warszawa", [1, 2, 3])],
+    )
+    return old, new
+
+
+def test_identical_plugs_do_not_differ(plugs):
+    old, _ = plugs
+    diff = diff_plugs(old, old)
+    assert not diff
+    assert diff.summary() == (
+        "contacts: +0 -0 ~0\ngroupLists: +0 -0 ~0\nchannels: +0 -0 ~0\nzones: +0 -0 ~0"
+    )
+
+
+def test_renumbered_entries_match_by_stable_keys(plugs):
+    diff = diff_plugs(*plugs)
+
+    contacts = diff.sections["contacts"]
+    assert contacts.added == ["GroupCall 9"]
+    assert contacts.removed == ["GroupCall 91"]
+    assert contacts.modified == [("GroupCall 260", [("name", "TG260", "Polska")])]
+
+    channels = diff.sections["channels"]
+    assert channels.added == ["digital 'SR5WA TG9' 439.0 CC1 TS1 [GroupCall 9]"]
+    assert channels.removed == ["digital 'SR5WA TG91' 439.0 CC1 TS1 [GroupCall 91]"]
+    assert channels.modified == [
+        (
+            "digital 'SR5WA TG2602' 439.0 CC1 TS1 [GroupCall 2602]",
+            [("power", "High", "Low")],
+        )
+    ]
+
+
+def test_member_changes(plugs):
+    diff = diff_plugs(*plugs)
+    lines = list(diff.lines())
+
+    assert "groupLists: +0 -0 ~1" in lines
+    assert "      contacts: +GroupCall 9" in lines
+    assert (
+        "      A: +digital 'SR5WA TG9' 439.0 CC1 TS1 [GroupCall 9], "
+        "-digital 'SR5WA TG91' 439.0 CC1 TS1 [GroupCall 91]"
+    ) in lines
@@ -0,0 +1,72 @@
+"""Tests for prefetching the resources of a recipe's data plan"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources.resources import Resource
+from prefetch import Prefetcher
+
+
+class FakeSource:
+    def __init__(self, cached=(), failing=()):
+        self.cache = set(cached)
+        self.failing = set(failing)
+        self.fetched = []
+
+    def resource(self, key):
+        def fetch():
+            self.fetched.append(key)
+            if key in self.failing:
+                raise ConnectionError(key)
+            self.cache.add(key)
+
+        return Resource("fake", key, fetch=fetch, is_cached=lambda: key in self.cache)
+
+
+def test_fetches_uncached_resources_once():
+    source = FakeSource(cached={"a"})
+    plan = [[source.resource("a"), source.resource("b"), source.resource("b")]]
+
+    report = Prefetcher(max_workers=4).run(plan)
+
+    assert source.fetched == ["b"]
+    assert [str(r) for r in report.cached] == ["fake a"]
+    assert [str(r) for r in report.fetched] == ["fake b"]
+
+
+def test_later_phases_are_planned_after_earlier_ones_are_fetched():
+    source = FakeSource()
+
+    def plan():
+        yield [source.resource("devices")]
+        # Planning this phase depends on the first one being in the cache
+        assert "devices" in source.cache
+        yield [source.resource(f"tg{i}") for i in range(5)]
+
+    report = Prefetcher(max_workers=2).run(plan())
+
+    assert len(report.fetched) == 6
+    assert source.fetched[0] == "devices"
+
+
+def test_reports_failures_and_progress():
+    source = FakeSource(failing={"b"})
+    progress = []
+
+    report = Prefetcher(
+        progress=lambda done, total, elapsed, resource: progress.append((done, total))
+    ).run([[source.resource("a"), source.resource("b")]])
+
+    assert [(str(r), str(e)) for r, e in report.failed] == [("fake b", "b")]
+    assert report.summary() == "1 fetched, 0 already cached, 1 failed"
+    assert progress == [(1, 2), (2, 2)]
+
+
+def test_force_refetches_cached_resources():
+    source = FakeSource(cached={"a"})
+
+    Prefetcher(force=True).run([[source.resource("a")]])
+
+    assert source.fetched == ["a"]
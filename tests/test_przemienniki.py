@@ -0,0 +1,127 @@
+"""Tests for streaming przemienniki.net rxf.xml exports"""
+
+import json
+import sys
+from pathlib import Path
+
+from lxml import etree
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources import transport
+from datasources.przemienniki import PrzemiennikiAPI, parse_rxf
+from generators import Sequence
+from generators.analogchan import AnalogChannelGeneratorFromPrzemienniki
+
+RXF = b"""
+<?xml version="1.0" encoding="UTF-8"?>
+<rxf>
+  <repeaters>
+    <repeater>
+      <qra>SR5WA</qra>
+      <qth>Warszawa</qth>
+      <status>WORKING</status>
+      <band>2m</band>
+      <qrg type="tx">145.6125</qrg>
+      <qrg type="rx">145.0125</qrg>
+      <ctcss type="tx">88.5</ctcss>
+      <ctcss type="rx">88.5</ctcss>
+      <location/>
+      <latitude>52.2297</latitude>
+      <longitude>21.0122</longitude>
+      <locator>KO02MF</locator>
+    </repeater>
+    <repeater>
+      <qra>SR5OFF</qra>
+      <qth>Radom</qth>
+      <status>OFF</status>
+      <band>2m</band>
+      <qrg type="tx">145.7000</qrg>
+      <qrg type="rx">145.1000</qrg>
+    </repeater>
+    <repeater>
+      <qra>SR9KR</qra>
+      <qth>Krakow</qth>
+      <status>TESTING</status>
+      <band>70cm</band>
+      <qrg type="tx">438.9500</qrg>
+      <qrg type="rx">431.3500</qrg>
+      <ctcss type="rx">103.5</ctcss>
+    </repeater>
+    <repeater>
+      <qra>SR1SPX</qra>
+      <qth>Szczecin</qth>
+      <status>WORKING</status>
+      <band>2m</band>
+      <qrg type="tx">145.5000</qrg>
+      <qrg type="rx">145.5000</qrg>
+    </repeater>
+  </repeaters>
+</rxf>
+"""
+
+
+def test_parse_rxf_projects_generator_fields():
+    records = parse_rxf(RXF)
+
+    assert [r["qra"] for r in records] == ["SR5WA", "SR5OFF", "SR9KR", "SR1SPX"]
+    assert records[0] == {
+        "qra": "SR5WA",
+        "qth": "Warszawa",
+        "status": "WORKING",
+        "bands": 1,
+        "qrgs": 2,
+        "tx": 145.6125,
+        "rx": 145.0125,
+        "ctcss_tx": 88.5,
+        "ctcss_rx": 88.5,
+        "lat": 52.2297,
+        "lng": 21.0122,
+        "locator": "KO02MF",
+    }
+    assert records[2]["ctcss_tx"] is None
+    assert records[2]["lat"] is None
+    # Projected records are plain JSON
+    assert json.loads(json.dumps(records)) == records
+
+
+def test_generator_from_records_matches_generator_from_tree():
+    from_records = AnalogChannelGeneratorFromPrzemienniki(
+        parse_rxf(RXF), "High", aprs=None
+    ).channels(Sequence())
+    from_tree = AnalogChannelGeneratorFromPrzemienniki(
+        etree.fromstring(RXF.lstrip()), "High", aprs=None
+    ).channels(Sequence())
+
+    assert [c.name for c in from_records] == ["SR5WA", "SR9KR"]
+    assert from_records == from_tree
+    assert from_records[1].rx_tone is None
+    assert from_records[1].tx_tone == 103.5
+    assert from_records[0]._locator == "KO02MF"
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def test_api_caches_projected_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    downloads = []
+
+    def fake_get(url, *args, **kwargs):
+        downloads.append(url)
+        return FakeResponse(RXF)
+
+    monkeypatch.setattr(transport, "get", fake_get)
+
+    first = PrzemiennikiAPI().repeaters_2m()
+    second = PrzemiennikiAPI().repeaters_2m()
+
+    assert len(downloads) == 1
+    assert first == second == parse_rxf(RXF)
+    cached = (tmp_path / "cache" / "przemienniki" / "2m_fm_records.json").read_text()
+    assert "<" not in cached
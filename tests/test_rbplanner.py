@@ -0,0 +1,99 @@
+"""Tests for planning RepeaterBook requests from recipe filters"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources.rbplanner import QueryPlan, plan_queries, states_for
+from datasources.repeaterbook import RepeaterBookAPI
+from filters import BandFilter, DistanceFilter, FilterChain, RegionFilter
+
+NYC = (40.7128, -74.0060)
+MOUNTAIN_VIEW = (37.3861, -122.0839)
+
+
+def circle(center, km, **kwargs):
+    return DistanceFilter(
+        reference_lat=center[0],
+        reference_lng=center[1],
+        max_distance_km=km,
+        **kwargs,
+    )
+
+
+def test_small_circle_needs_one_state():
+    assert states_for(FilterChain([circle(MOUNTAIN_VIEW, 50.0)])) == ["06"]
+
+
+def test_circle_reaches_neighbouring_states():
+    # NY, NJ, CT and eastern Pennsylvania; Massachusetts only by its bounding
+    # box, which is conservative
+    assert states_for(FilterChain([circle(NYC, 100.0)])) == [
+        "09",
+        "25",
+        "34",
+        "36",
+        "42",
+    ]
+
+
+def test_region_filter_selects_overlapping_states():
+    region = RegionFilter(min_lat=40.6, max_lat=41.0, min_lng=-74.5, max_lng=-73.5)
+    assert states_for(FilterChain([region])) == ["09", "34", "36"]
+
+
+def test_filters_without_geometry_select_every_state():
+    states = states_for(FilterChain([BandFilter()]))
+    assert "06" in states and "36" in states and len(states) > 50
+
+
+def test_repeaters_without_coordinates_may_be_anywhere():
+    chain = FilterChain(
+        [circle(MOUNTAIN_VIEW, 50.0, include_items_without_coordinates=True)]
+    )
+    assert len(states_for(chain)) > 50
+
+
+def test_plan_limited_to_recipe_states_and_mode():
+    plan = plan_queries(
+        FilterChain([circle(NYC, 100.0)]),
+        mode="analog",
+        within_states=["36", "34", "09"],
+    )
+
+    assert plan == QueryPlan(("09", "34", "36"), filters={"mode": "analog"})
+    assert plan.describe() == "CT, NJ, NY (mode=analog)"
+
+
+def test_records_for_plan_requests_only_planned_exports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = RepeaterBookAPI(geocoder=object())
+    requested = []
+
+    def fake_request(endpoint, **params):
+        requested.append((endpoint, params))
+        return {
+            "count": 1,
+            "results": [
+                {
+                    "Callsign": f"W{params['state_id']}",
+                    "Frequency": "146.94",
+                    "Input Freq": "146.34",
+                    "FM Analog": "Yes",
+                }
+            ],
+        }
+
+    monkeypatch.setattr(api, "_make_request", fake_request)
+
+    plan = plan_queries(FilterChain([circle(MOUNTAIN_VIEW, 50.0)]), mode="analog")
+    records = api.records_for_plan(plan)
+
+    assert [r.callsign for r in records] == ["W06"]
+    assert requested == [
+        ("export.php", {"state_id": "06", "country": "United States", "mode": "analog"})
+    ]
+    assert [r.key for r in api.plan_resources(plan)] == [
+        "export.php_country=United States_mode=analog_state_id=06"
+    ]
@@ -0,0 +1,175 @@
+"""Tests for normalized repeater records and their cache"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources.cache import FileCache
+from datasources.records import (
+    RecordCache,
+    RepeaterRecord,
+    from_brandmeister,
+    from_przemienniki,
+    from_repeaterbook,
+    source_records,
+)
+from datasources.repeaterbook import RepeaterBookAPI
+from generators import Sequence
+from generators.analogchan import (
+    AnalogChannelGeneratorFromPrzemienniki,
+    AnalogChannelGeneratorFromRepeaterBook,
+)
+
+BM_DEVICE = {
+    "id": 260201,
+    "callsign": "SR2UVG",
+    "rx": "430.4250",
+    "tx": "438.0250",
+    "colorcode": 1,
+    "lat": 54.35,
+    "lng": 18.65,
+    "city": "Gdansk",
+    "pep": 10,
+    "statusText": "DMR",
+    "last_seen": "2026-10-01 12:00:00",
+}
+
+RB_REPEATER = {
+    "State ID": "06",
+    "Rptr ID": "42",
+    "Callsign": " W6AAA",
+    "Nearest City": "",
+    "Landmark": "Mountain View",
+    "Frequency": "442.1000",
+    "Input Freq": "447.1000",
+    "PL": "",
+    "TSQ": "100.0",
+    "Lat": "37.39",
+    "Long": "-122.08",
+    "FM Analog": "Yes",
+    "DMR": "No",
+}
+
+PRZ_REPEATER = {
+    "qra": "SR5WA",
+    "qth": "Warszawa",
+    "status": "WORKING",
+    "bands": 1,
+    "qrgs": 2,
+    "tx": 145.6125,
+    "rx": 145.0125,
+    "ctcss_tx": 88.5,
+    "ctcss_rx": None,
+    "lat": 52.2297,
+    "lng": 21.0122,
+    "locator": "KO02MF",
+}
+
+
+def test_from_brandmeister_parses_and_flags_hotspots():
+    record = from_brandmeister(BM_DEVICE)
+
+    assert record.source_id == "260201"
+    assert (record.rx_freq, record.tx_freq) == (438.025, 430.425)
+    assert round(record.offset, 4) == -7.6
+    assert record.locator == "JO94hi"
+    assert record.dmr and not record.analog and not record.hotspot
+    assert from_brandmeister({**BM_DEVICE, "statusText": "DMO"}).hotspot
+    assert from_brandmeister({**BM_DEVICE, "tx": "430.4250"}).hotspot
+    assert from_brandmeister({**BM_DEVICE, "lat": None}).locator is None
+
+
+def test_from_repeaterbook_parses_tones_and_names():
+    record = from_repeaterbook(RB_REPEATER)
+
+    assert record.source_id == "06-42"
+    assert record.callsign == "W6AAA"
+    assert record.qth == "Mountain View"
+    assert record.rx_tone == record.tx_tone == 100.0
+    assert (record.lat, record.lng) == (37.39, -122.08)
+    assert record.analog and not record.dmr
+    assert from_repeaterbook({**RB_REPEATER, "Input Freq": "bogus"}) is None
+
+
+def test_from_przemienniki_rejects_multi_band_repeaters():
+    record = from_przemienniki(PRZ_REPEATER)
+
+    assert (record.rx_freq, record.tx_freq) == (145.6125, 145.0125)
+    assert (record.rx_tone, record.tx_tone) == (88.5, None)
+    assert from_przemienniki({**PRZ_REPEATER, "bands": 2}) is None
+    assert from_przemienniki({**PRZ_REPEATER, "rx": None}) is None
+
+
+def test_generators_accept_records_or_raw_source():
+    records = [from_repeaterbook(RB_REPEATER)]
+    from_records = AnalogChannelGeneratorFromRepeaterBook(
+        records, "High", aprs=None
+    ).channels(Sequence())
+    from_raw = AnalogChannelGeneratorFromRepeaterBook(
+        {"results": [RB_REPEATER]}, "High", aprs=None
+    ).channels(Sequence())
+
+    assert from_records == from_raw
+    assert from_records[0].name == "W6AAA Mountain View"
+
+    channels = AnalogChannelGeneratorFromPrzemienniki(
+        [from_przemienniki(PRZ_REPEATER)], "High", aprs=None
+    ).channels(Sequence())
+    assert [c.name for c in channels] == ["SR5WA"]
+
+
+def test_record_cache_rebuilds_only_when_snapshot_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = FileCache("raw")
+    source.write_cache("devices", [BM_DEVICE])
+    loads = []
+
+    def load():
+        loads.append(1)
+        return source.read_cache("devices")
+
+    first = source_records("bm", source, "devices", load, from_brandmeister)
+    second = source_records("bm", source, "devices", load, from_brandmeister)
+
+    assert len(loads) == 1
+    assert first == second
+    assert isinstance(second[0], RepeaterRecord)
+
+    source.write_cache("devices", [BM_DEVICE, {**BM_DEVICE, "id": 260202}])
+    third = source_records("bm", source, "devices", load, from_brandmeister)
+
+    assert len(loads) == 2
+    assert [r.source_id for r in third] == ["260201", "260202"]
+
+
+def test_record_cache_without_snapshot_always_builds(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return []
+
+    RecordCache().records("uncached", None, build)
+    RecordCache().records("uncached", None, build)
+
+    assert len(builds) == 2
+
+
+def test_records_by_regions_deduplicates_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = RepeaterBookAPI(geocoder=object())
+    exports = {
+        "36": [{**RB_REPEATER, "State ID": "36", "Callsign": "K2BRD"}],
+        "34": [{**RB_REPEATER, "State ID": "34", "Callsign": "k2brd"}],
+    }
+    monkeypatch.setattr(
+        api,
+        "_make_request",
+        lambda endpoint, **params: {"results": exports[params["state_id"]]},
+    )
+
+    records = api.records_by_regions(states=["36", "34"])
+
+    assert [r.source_id for r in records] == ["36-42"]
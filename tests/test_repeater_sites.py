@@ -0,0 +1,149 @@
+"""Tests for RepeaterSite records shared by a repeater's channels"""
+
+import sys
+from dataclasses import fields
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from filters import BandFilter, BaseFilter, DistanceFilter, FilterChain
+from generators import Sequence
+from generators.analogchan import AnalogChannelGeneratorFromRepeaterBook
+from generators.scanlists import CallsignPrefixDigitalScanListGenerator
+from generators.zones import ZoneFromCallsignGenerator2
+from models import DigitalChannel, RepeaterSite, TxPower
+
+SITE = dict(
+    callsign="SR5WA",
+    rx_freq=439.5625,
+    tx_freq=431.9625,
+    color=1,
+    lat=52.23,
+    lng=21.01,
+    locator="KO02",
+    qth="Warszawa",
+    source_id="260101",
+)
+
+
+class CountingFilter(BaseFilter):
+    per_site = True
+
+    def __init__(self):
+        self.seen = []
+
+    def should_include(self, item):
+        self.seen.append(item)
+        return (True, "")
+
+
+def make_channel(internal_id, site, slot):
+    return DigitalChannel(
+        internal_id=internal_id,
+        name=f"{site.callsign} TS{slot}",
+        tx_power=TxPower.High,
+        scanlist_id="-",
+        tot=None,
+        rx_only=False,
+        admit_crit="Free",
+        slot=slot,
+        rx_grouplist_id=None,
+        tx_contact_id=None,
+        aprs=None,
+        anytone=None,
+        site=site,
+    )
+
+
+def test_equal_sites_are_shared():
+    site = RepeaterSite.shared(**SITE)
+
+    assert RepeaterSite.shared(**SITE) is site
+    assert RepeaterSite.shared(**dict(SITE, rx_freq=145.6)) is not site
+
+
+def test_channels_read_repeater_fields_from_their_site():
+    site = RepeaterSite.shared(**SITE)
+    ts1, ts2 = make_channel(1, site, 1), make_channel(2, site, 2)
+
+    per_channel = {f.name for f in fields(DigitalChannel)}
+    assert not per_channel & {"rx_freq", "tx_freq", "color", "_lat", "_qth"}
+    assert not {"rx_freq", "_rpt_callsign"} & set(vars(ts1))
+    assert ts1.site is ts2.site
+    assert (ts2.rx_freq, ts2.tx_freq, ts2.color) == (439.5625, 431.9625, 1)
+    assert (ts2._lat, ts2._lng, ts2._locator) == (52.23, 21.01, "KO02")
+    assert (ts2._rpt_callsign, ts2._qth) == ("SR5WA", "Warszawa")
+
+
+def test_filters_apply_to_sites():
+    site = RepeaterSite.shared(**SITE)
+
+    assert FilterChain([BandFilter(), DistanceFilter(52.0, 21.0, 50)]).per_site
+    assert not FilterChain([BandFilter(), BaseFilter()]).per_site
+    assert DistanceFilter(52.0, 21.0, 50).should_include(site) == (True, "")
+    assert not DistanceFilter(50.0, 19.0, 50).should_include(site)[0]
+
+
+def test_repeaterbook_channels_reference_sites():
+    source = {
+        "results": [
+            {
+                "Callsign": "W6AAA",
+                "Nearest City": "Mountain View",
+                "Frequency": "145.2300",
+                "Input Freq": "144.6300",
+                "Lat": "37.39",
+                "Long": "-122.08",
+                "FM Analog": "Yes",
+            }
+        ]
+    }
+    generator = AnalogChannelGeneratorFromRepeaterBook(source, TxPower.High, aprs=None)
+    (channel,) = generator.channels(Sequence())
+
+    assert channel.site.callsign == "W6AAA"
+    assert (channel.site.rx_freq, channel.site.lat) == (channel.rx_freq, channel._lat)
+
+
+def test_zone_filter_is_evaluated_once_per_site():
+    sites = [
+        RepeaterSite.shared(**SITE),
+        RepeaterSite.shared(**dict(SITE, callsign="SR5WB", qth="Legionowo")),
+    ]
+    channels = [
+        make_channel(i + 1, site, slot)
+        for i, (site, slot) in enumerate((s, ts) for s in sites for ts in (1, 2))
+    ]
+    counting = CountingFilter()
+
+    zones = ZoneFromCallsignGenerator2(
+        channels, filter_chain=FilterChain([counting])
+    ).zones(Sequence())
+
+    assert counting.seen == sites
+    assert [(z.name, z.channels) for z in zones] == [
+        ("SR5WA Warszawa", [1, 2]),
+        ("SR5WB Legionowo", [3, 4]),
+    ]
+
+
+def test_channel_filters_still_see_channels():
+    site = RepeaterSite.shared(**SITE)
+    channels = [make_channel(1, site, 1), make_channel(2, site, 2)]
+    counting = CountingFilter()
+    counting.per_site = False
+
+    ZoneFromCallsignGenerator2(channels, filter_chain=FilterChain([counting])).zones(
+        Sequence()
+    )
+
+    assert counting.seen == channels
+
+
+def test_scanlists_group_shared_sites():
+    site = RepeaterSite.shared(**SITE)
+    channels = [make_channel(1, site, 1), make_channel(2, site, 2)]
+
+    (scanlist,) = CallsignPrefixDigitalScanListGenerator(channels).scanlists(Sequence())
+
+    assert (scanlist.name, scanlist.channels) == ("SR5 Digital", [1, 2])
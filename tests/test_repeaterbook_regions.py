@@ -0,0 +1,77 @@
+"""Tests for fetching several RepeaterBook regions at once"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources.records import repeater_identity
+from datasources.repeaterbook import RepeaterBookAPI
+
+EXPORTS = {
+    "36": [
+        {"Callsign": "W2NYC", "Frequency": "146.9400"},
+        {"Callsign": "K2BRD", "Frequency": "147.0450", "State": "New York"},
+    ],
+    "34": [
+        {"Callsign": "k2brd ", "Frequency": "147.045", "State": "New Jersey"},
+        {"Callsign": "N2NJ", "Frequency": "443.2000"},
+    ],
+    "Canada": [{"Callsign": "VE3ON", "Frequency": "145.3300"}],
+}
+
+
+def test_repeater_identity_normalizes_callsign_and_frequency():
+    assert repeater_identity(" k2brd", "147.0450") == ("K2BRD", 147.045)
+    assert repeater_identity("K2BRD", 147.045) == ("K2BRD", 147.045)
+
+
+def test_get_repeaters_by_regions_merges_and_deduplicates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = RepeaterBookAPI(geocoder=object())
+    requested = []
+
+    def fake_request(endpoint, **params):
+        region = params.get("state_id") or params["country"]
+        requested.append((endpoint, params))
+        return {"count": len(EXPORTS[region]), "results": EXPORTS[region]}
+
+    monkeypatch.setattr(api, "_make_request", fake_request)
+
+    merged = api.get_repeaters_by_regions(
+        states=["36", "34"], countries=["Canada"], mode="analog"
+    )
+
+    assert merged["count"] == 4
+    assert [r["Callsign"] for r in merged["results"]] == [
+        "W2NYC",
+        "K2BRD",
+        "N2NJ",
+        "VE3ON",
+    ]
+    # The first region listing a border repeater wins
+    assert merged["results"][1]["State"] == "New York"
+    assert sorted(requested, key=str) == sorted(
+        [
+            (
+                "export.php",
+                {"state_id": "36", "country": "United States", "mode": "analog"},
+            ),
+            (
+                "export.php",
+                {"state_id": "34", "country": "United States", "mode": "analog"},
+            ),
+            ("export.php", {"country": "Canada", "mode": "analog"}),
+        ],
+        key=str,
+    )
+
+
+def test_get_repeaters_by_regions_handles_empty_exports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = RepeaterBookAPI(geocoder=object())
+    monkeypatch.setattr(
+        api, "_make_request", lambda endpoint, **params: {"count": 0, "results": None}
+    )
+
+    assert api.get_repeaters_by_regions(states=["09"]) == {"count": 0, "results": []}
@@ -5,6 +5,7 @@ from codeplug.models import (
     ContactType,
     TxPower,
     DigitalAdmitCriteria,
+    RepeaterSite,
 )
 from codeplug.generators.rxgrouplists import (
     RXGroupListGenerator,
@@ -42,46 +43,32 @@ def test_hotspot_rxgrouplist_generator():
         DigitalChannel(
             internal_id=1,
             name="HS3100 USA Nationwide",
-            rx_freq=431.1,
-            tx_freq=431.1,
             tx_power=TxPower.Low,
             scanlist_id="-",
             tot=None,
             rx_only=False,
             admit_crit=DigitalAdmitCriteria.Free,
-            color=1,
             slot=2,
             rx_grouplist_id="-",
             tx_contact_id=1,
             aprs=None,
             anytone=None,
-            _lat=None,
-            _lng=None,
-            _locator=None,
-            _rpt_callsign=None,
-            _qth=None,
+            site=RepeaterSite.shared(rx_freq=431.1, tx_freq=431.1, color=1),
         ),
         DigitalChannel(
             internal_id=2,
             name="HS TS1",
-            rx_freq=431.1,
-            tx_freq=431.1,
             tx_power=TxPower.Low,
             scanlist_id="-",
             tot=None,
             rx_only=False,
             admit_crit=DigitalAdmitCriteria.Free,
-            color=1,
             slot=1,
             rx_grouplist_id="-",
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=None,
-            _lng=None,
-            _locator=None,
-            _rpt_callsign=None,
-            _qth=None,
+            site=RepeaterSite.shared(rx_freq=431.1, tx_freq=431.1, color=1),
         ),
     ]
 
@@ -126,46 +113,50 @@ def test_rxgrouplist_generator_basic():
         DigitalChannel(
             internal_id=1,
             name="W6ABC 3100 USA Nationwide",
-            rx_freq=447.0,
-            tx_freq=442.0,
             tx_power=TxPower.High,
             scanlist_id="-",
             tot=None,
             rx_only=False,
             admit_crit=DigitalAdmitCriteria.Free,
-            color=1,
             slot=2,
             rx_grouplist_id="-",
             tx_contact_id=1,
             aprs=None,
             anytone=None,
-            _lat=37.5,
-            _lng=-122.0,
-            _locator="CM87",
-            _rpt_callsign="W6ABC",
-            _qth="San Francisco",
+            site=RepeaterSite.shared(
+                rx_freq=447.0,
+                tx_freq=442.0,
+                callsign="W6ABC",
+                color=1,
+                lat=37.5,
+                lng=-122.0,
+                locator="CM87",
+                qth="San Francisco",
+            ),
         ),
         DigitalChannel(
             internal_id=2,
             name="W6ABC TS1",
-            rx_freq=447.0,
-            tx_freq=442.0,
             tx_power=TxPower.High,
             scanlist_id="-",
             tot=None,
             rx_only=False,
             admit_crit=DigitalAdmitCriteria.Free,
-            color=1,
             slot=1,
             rx_grouplist_id="-",
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=37.5,
-            _lng=-122.0,
-            _locator="CM87",
-            _rpt_callsign="W6ABC",
-            _qth="San Francisco",
+            site=RepeaterSite.shared(
+                rx_freq=447.0,
+                tx_freq=442.0,
+                callsign="W6ABC",
+                color=1,
+                lat=37.5,
+                lng=-122.0,
+                locator="CM87",
+                qth="San Francisco",
+            ),
         ),
     ]
 
@@ -196,46 +187,41 @@ def test_rxgrouplist_generator_skips_hotspots():
         DigitalChannel(
             internal_id=1,
             name="HS3100 USA Nationwide",
-            rx_freq=431.1,
-            tx_freq=431.1,
             tx_power=TxPower.Low,
             scanlist_id="-",
             tot=None,
             rx_only=False,
             admit_crit=DigitalAdmitCriteria.Free,
-            color=1,
             slot=2,
             rx_grouplist_id="-",
             tx_contact_id=1,
             aprs=None,
             anytone=None,
-            _lat=None,
-            _lng=None,
-            _locator=None,
-            _rpt_callsign=None,
-            _qth=None,
+            site=RepeaterSite.shared(rx_freq=431.1, tx_freq=431.1, color=1),
         ),
         DigitalChannel(
             internal_id=2,
             name="W6ABC TS1",
-            rx_freq=447.0,
-            tx_freq=442.0,
             tx_power=TxPower.High,
             scanlist_id="-",
             tot=None,
             rx_only=False,
             admit_crit=DigitalAdmitCriteria.Free,
-            color=1,
             slot=1,
             rx_grouplist_id="-",
             tx_contact_id=None,
             aprs=None,
             anytone=None,
-            _lat=37.5,
-            _lng=-122.0,
-            _locator="CM87",
-            _rpt_callsign="W6ABC",
-            _qth="San Francisco",
+            site=RepeaterSite.shared(
+                rx_freq=447.0,
+                tx_freq=442.0,
+                callsign="W6ABC",
+                color=1,
+                lat=37.5,
+                lng=-122.0,
+                locator="CM87",
+                qth="San Francisco",
+            ),
         ),
     ]
 
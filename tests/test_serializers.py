@@ -0,0 +1,116 @@
+"""Tests for cache entry codecs"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources import serializers
+from datasources.cache import FileCache
+from datasources.serializers import (
+    available_codecs,
+    benchmark,
+    codec_for,
+    decode_entry,
+    encode_entry,
+    get_codec,
+)
+
+VALUE = {
+    "results": [
+        {"Callsign": "SR5WA", "Frequency": "439.35000", "Lat": 52.2, "Ok": True},
+        {"Callsign": "SR5W", "Frequency": "145.67500", "Lat": None, "Ok": False},
+    ],
+    "count": 2,
+}
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("CODEPLUG_CACHE_CODECS", raising=False)
+    FileCache.memory.clear()
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_round_trip(name):
+    codec = get_codec(name)
+    assert decode_entry(encode_entry(VALUE, codec)) == VALUE
+
+
+def test_stdlib_codecs_always_available():
+    assert {"json", "json+zlib"} <= set(available_codecs())
+
+
+def test_unknown_codec_name():
+    with pytest.raises(ValueError):
+        get_codec("pickle")
+
+
+def test_headerless_entries_are_legacy_json():
+    assert decode_entry(json.dumps(VALUE).encode()) == VALUE
+
+
+def test_entry_with_unknown_codec_is_corrupt():
+    with pytest.raises(ValueError):
+        decode_entry(b"#codeplug-cache:pickle\n...")
+
+
+def test_corrupt_compressed_entry():
+    with pytest.raises(ValueError):
+        decode_entry(b"#codeplug-cache:json+zlib\nnot zlib")
+
+
+def test_codec_per_prefix_from_environment(monkeypatch):
+    monkeypatch.setenv("CODEPLUG_CACHE_CODECS", "repeaterbook=json+zlib, *=json")
+    assert codec_for("repeaterbook").name == "json+zlib"
+    assert codec_for("nominatim").name == "json"
+
+
+def test_unavailable_codec_falls_back_to_default(monkeypatch):
+    monkeypatch.setattr(serializers, "zstandard", None)
+    monkeypatch.setattr(serializers, "_codecs", {})
+    monkeypatch.setitem(serializers.COMPRESSIONS, "zstd", None)
+    monkeypatch.setenv("CODEPLUG_CACHE_CODECS", "repeaterbook=json+zstd")
+    with pytest.warns(UserWarning):
+        codec = codec_for("repeaterbook")
+    assert codec.name == serializers.DEFAULT_CODEC
+
+
+def test_legacy_cache_files_stay_valid():
+    cache = FileCache("legacy", codec=get_codec("json+zlib"))
+    Path(cache.file_path("key.json")).write_text(json.dumps(VALUE))
+
+    assert cache.cached("key", "http://unused") == VALUE
+
+
+def test_default_entries_are_plain_json():
+    cache = FileCache("plain")
+    cache.write_cache("key", VALUE)
+
+    assert cache.codec.name == "json"
+    assert json.loads(Path(cache.file_path("key.json")).read_text()) == VALUE
+
+
+def test_switching_codec_keeps_existing_entries():
+    FileCache("switch", codec=get_codec("json")).write_cache("key", VALUE)
+
+    FileCache.memory.clear()
+    cache = FileCache("switch", codec=get_codec("json+zlib"))
+    assert cache.read_cache("key") == VALUE
+
+    cache.write_cache("key", VALUE)
+    data = Path(cache.file_path("key.json")).read_bytes()
+    assert data.startswith(b"#codeplug-cache:json+zlib\n")
+    assert FileCache("switch", codec=get_codec("json")).read_cache("key") == VALUE
+
+
+def test_benchmark_reports_every_codec():
+    results = benchmark([VALUE] * 3, ["json", "json+zlib"], repeat=1)
+
+    assert set(results) == {"json", "json+zlib"}
+    assert results["json"]["bytes"] == 3 * len(get_codec("json").encode(VALUE))
+    assert all(r["decode"] >= 0 and r["encode"] >= 0 for r in results.values())
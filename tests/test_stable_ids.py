@@ -0,0 +1,78 @@
+"""Tests for content-derived internal IDs"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from generators import IDRegistry, Sequence, StableSequence, channel_key
+from generators.zones import PMRZoneGenerator
+
+
+def test_plain_sequence_ignores_keys():
+    seq = Sequence()
+    assert [seq.next("b"), seq.next("a"), seq.next()] == [1, 2, 3]
+
+
+def test_ids_do_not_depend_on_order():
+    keys = [channel_key(f"SR{i}WA", 439.0 + i / 100, 1, 260) for i in range(50)]
+
+    forward = StableSequence()
+    ids = {key: forward.next(key) for key in keys}
+    backward = StableSequence()
+
+    assert {key: backward.next(key) for key in reversed(keys)} == ids
+    assert len(set(ids.values())) == len(keys)
+
+
+def test_collisions_are_resolved_deterministically():
+    def allocate():
+        seq = StableSequence(space=3)
+        return [seq.next(key) for key in ("a", "b", "c")]
+
+    ids = allocate()
+    assert sorted(ids) == [1, 2, 3]
+    assert allocate() == ids
+
+
+def test_previous_ids_are_kept_and_reserved():
+    first = StableSequence(space=10)
+    first.next("kept")
+    first.next("gone")
+
+    # "new" hashes to gone's or kept's ID in a small space, so it must probe
+    second = StableSequence(first.mapping(), space=10)
+    new_ids = [second.next(f"new{i}") for i in range(5)]
+    kept = second.next("kept")
+
+    assert kept == first.mapping()["kept"]
+    assert kept not in new_ids
+    assert first.mapping()["gone"] not in new_ids
+    assert "gone" not in second.mapping()
+
+
+def test_repeated_and_missing_keys():
+    seq = StableSequence()
+    first, second = seq.next("Hotspot"), seq.next("Hotspot")
+    seq.next()
+
+    assert first != second
+    assert set(seq.mapping()) == {"Hotspot", "Hotspot#2", "#1"}
+
+
+def test_registry_persists_between_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    registry = IDRegistry("poland")
+    zone = PMRZoneGenerator([]).zones(registry.sequence("zones"))[0]
+    channel_id = registry.sequence("channels").next(channel_key("PMR 1", 446.00625))
+    registry.save()
+
+    rerun = IDRegistry("poland")
+    rerun.sequence("channels").next(channel_key("PMR 0", 446.0))
+    assert (
+        rerun.sequence("channels").next(channel_key("PMR 1", 446.00625)) == channel_id
+    )
+    assert PMRZoneGenerator([]).zones(rerun.sequence("zones"))[0].internal_id == (
+        zone.internal_id
+    )
@@ -0,0 +1,71 @@
+"""Tests for zone and scan list generators reading channels in one pass"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from generators import Sequence
+from generators.analogchan import AnalogChannelGeneratorFromRepeaterBook
+from generators.scanlists import CallsignPrefixAnalogScanListGenerator
+from generators.zones import ZoneFromCallsignGenerator2
+from models import TxPower
+
+SOURCE = {
+    "results": [
+        {
+            "Callsign": callsign,
+            "Nearest City": city,
+            "Frequency": rx,
+            "Input Freq": tx,
+            "Lat": "37.39",
+            "Long": "-122.08",
+            "FM Analog": "Yes",
+        }
+        for callsign, city, rx, tx in [
+            ("W6BBB", "Palo Alto", "442.1000", "447.1000"),
+            ("W6AAA", "Mountain View", "145.2300", "144.6300"),
+            ("K6CCC", "San Jose", "146.9400", "146.3400"),
+            ("W6AAA", "Mountain View", "441.0000", "446.0000"),
+        ]
+    ]
+}
+
+
+def repeaterbook(**kwargs):
+    return AnalogChannelGeneratorFromRepeaterBook(
+        SOURCE, TxPower.High, aprs=None, **kwargs
+    )
+
+
+def test_band_partitioned_ids():
+    bands = [(144.0, 148.0), (420.0, 450.0)]
+    channels = repeaterbook(bands=bands).channels(Sequence())
+
+    assert [(c.internal_id, c.rx_freq) for c in channels] == [
+        (1, 145.23),
+        (2, 146.94),
+        (3, 442.1),
+        (4, 441.0),
+    ]
+
+
+def test_zones_and_scanlists_from_a_single_pass():
+    channels = repeaterbook().channels(Sequence())
+    expected = ZoneFromCallsignGenerator2(channels).zones(Sequence())
+
+    # One-shot iterators are enough; only (name, ID) keys are buffered
+    zones = ZoneFromCallsignGenerator2(iter(channels)).zones(Sequence())
+    scanlists = CallsignPrefixAnalogScanListGenerator(channels).scanlists(Sequence())
+
+    assert zones == expected
+    assert [(z.name, z.channels) for z in zones] == [
+        ("K6CCC San Jose", [3]),
+        ("W6AAA Mountain View", [2, 4]),
+        ("W6BBB Palo Alto", [1]),
+    ]
+    assert [(s.name, s.channels) for s in scanlists] == [
+        ("K6C Analog", [3]),
+        ("W6A Analog", [2, 4]),
+        ("W6B Analog", [1]),
+    ]
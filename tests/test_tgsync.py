@@ -0,0 +1,127 @@
+"""Tests for the incremental Brandmeister static talkgroup sync"""
+
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources.cache import FileCache
+from datasources.tgsync import TalkgroupSync
+
+NOW = datetime(2026, 10, 19, 3, 0, 0)
+
+
+class FakeTalkgroupAPI(FileCache):
+    def __init__(self, failing=()):
+        FileCache.__init__(self, "static_talkgroups")
+        self.fetched = []
+        self.failing = set(failing)
+
+    def static_talkgroups(self, device_id, refresh=False):
+        self.fetched.append(device_id)
+        if device_id in self.failing:
+            raise requests.ConnectionError(device_id)
+        self.write_cache(device_id, [{"talkgroup": 260, "slot": 1}])
+        return [(260, 1)]
+
+
+def device(device_id, last_seen="2026-10-18 22:00:00", **fields):
+    return {
+        "id": device_id,
+        "callsign": f"SR{device_id}",
+        "rx": "430.0",
+        "tx": "437.6",
+        "colorcode": 1,
+        "last_seen": last_seen,
+        **fields,
+    }
+
+
+def sync(api, now=NOW):
+    return TalkgroupSync(api, active_days=2, max_age_days=7, now=now)
+
+
+def test_first_sync_fetches_everything(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = FakeTalkgroupAPI()
+
+    plan = sync(api).run([device(1), device(2)])
+
+    assert plan.new == ["1", "2"]
+    assert api.fetched == ["1", "2"]
+
+
+def test_first_sync_adopts_a_warm_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = FakeTalkgroupAPI()
+    for device_id in ("1", "2"):
+        api.write_cache(device_id, [{"talkgroup": 260, "slot": 1}])
+    # Written by an ordinary build ten days ago; device 2 is active since
+    old = datetime(2026, 10, 9).timestamp()
+    os.utime(api.file_path("2.json"), (old, old))
+
+    plan = sync(api).run(
+        [device(1), device(2), device(3, last_seen="2026-01-01 00:00:00")]
+    )
+
+    assert plan.adopted == ["1"]
+    assert plan.stale == ["2"]
+    assert plan.new == ["3"]
+    assert sorted(api.fetched) == ["2", "3"]
+    assert sync(api).plan([device(1), device(2), device(3)]).to_fetch() == []
+
+
+def test_nightly_sync_only_fetches_deltas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = FakeTalkgroupAPI()
+    sync(api, now=datetime(2026, 10, 15)).run(
+        [device(1), device(2), device(3), device(4, last_seen="2026-01-01 00:00:00")]
+    )
+    api.evict("3")
+    api.fetched.clear()
+
+    plan = sync(api).run(
+        [
+            device(1, lastKnownMaster=2602),
+            device(3),
+            device(4, last_seen="2026-01-01 00:00:00"),
+            device(5),
+        ]
+    )
+
+    assert plan.new == ["5"]
+    assert plan.changed == ["1"]
+    assert plan.missing == ["3"]
+    assert plan.unchanged == ["4"]
+    assert plan.removed == ["2"]
+    assert sorted(api.fetched) == ["1", "3", "5"]
+    assert api.read_cache("2") is None
+    assert "2" in api.read_cache("_sync_state")["tombstones"]
+
+
+def test_active_devices_are_refetched_after_max_age(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = FakeTalkgroupAPI()
+    sync(api, now=datetime(2026, 10, 10)).run([device(1), device(2, last_seen=None)])
+    api.fetched.clear()
+
+    plan = sync(api).run([device(1), device(2, last_seen=None)])
+
+    assert plan.stale == ["1"]
+    assert plan.unchanged == ["2"]
+
+
+def test_failed_fetches_are_retried(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    plan = sync(FakeTalkgroupAPI(failing={"2"})).run([device(1), device(2)])
+    assert plan.failed == ["2"]
+
+    api = FakeTalkgroupAPI()
+    plan = sync(api).run([device(1), device(2)])
+    assert plan.new == ["2"]
+    assert api.fetched == ["2"]
@@ -0,0 +1,264 @@
+"""Tests for the pooled HTTP transport, against a local stub server"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources import transport as transport_module
+from datasources.cache import FileCache
+from datasources.transport import DownloadError, RateLimiter, Transport
+
+BODY = b'{"results": []}' * 100
+EXPORT = json.dumps({"results": [{"id": i} for i in range(50000)]}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.startswith("/export"):
+            return self.send_export()
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.requests += 1
+            failures = server.failures
+            server.failures = max(0, failures - 1)
+        if failures:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = BODY
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        server.sizes.append(len(body))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_export(self):
+        server = self.server
+        server.ranges.append(self.headers.get("Range"))
+        start = 0
+        if self.headers.get("Range") and self.headers.get("If-Range") == server.etag:
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+        body = server.export[start:]
+
+        self.send_response(206 if start else 200)
+        if start:
+            total = len(server.export)
+            self.send_header("Content-Range", f"bytes {start}-{total - 1}/{total}")
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if server.drops:
+            server.drops -= 1
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.connections = set()
+    server.requests = 0
+    server.failures = 0
+    server.sizes = []
+    server.export = EXPORT
+    server.etag = '"v1"'
+    server.ranges = []
+    server.drops = 0
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server, path="/doc"):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_connections_are_reused(server):
+    transport = Transport(rate_limits={})
+
+    for i in range(5):
+        assert transport.get(url(server, f"/doc{i}")).content == BODY
+
+    assert server.requests == 5
+    assert len(server.connections) == 1
+
+
+def test_responses_are_compressed(server):
+    response = Transport(rate_limits={}).get(url(server))
+
+    assert response.content == BODY
+    assert server.sizes[0] < len(BODY)
+
+
+def test_retryable_statuses_are_retried(server):
+    server.failures = 2
+    response = Transport(backoff=0, jitter=0, rate_limits={}).get(url(server))
+
+    assert response.status_code == 200
+    assert server.requests == 3
+
+
+def test_gives_up_after_retries(server):
+    server.failures = 10
+    response = Transport(retries=1, backoff=0, jitter=0, rate_limits={}).get(
+        url(server)
+    )
+
+    assert response.status_code == 503
+    assert server.requests == 2
+
+
+def test_rate_limited_hosts_are_spaced(server):
+    sleeps = []
+    transport = Transport(rate_limits={})
+    transport._limiters["127.0.0.1"] = RateLimiter(
+        1.0, clock=lambda: 100.0, sleep=sleeps.append
+    )
+
+    for _ in range(3):
+        transport.get(url(server))
+
+    assert sleeps == [1.0, 2.0]
+
+
+def test_retries_wait_for_the_rate_limit(server):
+    server.failures = 2
+    sleeps = []
+    transport = Transport(rate_limits={}, sleep=sleeps.append)
+    transport._limiters["127.0.0.1"] = RateLimiter(
+        1.0, clock=lambda: 100.0, sleep=sleeps.append
+    )
+
+    response = transport.get(url(server))
+
+    assert response.status_code == 200
+    assert server.requests == 3
+    # Backoff of at least 0.5s, then 1s, between attempts spaced by the limiter
+    assert sleeps[1] == 1.0 and sleeps[3] == 2.0
+    assert sleeps[0] >= 0.5 and sleeps[2] >= 1.0
+
+
+def test_rate_limiter_does_not_wait_when_idle():
+    now = [0.0]
+    sleeps = []
+    limiter = RateLimiter(1.0, clock=lambda: now[0], sleep=sleeps.append)
+
+    limiter.wait()
+    now[0] = 5.0
+    limiter.wait()
+
+    assert sleeps == []
+
+
+def resumed_at(range_header):
+    return int(range_header.split("=")[1].rstrip("-"))
+
+
+def test_download_streams_to_file(server, tmp_path):
+    path = str(tmp_path / "export.json")
+    progress = []
+
+    Transport(rate_limits={}).download(
+        url(server, "/export"), path, progress=lambda *p: progress.append(p)
+    )
+
+    assert (tmp_path / "export.json").read_bytes() == EXPORT
+    assert os.listdir(tmp_path) == ["export.json"]
+    assert progress[-1] == (len(EXPORT), len(EXPORT))
+
+
+def test_dropped_download_is_resumed(server, tmp_path):
+    server.drops = 1
+    path = str(tmp_path / "export.json")
+
+    Transport(rate_limits={}).download(url(server, "/export"), path)
+
+    assert (tmp_path / "export.json").read_bytes() == EXPORT
+    assert len(server.ranges) == 2
+    assert resumed_at(server.ranges[1]) > 0
+
+
+def test_download_resumes_across_calls(server, tmp_path):
+    server.drops = 1
+    path = str(tmp_path / "export.json")
+    transport = Transport(rate_limits={})
+
+    with pytest.raises(Exception):
+        transport.download(url(server, "/export"), path, attempts=1)
+    transport.download(url(server, "/export"), path)
+
+    assert (tmp_path / "export.json").read_bytes() == EXPORT
+    assert resumed_at(server.ranges[-1]) > 0
+
+
+def test_changed_document_is_downloaded_again(server, tmp_path):
+    server.drops = 1
+    path = str(tmp_path / "export.json")
+    transport = Transport(rate_limits={})
+    with pytest.raises(Exception):
+        transport.download(url(server, "/export"), path, attempts=1)
+
+    server.export = EXPORT.replace(b"results", b"answers")
+    server.etag = '"v2"'
+    transport.download(url(server, "/export"), path)
+
+    assert (tmp_path / "export.json").read_bytes() == server.export
+
+
+def test_download_checks_digest(server, tmp_path):
+    path = str(tmp_path / "export.json")
+    transport = Transport(rate_limits={})
+
+    with pytest.raises(DownloadError):
+        transport.download(url(server, "/export"), path, sha256="0" * 64)
+    assert os.listdir(tmp_path) == []
+
+    digest = hashlib.sha256(EXPORT).hexdigest()
+    transport.download(url(server, "/export"), path, sha256=digest)
+    assert (tmp_path / "export.json").read_bytes() == EXPORT
+
+
+def test_file_cache_parses_streamed_download(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(transport_module, "_default", Transport(rate_limits={}))
+    FileCache.memory.clear()
+    cache = FileCache("test")
+
+    value = cache.cached("export", url(server, "/export"), stream=True)
+
+    assert len(value["results"]) == 50000
+    assert FileCache("test").read_cache("export") == json.loads(EXPORT)
+    assert sorted(os.listdir(tmp_path / "cache" / "test")) == [
+        ".export.lock",
+        "export.json",
+    ]
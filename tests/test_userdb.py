@@ -0,0 +1,154 @@
+"""Tests for the streaming radioid.net user database export"""
+
+import csv
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from datasources.jsonstream import iter_array
+from datasources.radioid import iter_users
+from userdb import UserFilter, export_users, sorted_users
+
+USERS = [
+    {
+        "fname": "Jan",
+        "name": "Jan",
+        "surname": "Kowalski",
+        "callsign": "SP5ABC",
+        "city": "Warszawa",
+        "state": "Mazowieckie",
+        "country": "Poland",
+        "remarks": "DMR",
+        "radio_id": 2605003,
+        "id": 2605003,
+    },
+    {
+        "fname": "Zoë",
+        "surname": "Ślęzak",
+        "callsign": "SQ9XYZ",
+        "city": "Kraków",
+        "state": "Małopolskie",
+        "country": "Poland",
+        "remarks": "",
+        "radio_id": 2609001,
+    },
+    {
+        "fname": "Ann",
+        "surname": "Smith",
+        "callsign": "W2ABC",
+        "city": "New York",
+        "state": "New York",
+        "country": "United States",
+        "remarks": None,
+        "radio_id": 3136001,
+    },
+    {
+        "fname": "Piotr",
+        "surname": "Nowak",
+        "callsign": "SP2DEF",
+        "city": "Gdańsk",
+        "state": "Pomorskie",
+        "country": "Poland",
+        "remarks": "",
+        "radio_id": 2602001,
+    },
+]
+
+
+@pytest.fixture
+def users_json(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps({"users": USERS}, indent=1), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_iter_array_across_chunk_boundaries(chunk_size):
+    document = json.dumps({"meta": {"users": 1}, "users": USERS, "count": 4})
+    items = list(iter_array(io.StringIO(document), "users", chunk_size))
+    assert items == USERS
+
+
+def test_iter_array_rejects_truncated_document():
+    document = json.dumps({"users": USERS})[:-40]
+    with pytest.raises(ValueError):
+        list(iter_array(io.StringIO(document), "users", 16))
+
+
+def test_iter_users_normalizes(users_json):
+    users = list(iter_users(users_json, chunk_size=32))
+
+    assert [u["radio_id"] for u in users] == [2605003, 2609001, 3136001, 2602001]
+    assert users[2]["remarks"] == ""
+    assert set(users[0]) == {
+        "radio_id",
+        "callsign",
+        "fname",
+        "surname",
+        "city",
+        "state",
+        "country",
+        "remarks",
+    }
+
+
+def test_user_filter():
+    users = [
+        {"country": "Poland", "state": "Pomorskie", "radio_id": 1},
+        {"country": "United States", "state": "New York", "radio_id": 2},
+    ]
+    assert [u["radio_id"] for u in users if UserFilter(["poland"]).matches(u)] == [1]
+    assert not UserFilter(states=["Mazowieckie"]).matches(users[0])
+    assert not UserFilter(active_ids={2}).matches(users[0])
+
+
+@pytest.mark.parametrize("max_in_memory", [1, 2, 3, 100])
+def test_sorted_users_in_bounded_memory(tmp_path, max_in_memory):
+    users = [{"radio_id": i} for i in (5, 3, 9, 1, 3, 7, 2)]
+
+    ordered = list(sorted_users(users, max_in_memory, directory=tmp_path))
+
+    assert [u["radio_id"] for u in ordered] == [1, 2, 3, 5, 7, 9]
+    assert os.listdir(tmp_path) == []
+
+
+def test_export_anytone_csv(tmp_path, users_json):
+    out = tmp_path / "contacts.csv"
+
+    count = export_users(
+        str(out), users_json, UserFilter(countries=["Poland"]), max_in_memory=2
+    )
+
+    assert count == 3
+    rows = list(csv.reader(out.open(encoding="utf-8", newline="")))
+    assert rows[0][:3] == ["No.", "Radio ID", "Callsign"]
+    assert [row[1] for row in rows[1:]] == ["2602001", "2605003", "2609001"]
+    assert rows[3] == [
+        "3",
+        "2609001",
+        "SQ9XYZ",
+        "Zoë Ślęzak",
+        "Kraków",
+        "Małopolskie",
+        "Poland",
+        "",
+        "Private Call",
+        "None",
+    ]
+    assert sorted(os.listdir(tmp_path)) == ["contacts.csv", "users.json"]
+
+
+def test_export_qdmr_with_limit(tmp_path, users_json):
+    out = tmp_path / "users-db.json"
+
+    count = export_users(str(out), users_json, format="qdmr", limit=2)
+
+    assert count == 2
+    users = json.loads(out.read_text(encoding="utf-8"))["users"]
+    assert [u["callsign"] for u in users] == ["SP2DEF", "SP5ABC"]
@@ -0,0 +1,219 @@
+"""Tests for the in-process codeplug validator"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "codeplug"))
+
+from aggregators import ChannelAggregator
+from anytone import AT878UV
+from models import (
+    AnalogAPRSConfig,
+    AnalogChannel,
+    ChannelWidth,
+    Contact,
+    ContactType,
+    DigitalAPRSConfig,
+    DigitalChannel,
+    GroupList,
+    RepeaterSite,
+    ScanList,
+    TxPower,
+    Zone,
+)
+from validators import CodeplugValidator, ValidationError, tag_generator
+
+
+def make_contact(internal_id):
+    return Contact(
+        internal_id=internal_id,
+        name=f"TG{internal_id}",
+        type=ContactType.GroupCall,
+        calling_id=260 + internal_id,
+    )
+
+
+def make_digital(internal_id, rx_freq=439.0, color=1, **kwargs):
+    fields = dict(
+        internal_id=internal_id,
+        name=f"Channel {internal_id}",
+        tx_power=TxPower.High,
+        scanlist_id="-",
+        tot=None,
+        rx_only=False,
+        admit_crit="Free",
+        slot=1,
+        rx_grouplist_id=None,
+        tx_contact_id=1,
+        aprs=None,
+        anytone=None,
+        site=RepeaterSite.shared(
+            rx_freq=rx_freq, tx_freq=431.4, callsign="SR5WA", color=color
+        ),
+    )
+    fields.update(kwargs)
+    return DigitalChannel(**fields)
+
+
+def make_analog(internal_id, **kwargs):
+    fields = dict(
+        internal_id=internal_id,
+        name=f"FM {internal_id}",
+        tx_power=TxPower.High,
+        scanlist_id=None,
+        tot=None,
+        rx_only=False,
+        admit_crit="Always",
+        squelch=1,
+        rx_tone=None,
+        tx_tone=None,
+        width=ChannelWidth.Narrow,
+        aprs=None,
+        site=RepeaterSite.shared(rx_freq=145.6, tx_freq=145.0),
+    )
+    fields.update(kwargs)
+    return AnalogChannel(**fields)
+
+
+def analog_aprs(**kwargs):
+    fields = dict(
+        internal_id=1,
+        name="APRS EU",
+        channel_id=1,
+        source="SP5ABC",
+        destination="APAT81",
+        path=["WIDE1-1"],
+        icon="Car",
+        period=300,
+        message="",
+    )
+    fields.update(kwargs)
+    return AnalogAPRSConfig(**fields)
+
+
+def validate(**sections):
+    return CodeplugValidator(AT878UV.LIMITS).validate(**sections)
+
+
+def messages(report):
+    return [(i.severity, i.section, i.message) for i in report.issues]
+
+
+def test_consistent_codeplug_passes():
+    digital_aprs = DigitalAPRSConfig(internal_id=2, name="DMR", period=60, contact_id=1)
+    report = validate(
+        contacts=[make_contact(1), make_contact(2)],
+        grouplists=[GroupList(internal_id=1, name="RX", contact_ids=["1", 2])],
+        scanlists=[ScanList(internal_id=1, name="All", channels=[1, 2])],
+        analog_channels=[make_analog(1, scanlist_id=1, aprs=analog_aprs())],
+        digital_channels=[
+            make_digital(2, rx_grouplist_id=1, tx_contact_id="2", aprs=digital_aprs)
+        ],
+        zones=[Zone(internal_id=1, name="Zone", channels=[1, 2])],
+        analog_aprs_config=analog_aprs(),
+        digital_aprs_config=digital_aprs,
+    )
+
+    assert report.ok
+    assert report.issues == []
+
+
+def test_dangling_references():
+    report = validate(
+        contacts=[make_contact(1)],
+        grouplists=[GroupList(internal_id=1, name="RX", contact_ids=[1, 7])],
+        digital_channels=[
+            make_digital(1, rx_grouplist_id=3, scanlist_id=4, tx_contact_id=9)
+        ],
+        zones=[Zone(internal_id=1, name="Zone", channels=[1, 5])],
+        analog_aprs_config=analog_aprs(channel_id=8),
+    )
+
+    assert messages(report) == [
+        ("error", "grouplist", "refers to missing contacts [7]"),
+        ("error", "zone", "refers to missing channels [5]"),
+        ("error", "channel", "refers to missing scanlist 4"),
+        ("error", "channel", "refers to missing contact 9"),
+        ("error", "channel", "refers to missing grouplist 3"),
+        ("error", "analog APRS", "refers to missing channel 8"),
+    ]
+    with pytest.raises(ValidationError, match="6 errors"):
+        raise ValidationError(report)
+
+
+def test_duplicate_ids_and_bad_values():
+    report = validate(
+        contacts=[make_contact(1)],
+        digital_channels=[
+            make_digital(1, color=16, slot=3),
+            make_digital(1, rx_freq=300.0, tx_power="Max"),
+        ],
+    )
+
+    assert messages(report) == [
+        ("error", "channel", "duplicate ID 1"),
+        ("error", "channel", "invalid time slot 3"),
+        ("error", "channel", "invalid color code 16"),
+        ("error", "channel", "invalid power 'Max'"),
+        ("error", "channel", "Frequency 300.0 MHz is out of VHF/UHF range."),
+    ]
+
+
+def test_aprs_icon_and_period():
+    report = validate(
+        analog_channels=[make_analog(1)],
+        analog_aprs_config=analog_aprs(icon="Jogger", period=95),
+    )
+    assert messages(report) == [
+        ("warning", "analog APRS", "icon 'Jogger' cannot be encoded for the radio"),
+        ("error", "analog APRS", "period 95 is not a multiple of 10s"),
+    ]
+
+    report = validate(analog_aprs_config=analog_aprs(channel_id=None, icon="Rocket"))
+    assert messages(report) == [("error", "analog APRS", "unknown icon 'Rocket'")]
+
+    report = validate(
+        contacts=[make_contact(1)],
+        digital_aprs_config=DigitalAPRSConfig(
+            internal_id=2, name="DMR", period=0, contact_id=1
+        ),
+    )
+    assert messages(report) == [
+        ("error", "digital APRS", "period 0 is not a multiple of 10s")
+    ]
+
+
+def test_capacity_and_name_limits():
+    channels = [make_digital(i) for i in range(1, 52)]
+    channels[0].name = "A very long channel name"
+    report = validate(
+        contacts=[make_contact(1)],
+        digital_channels=channels,
+        scanlists=[ScanList(internal_id=1, name="All", channels=list(range(1, 52)))],
+    )
+
+    assert messages(report) == [
+        ("error", "scanlist", "51 channels exceed the radio's 50"),
+        ("warning", "channel", "name longer than 16 characters is truncated"),
+    ]
+
+
+def test_issues_name_the_generator():
+    class RepeaterGenerator:
+        def channels(self, sequence):
+            return [make_digital(1, tx_contact_id=5)]
+
+    channels = ChannelAggregator(RepeaterGenerator()).channels(None)
+    tag_generator(channels, "Recipe.prepare_digital_channels")
+
+    report = validate(digital_channels=channels)
+
+    assert [i.generator for i in report.issues] == ["RepeaterGenerator"]
+    assert channels[0] == make_digital(1, tx_contact_id=5)
+    assert "RepeaterGenerator" not in repr(channels[0])
+    assert str(report.issues[0]) == (
+        "error: channel 'Channel 1': refers to missing contact 5"
+        " [from RepeaterGenerator]"
+    )